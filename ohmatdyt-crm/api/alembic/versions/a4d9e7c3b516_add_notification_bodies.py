@@ -0,0 +1,155 @@
+"""add content-addressed notification_bodies
+
+Revision ID: a4d9e7c3b516
+Revises: f2c7d4e8a915
+Create Date: 2026-10-19 18:00:00.000000
+
+notification_logs.body_text / body_html are replaced by a reference to
+notification_bodies: one gzip-compressed row per distinct content,
+keyed by sha256 (same hash as crud.make_notification_body_id).
+Per-recipient fields of shared renders live in notification_logs.body_params.
+
+Existing rows are deduplicated: hashes are computed in SQL, each distinct
+body is compressed and stored once.
+
+"""
+import gzip
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d9e7c3b516'
+down_revision: Union[str, None] = 'f2c7d4e8a915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+# sha256(text || U+001F || html), див. crud.make_notification_body_id
+BODY_HASH_SQL = (
+    "encode(sha256(convert_to("
+    "coalesce(body_text, '') || chr(31) || coalesce(body_html, ''), 'UTF8')), 'hex')"
+)
+
+
+def _compress(value):
+    return gzip.compress(value.encode("utf-8")) if value is not None else None
+
+
+def _decompress(value):
+    return gzip.decompress(value).decode("utf-8") if value is not None else None
+
+
+def upgrade() -> None:
+    op.create_table('notification_bodies',
+    sa.Column('id', sa.String(length=64), nullable=False),
+    sa.Column('body_text_gz', sa.LargeBinary(), nullable=False),
+    sa.Column('body_html_gz', sa.LargeBinary(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    op.add_column('notification_logs', sa.Column('body_id', sa.String(length=64), nullable=True))
+    op.add_column('notification_logs', sa.Column('body_params', sa.Text(), nullable=True))
+
+    op.execute(
+        f"""
+        UPDATE notification_logs
+        SET body_id = {BODY_HASH_SQL}
+        WHERE body_text IS NOT NULL OR body_html IS NOT NULL
+        """
+    )
+
+    # Кожне унікальне тіло стискається та зберігається один раз
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        """
+        SELECT DISTINCT ON (body_id) body_id, body_text, body_html
+        FROM notification_logs
+        WHERE body_id IS NOT NULL
+        ORDER BY body_id
+        """
+    ).execution_options(stream_results=True))
+    insert = sa.text(
+        """
+        INSERT INTO notification_bodies (id, body_text_gz, body_html_gz, created_at)
+        VALUES (:id, :body_text_gz, :body_html_gz, now() at time zone 'utc')
+        """
+    )
+    while True:
+        batch = rows.fetchmany(BATCH_SIZE)
+        if not batch:
+            break
+        conn.execute(insert, [
+            {
+                "id": body_id,
+                "body_text_gz": _compress(body_text or ""),
+                "body_html_gz": _compress(body_html),
+            }
+            for body_id, body_text, body_html in batch
+        ])
+
+    op.create_foreign_key(
+        'notification_logs_body_id_fkey', 'notification_logs', 'notification_bodies',
+        ['body_id'], ['id'],
+    )
+    op.create_index(op.f('ix_notification_logs_body_id'), 'notification_logs', ['body_id'], unique=False)
+
+    op.drop_column('notification_logs', 'body_html')
+    op.drop_column('notification_logs', 'body_text')
+
+
+def downgrade() -> None:
+    import json
+    from markupsafe import escape
+
+    op.add_column('notification_logs', sa.Column('body_text', sa.Text(), nullable=True))
+    op.add_column('notification_logs', sa.Column('body_html', sa.Text(), nullable=True))
+
+    conn = op.get_bind()
+    bodies = conn.execute(sa.text(
+        "SELECT id, body_text_gz, body_html_gz FROM notification_bodies"
+    )).fetchall()
+    for body_id, body_text_gz, body_html_gz in bodies:
+        body_text, body_html = _decompress(body_text_gz), _decompress(body_html_gz)
+        conn.execute(
+            sa.text(
+                """
+                UPDATE notification_logs SET body_text = :body_text, body_html = :body_html
+                WHERE body_id = :body_id AND body_params IS NULL
+                """
+            ),
+            {"body_text": body_text, "body_html": body_html, "body_id": body_id},
+        )
+
+        # Персоналізовані листи: підставляємо параметри запису
+        personalized = conn.execute(
+            sa.text(
+                "SELECT id, body_params FROM notification_logs "
+                "WHERE body_id = :body_id AND body_params IS NOT NULL"
+            ),
+            {"body_id": body_id},
+        ).fetchall()
+        for log_id, body_params in personalized:
+            text, html = body_text, body_html
+            for field, value in json.loads(body_params).items():
+                marker = f"@@{field}@@"
+                text = text.replace(marker, str(value))
+                if html is not None:
+                    html = html.replace(marker, str(escape(str(value))))
+            conn.execute(
+                sa.text(
+                    "UPDATE notification_logs SET body_text = :body_text, body_html = :body_html "
+                    "WHERE id = :id"
+                ),
+                {"body_text": text, "body_html": html, "id": log_id},
+            )
+
+    op.drop_index(op.f('ix_notification_logs_body_id'), table_name='notification_logs')
+    op.drop_constraint('notification_logs_body_id_fkey', 'notification_logs', type_='foreignkey')
+    op.drop_column('notification_logs', 'body_params')
+    op.drop_column('notification_logs', 'body_id')
+    op.drop_table('notification_bodies')
@@ -0,0 +1,42 @@
+"""add status_history (case_id, changed_at) index
+
+Revision ID: a7c2e4f19b36
+Revises: c3270fdffae6
+Create Date: 2026-10-19 10:00:00.000000
+
+Resolution-time analytics (percentiles per category/channel/executor)
+look up the timeline of each case in status_history.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c2e4f19b36'
+down_revision: Union[str, None] = 'c3270fdffae6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY: status_history may be large, don't block writes while building
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_status_history_case_id_changed_at',
+            'status_history',
+            ['case_id', 'changed_at'],
+            unique=False,
+            postgresql_include=['new_status'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_status_history_case_id_changed_at',
+            table_name='status_history',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,35 @@
+"""add scrub cursors
+
+Revision ID: a7d3e5f9c214
+Revises: e4b9c2f7a813
+Create Date: 2026-10-20 01:00:00.000000
+
+scrub_cursors: resumable positions of the attachment integrity scrubber
+(app/scrubber.py), one row per phase.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e5f9c214'
+down_revision: Union[str, None] = 'e4b9c2f7a813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('scrub_cursors',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('position', sa.String(length=500), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('last_completed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('scrub_cursors')
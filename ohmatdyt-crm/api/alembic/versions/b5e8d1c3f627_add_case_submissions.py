@@ -0,0 +1,46 @@
+"""add case submissions
+
+Revision ID: b5e8d1c3f627
+Revises: a7d3e5f9c214
+Create Date: 2026-10-20 02:00:00.000000
+
+case_submissions: asynchronous case creation (POST /api/cases/submissions),
+the case and its attachments are created by a worker (app/submissions.py).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e8d1c3f627'
+down_revision: Union[str, None] = 'a7d3e5f9c214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('case_submissions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('author_id', sa.UUID(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'PROCESSING', 'COMPLETED', 'FAILED', name='casesubmissionstatus'), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('case_id', sa.UUID(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['author_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['case_id'], ['cases.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_case_submissions_author_id'), 'case_submissions', ['author_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_case_submissions_author_id'), table_name='case_submissions')
+    op.drop_table('case_submissions')
+    op.execute("DROP TYPE casesubmissionstatus")
@@ -0,0 +1,63 @@
+"""add notification digest mode
+
+Revision ID: b6e1d3f8a274
+Revises: a4d9e7c3b516
+Create Date: 2026-10-19 20:00:00.000000
+
+- users.email_digest_enabled: opt-in digest mode
+- notification_digest_items: buffered events, flushed by beat task
+  flush_notification_digests into one email per user
+- notificationtype: new value DIGEST
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e1d3f8a274'
+down_revision: Union[str, None] = 'a4d9e7c3b516'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ALTER TYPE ... ADD VALUE не можна використовувати в тій самій транзакції
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE notificationtype ADD VALUE IF NOT EXISTS 'DIGEST'")
+
+    op.add_column(
+        'users',
+        sa.Column('email_digest_enabled', sa.Boolean(), server_default='false', nullable=False),
+    )
+
+    notification_type = postgresql.ENUM(name='notificationtype', create_type=False)
+
+    op.create_table('notification_digest_items',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('notification_type', notification_type, nullable=False),
+    sa.Column('event_key', sa.String(length=255), nullable=False),
+    sa.Column('related_case_id', sa.UUID(), nullable=True),
+    sa.Column('case_public_id', sa.Integer(), nullable=True),
+    sa.Column('title', sa.String(length=500), nullable=False),
+    sa.Column('details', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['related_case_id'], ['cases.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('event_key')
+    )
+    op.create_index(op.f('ix_notification_digest_items_id'), 'notification_digest_items', ['id'], unique=False)
+    op.create_index(op.f('ix_notification_digest_items_user_id'), 'notification_digest_items', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_notification_digest_items_user_id'), table_name='notification_digest_items')
+    op.drop_index(op.f('ix_notification_digest_items_id'), table_name='notification_digest_items')
+    op.drop_table('notification_digest_items')
+    op.drop_column('users', 'email_digest_enabled')
+    # PostgreSQL не підтримує видалення значень enum - DIGEST залишається в notificationtype
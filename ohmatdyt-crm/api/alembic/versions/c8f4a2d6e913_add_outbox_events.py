@@ -0,0 +1,43 @@
+"""add transactional outbox
+
+Revision ID: c8f4a2d6e913
+Revises: b6e1d3f8a274
+Create Date: 2026-10-19 21:00:00.000000
+
+outbox_events: domain events written in the same transaction as the
+case/comment change and published to Celery by the relay (app/outbox.py).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f4a2d6e913'
+down_revision: Union[str, None] = 'b6e1d3f8a274'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('outbox_events',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('task_name', sa.String(length=255), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('dispatched_at', sa.DateTime(), nullable=True),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_outbox_events_pending', 'outbox_events', ['created_at'],
+        unique=False, postgresql_where=sa.text('dispatched_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_events_pending', table_name='outbox_events', postgresql_where=sa.text('dispatched_at IS NULL'))
+    op.drop_table('outbox_events')
@@ -0,0 +1,29 @@
+"""add attachments.sha256
+
+Revision ID: d1a7f3b9c524
+Revises: c8f4a2d6e913
+Create Date: 2026-10-19 22:00:00.000000
+
+SHA-256 of the file content, computed while the upload is streamed to
+disk. Existing attachments keep NULL.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1a7f3b9c524'
+down_revision: Union[str, None] = 'c8f4a2d6e913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('attachments', sa.Column('sha256', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('attachments', 'sha256')
@@ -0,0 +1,69 @@
+"""add cases.due_at SLA deadline
+
+Revision ID: d5b8e2a41c07
+Revises: a7c2e4f19b36
+Create Date: 2026-10-19 12:00:00.000000
+
+Persisted SLA deadline for open cases. Overdue lists become index range
+scans on a partial index instead of full scans over created_at/status.
+
+Backfill uses the same defaults as crud.CASE_SLA_HOURS:
+- NEW: 72h from entering the status
+- IN_PROGRESS: 168h from entering the status
+- NEEDS_INFO / DONE / REJECTED: no deadline (NULL)
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5b8e2a41c07'
+down_revision: Union[str, None] = 'a7c2e4f19b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('cases', sa.Column('due_at', sa.DateTime(), nullable=True))
+
+    # Початок відліку - останній вхід у поточний статус (або created_at)
+    op.execute(
+        """
+        UPDATE cases c
+        SET due_at = COALESCE(
+            (
+                SELECT max(sh.changed_at)
+                FROM status_history sh
+                WHERE sh.case_id = c.id AND sh.new_status = c.status
+            ),
+            c.created_at
+        ) + CASE c.status
+                WHEN 'NEW' THEN interval '72 hours'
+                WHEN 'IN_PROGRESS' THEN interval '168 hours'
+            END
+        WHERE c.status IN ('NEW', 'IN_PROGRESS')
+        """
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_cases_due_at_open',
+            'cases',
+            ['due_at'],
+            unique=False,
+            postgresql_where=sa.text('due_at IS NOT NULL'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_cases_due_at_open',
+            table_name='cases',
+            postgresql_concurrently=True,
+        )
+    op.drop_column('cases', 'due_at')
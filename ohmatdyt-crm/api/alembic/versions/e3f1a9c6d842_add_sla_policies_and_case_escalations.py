@@ -0,0 +1,82 @@
+"""add sla_policies and case_escalations tables
+
+Revision ID: e3f1a9c6d842
+Revises: d5b8e2a41c07
+Create Date: 2026-10-19 14:00:00.000000
+
+- sla_policies: SLA target hours per (category, status); category_id NULL
+  is the default policy for all categories
+- case_escalations: one row per breached deadline (case_id, due_at),
+  written by the SLA scan beat task
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f1a9c6d842'
+down_revision: Union[str, None] = 'd5b8e2a41c07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Reuse existing casestatus enum type
+    case_status = postgresql.ENUM(
+        'NEW', 'IN_PROGRESS', 'NEEDS_INFO', 'REJECTED', 'DONE',
+        name='casestatus',
+        create_type=False,
+    )
+
+    op.create_table('sla_policies',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('category_id', sa.UUID(), nullable=True),
+    sa.Column('status', case_status, nullable=False),
+    sa.Column('target_hours', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sla_policies_id'), 'sla_policies', ['id'], unique=False)
+    op.create_index(op.f('ix_sla_policies_category_id'), 'sla_policies', ['category_id'], unique=False)
+    op.create_index(
+        'ux_sla_policies_category_status', 'sla_policies', ['category_id', 'status'],
+        unique=True, postgresql_where=sa.text('category_id IS NOT NULL'),
+    )
+    op.create_index(
+        'ux_sla_policies_default_status', 'sla_policies', ['status'],
+        unique=True, postgresql_where=sa.text('category_id IS NULL'),
+    )
+
+    op.create_table('case_escalations',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('case_id', sa.UUID(), nullable=False),
+    sa.Column('status', case_status, nullable=False),
+    sa.Column('due_at', sa.DateTime(), nullable=False),
+    sa.Column('escalated_at', sa.DateTime(), nullable=False),
+    sa.Column('notified_at', sa.DateTime(), nullable=True),
+    sa.Column('recipients_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['case_id'], ['cases.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_case_escalations_id'), 'case_escalations', ['id'], unique=False)
+    op.create_index(op.f('ix_case_escalations_escalated_at'), 'case_escalations', ['escalated_at'], unique=False)
+    op.create_index('ux_case_escalations_case_id_due_at', 'case_escalations', ['case_id', 'due_at'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ux_case_escalations_case_id_due_at', table_name='case_escalations')
+    op.drop_index(op.f('ix_case_escalations_escalated_at'), table_name='case_escalations')
+    op.drop_index(op.f('ix_case_escalations_id'), table_name='case_escalations')
+    op.drop_table('case_escalations')
+
+    op.drop_index('ux_sla_policies_default_status', table_name='sla_policies')
+    op.drop_index('ux_sla_policies_category_status', table_name='sla_policies')
+    op.drop_index(op.f('ix_sla_policies_category_id'), table_name='sla_policies')
+    op.drop_index(op.f('ix_sla_policies_id'), table_name='sla_policies')
+    op.drop_table('sla_policies')
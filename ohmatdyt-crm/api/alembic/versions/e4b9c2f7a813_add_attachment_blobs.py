@@ -0,0 +1,66 @@
+"""add content-addressed attachment blobs
+
+Revision ID: e4b9c2f7a813
+Revises: d1a7f3b9c524
+Create Date: 2026-10-19 23:00:00.000000
+
+attachment_blobs: one file per distinct content (sha256) with a reference
+count; attachments.blob_id points to the shared blob. Existing attachments
+keep blob_id NULL until `python -m app.blobs dedupe` moves them.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b9c2f7a813'
+down_revision: Union[str, None] = 'd1a7f3b9c524'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('attachment_blobs',
+    sa.Column('id', sa.String(length=64), nullable=False),
+    sa.Column('file_path', sa.String(length=500), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_attachment_blobs_unreferenced', 'attachment_blobs', ['created_at'],
+        unique=False, postgresql_where=sa.text('ref_count <= 0'),
+    )
+
+    op.add_column('attachments', sa.Column('blob_id', sa.String(length=64), nullable=True))
+    op.create_foreign_key(
+        'attachments_blob_id_fkey', 'attachments', 'attachment_blobs',
+        ['blob_id'], ['id'], ondelete='RESTRICT',
+    )
+
+    # CONCURRENTLY: attachments may be large, don't block uploads while building
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_attachments_blob_id'),
+            'attachments',
+            ['blob_id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f('ix_attachments_blob_id'),
+            table_name='attachments',
+            postgresql_concurrently=True,
+        )
+    op.drop_constraint('attachments_blob_id_fkey', 'attachments', type_='foreignkey')
+    op.drop_column('attachments', 'blob_id')
+    op.drop_index('ix_attachment_blobs_unreferenced', table_name='attachment_blobs', postgresql_where=sa.text('ref_count <= 0'))
+    op.drop_table('attachment_blobs')
@@ -0,0 +1,44 @@
+"""add notification_logs.dedup_key
+
+Revision ID: f2c7d4e8a915
+Revises: e3f1a9c6d842
+Create Date: 2026-10-19 16:00:00.000000
+
+Per-recipient delivery checkpoint: one log row per (event, recipient),
+so a retried notification task skips recipients already sent to.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c7d4e8a915'
+down_revision: Union[str, None] = 'e3f1a9c6d842'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('notification_logs', sa.Column('dedup_key', sa.String(length=255), nullable=True))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ux_notification_logs_dedup_key',
+            'notification_logs',
+            ['dedup_key'],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ux_notification_logs_dedup_key',
+            table_name='notification_logs',
+            postgresql_concurrently=True,
+        )
+    op.drop_column('notification_logs', 'dedup_key')
@@ -0,0 +1,332 @@
+"""
+Content-addressed attachment storage.
+
+Вміст вкладення зберігається один раз: blobs/ab/cd/<sha256> у сховищі
+(app/storage.py, models.AttachmentBlob). Кожен Attachment посилається на
+blob (blob_id), attachment_blobs.ref_count рахує посилання. Однаковий
+файл, завантажений у кілька звернень, займає місце один раз.
+
+Узгодженість файлів і рядків тримається на блокуванні рядка blob'а:
+- store_blob додає посилання (INSERT ... ON CONFLICT DO UPDATE) і лише
+  потім перевіряє/кладе файл, commit - у crud.create_attachment;
+- collect_unreferenced_blobs видаляє файл і рядок під FOR UPDATE,
+  тобто або бачить нове посилання, або upload чекає і кладе файл заново.
+
+Старі вкладення (blob_id NULL, файли в cases/{public_id}/) переносяться
+командою:
+    python -m app.blobs dedupe
+Збирання blob'ів без посилань (також періодично через beat):
+    python -m app.blobs gc
+"""
+import argparse
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app import utils
+from app.previews import remove_previews
+from app.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+BLOB_GC_BATCH_SIZE = int(os.getenv("BLOB_GC_BATCH_SIZE", "100"))
+BLOB_DEDUPE_BATCH_SIZE = int(os.getenv("BLOB_DEDUPE_BATCH_SIZE", "200"))
+# Паралельні записи файлів одного звернення у сховище
+BLOB_STORE_WORKERS = int(os.getenv("BLOB_STORE_WORKERS", "8"))
+
+
+def store_blob(
+    db: Session,
+    temp_path: str,
+    sha256: str,
+    size_bytes: int
+) -> models.AttachmentBlob:
+    """
+    Acquire a reference to the content blob and make sure its file exists.
+
+    The upload temp file is moved into storage if the blob object is not
+    there yet, otherwise it is discarded (same content is already stored).
+    Does not commit: the reference is persisted together with the
+    attachment row by crud.create_attachment. On a file error the session
+    is rolled back, so the reference is not leaked.
+
+    Args:
+        db: Database session
+        temp_path: Finished upload temp file (utils.stream_upload_to_temp)
+        sha256: SHA-256 of file content (hex)
+        size_bytes: File size in bytes
+
+    Returns:
+        AttachmentBlob model (file_path is the storage key)
+
+    Raises:
+        Exception: Storage errors (OSError, S3 client errors)
+    """
+    return store_blobs(db, [(temp_path, sha256, size_bytes)])[0]
+
+
+def _place_blob(storage, key: str, temp_paths: list[str]) -> None:
+    """Move the first temp file into storage unless the blob exists, drop the rest"""
+    if storage.exists(key):
+        extra = temp_paths
+    else:
+        storage.save_file(temp_paths[0], key)
+        extra = temp_paths[1:]
+    for temp_path in extra:
+        utils.discard_upload(temp_path)
+
+
+def store_blobs(
+    db: Session,
+    files: list[tuple[str, str, int]]
+) -> list[models.AttachmentBlob]:
+    """
+    store_blob for several uploads: files are written in parallel.
+
+    References are acquired first (in the session, in sha256 order), then
+    the distinct blobs are placed into storage concurrently in a thread
+    pool (BLOB_STORE_WORKERS), so a multi-file case waits for the slowest
+    file rather than the sum. Row locks taken by the upserts keep the
+    garbage collector away until commit. Does not commit; on any error all
+    temp files are removed and the session is rolled back.
+
+    Args:
+        db: Database session
+        files: (temp_path, sha256, size_bytes) per upload, same order as
+            the result; repeated content is stored once
+
+    Returns:
+        AttachmentBlob per upload
+
+    Raises:
+        Exception: Storage errors (OSError, S3 client errors)
+    """
+    storage = get_storage()
+    blobs = [None] * len(files)
+    pending = {}
+
+    try:
+        # Блокування рядків - у порядку sha256: два звернення з тими самими
+        # файлами в різному порядку не чекають одне на одного (deadlock)
+        for index in sorted(range(len(files)), key=lambda i: files[i][1]):
+            _, sha256, size_bytes = files[index]
+            blobs[index] = crud.acquire_attachment_blob(
+                db, sha256, size_bytes, utils.get_blob_storage_path(sha256)
+            )
+        for (temp_path, _, _), blob in zip(files, blobs):
+            pending.setdefault(blob.file_path, []).append(temp_path)
+
+        if len(pending) == 1:
+            _place_blob(storage, *next(iter(pending.items())))
+        elif pending:
+            with ThreadPoolExecutor(max_workers=min(BLOB_STORE_WORKERS, len(pending))) as pool:
+                futures = [pool.submit(_place_blob, storage, key, paths) for key, paths in pending.items()]
+                for future in futures:
+                    future.result()
+    except Exception:
+        db.rollback()
+        for temp_path, _, _ in files:
+            utils.discard_upload(temp_path)
+        raise
+
+    return blobs
+
+
+def collect_unreferenced_blobs(
+    db: Session,
+    blob_ids: Optional[list[str]] = None,
+    limit: int = BLOB_GC_BATCH_SIZE
+) -> int:
+    """
+    Remove files and rows of blobs that have no references left.
+
+    Rows are locked (FOR UPDATE SKIP LOCKED) while the files are removed,
+    a concurrent upload of the same content either bumps ref_count first
+    (blob is skipped) or waits and stores the file again.
+
+    Args:
+        db: Database session
+        blob_ids: Only check these blobs (e.g. right after delete)
+        limit: Batch size
+
+    Returns:
+        Number of collected blobs
+    """
+    storage = get_storage()
+    blobs = crud.lock_unreferenced_blobs(db, limit=limit, blob_ids=blob_ids)
+
+    for blob in blobs:
+        storage.delete(blob.file_path)
+        remove_previews(blob.file_path)
+        db.delete(blob)
+
+    db.commit()
+
+    if blobs:
+        logger.info(f"Blobs: collected {len(blobs)} unreferenced blobs")
+
+    return len(blobs)
+
+
+def release_blob(db: Session, blob_id: str) -> int:
+    """
+    Drop a reference taken by store_blob that got no attachment row.
+
+    The reference is released and committed, then the blob is collected if
+    it has no references left (a file placed just for this upload).
+
+    Args:
+        db: Database session (the reference is not committed yet)
+        blob_id: AttachmentBlob.id
+
+    Returns:
+        Number of collected blobs (0 or 1)
+    """
+    crud.release_attachment_blob(db, blob_id)
+    db.commit()
+    return collect_unreferenced_blobs(db, blob_ids=[blob_id])
+
+
+def _hash_object(storage, key: str) -> tuple[str, int]:
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in storage.open_read(key):
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _remove_legacy_file(storage, file_path: str) -> None:
+    # Прев'ю старого шляху більше не потрібні (python -m app.previews backfill)
+    remove_previews(file_path)
+    storage.delete(file_path)
+    # Прибираємо порожній каталог звернення (cases/{public_id})
+    case_dir = os.path.dirname(storage.local_path(file_path) or "")
+    if case_dir and os.path.abspath(case_dir) != os.path.abspath(storage.root):
+        try:
+            os.rmdir(case_dir)
+        except OSError:
+            pass
+
+
+def dedupe_media_tree(
+    db: Session,
+    batch_size: int = BLOB_DEDUPE_BATCH_SIZE
+) -> dict:
+    """
+    Move legacy attachments (blob_id NULL) into content-addressed blobs.
+
+    Attachments are processed in keyset batches by id. The files of a
+    batch are hashed and copied into their blob keys (hard link on local
+    storage) unless the blob already exists, without holding any blob row
+    locks. Then the references are acquired in sha256 order, as in
+    store_blobs, the rows are repointed and the batch is committed, so
+    live uploads wait at most for the reference updates. The old files are
+    removed only after the commit, so an interrupted run can simply be
+    restarted. Attachments whose file is missing in storage are skipped
+    and counted.
+
+    Args:
+        db: Database session
+        batch_size: Attachments per transaction
+
+    Returns:
+        Dictionary with migrated / deduplicated / missing counts and saved bytes
+    """
+    storage = get_storage()
+    stats = {"migrated": 0, "deduplicated": 0, "missing": 0, "bytes_saved": 0}
+    last_id = None
+
+    while True:
+        query = (
+            select(models.Attachment)
+            .where(models.Attachment.blob_id.is_(None))
+            .order_by(models.Attachment.id)
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            query = query.where(models.Attachment.id > last_id)
+
+        attachments = list(db.execute(query).scalars().all())
+        if not attachments:
+            break
+        last_id = attachments[-1].id
+
+        # Хешування і копіювання - без блокувань рядків blob'ів
+        hashed = []
+        for attachment in attachments:
+            try:
+                sha256, size_bytes = _hash_object(storage, attachment.file_path)
+            except FileNotFoundError:
+                stats["missing"] += 1
+                logger.warning(f"Blobs: file missing for attachment {attachment.id}: {attachment.file_path}")
+                continue
+
+            blob_path = utils.get_blob_storage_path(sha256)
+            if storage.exists(blob_path):
+                stats["deduplicated"] += 1
+                stats["bytes_saved"] += size_bytes
+            else:
+                storage.copy(attachment.file_path, blob_path)
+            hashed.append((attachment, sha256, size_bytes))
+
+        # Посилання - перед commit і в порядку sha256, як у store_blobs
+        legacy_paths = []
+        for attachment, sha256, size_bytes in sorted(hashed, key=lambda item: item[1]):
+            blob = crud.acquire_attachment_blob(
+                db, sha256, size_bytes, utils.get_blob_storage_path(sha256)
+            )
+            if not storage.exists(blob.file_path):
+                # Blob без посилань зібрав GC між копіюванням і блокуванням
+                storage.copy(attachment.file_path, blob.file_path)
+
+            legacy_paths.append(attachment.file_path)
+            attachment.blob_id = blob.id
+            attachment.file_path = blob.file_path
+            attachment.sha256 = sha256
+            stats["migrated"] += 1
+
+        db.commit()
+
+        for legacy_path in legacy_paths:
+            _remove_legacy_file(storage, legacy_path)
+
+        logger.info(f"Blobs: dedupe progress {stats}")
+
+    return stats
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Content-addressed attachment storage maintenance")
+    parser.add_argument("command", choices=["dedupe", "gc"], help="dedupe: move legacy files into blobs; gc: remove unreferenced blobs")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.command == "dedupe":
+            stats = dedupe_media_tree(db, batch_size=args.batch_size or BLOB_DEDUPE_BATCH_SIZE)
+            print(
+                f"migrated={stats['migrated']} deduplicated={stats['deduplicated']} "
+                f"missing={stats['missing']} saved={stats['bytes_saved'] / 1024 / 1024:.1f}MB"
+            )
+        else:
+            total = 0
+            while collected := collect_unreferenced_blobs(db, limit=args.batch_size or BLOB_GC_BATCH_SIZE):
+                total += collected
+            print(f"collected={total}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    main()
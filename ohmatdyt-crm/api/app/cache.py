@@ -0,0 +1,204 @@
+"""
+Redis-backed result cache for expensive read endpoints.
+
+Used by the dashboard analytics endpoints (BE-301): several admins opening
+the dashboard at the same time should not each run the same heavy
+aggregates. Results are stored as JSON under a key built from the endpoint
+name and its normalized parameters, with a configurable TTL.
+
+Concurrent cache misses are collapsed into a single computation
+(single-flight): the first request takes a short-lived Redis lock and
+computes the value, the others wait for the lock and then read the freshly
+cached result instead of hitting the database.
+
+Namespaces whose entries must be dropped together on writes (e.g. the
+category -> notification recipients map) carry a version number in their
+keys: invalidate_namespace increments it, so all old entries stop being
+read at once and expire by TTL.
+
+If Redis is unavailable the value is simply computed without caching.
+"""
+import os
+import json
+import logging
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+# TTL для кешованих агрегатів дашборду (секунди)
+DASHBOARD_CACHE_TTL_SECONDS = int(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "60"))
+
+# Single-flight lock: скільки може тримати лок обчислення та скільки чекають інші
+CACHE_LOCK_TIMEOUT_SECONDS = int(os.getenv("CACHE_LOCK_TIMEOUT_SECONDS", "30"))
+CACHE_LOCK_WAIT_SECONDS = float(os.getenv("CACHE_LOCK_WAIT_SECONDS", "25"))
+
+# TTL для мапи категорія -> отримувачі нотифікацій (інвалідується при змінах)
+NOTIFICATION_RECIPIENTS_CACHE_TTL_SECONDS = int(os.getenv("NOTIFICATION_RECIPIENTS_CACHE_TTL_SECONDS", "3600"))
+
+CACHE_KEY_PREFIX = "cache"
+
+_redis_client: Optional[redis.Redis] = None
+
+
+def get_redis_client() -> redis.Redis:
+    """
+    Returns a process-wide Redis client (lazy initialized).
+
+    The client keeps its own connection pool, so it is safe to share
+    between requests and threads.
+    """
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.from_url(
+            REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=2,
+            socket_timeout=5,
+        )
+    return _redis_client
+
+
+def _json_default(obj: Any) -> Any:
+    """JSON encoder for values returned by CRUD aggregate functions"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def make_cache_key(namespace: str, **params: Any) -> str:
+    """
+    Builds a deterministic cache key from namespace and parameters.
+
+    Parameters are sorted by name so the order of keyword arguments
+    does not matter. None values are encoded as an empty string.
+
+    Example:
+        make_cache_key("dashboard:summary", date_from=dt, date_to=None)
+        -> "cache:dashboard:summary:date_from=2025-01-01T00:00:00|date_to="
+    """
+    parts = []
+    for name in sorted(params):
+        value = params[name]
+        if value is None:
+            encoded = ""
+        elif isinstance(value, (datetime, date)):
+            encoded = value.isoformat()
+        elif isinstance(value, Enum):
+            encoded = str(value.value)
+        else:
+            encoded = str(value)
+        parts.append(f"{name}={encoded}")
+    return f"{CACHE_KEY_PREFIX}:{namespace}:{'|'.join(parts)}"
+
+
+def get_or_compute(
+    key: str,
+    compute: Callable[[], Any],
+    ttl: int = DASHBOARD_CACHE_TTL_SECONDS,
+    force_refresh: bool = False,
+) -> Any:
+    """
+    Returns cached value for key, computing it at most once per TTL.
+
+    Flow:
+    1. Cache hit -> return cached value (unless force_refresh)
+    2. Cache miss -> acquire single-flight lock for the key
+       - lock acquired: re-check cache, compute, store with TTL
+       - lock wait timed out: compute without storing (degraded mode)
+
+    Args:
+        key: Cache key (see make_cache_key)
+        compute: Function that produces a JSON-serializable value
+        ttl: Time to live in seconds
+        force_refresh: Ignore cached value and recompute (still single-flight)
+
+    Returns:
+        Cached or freshly computed value. Values read from cache are
+        JSON-decoded, so datetimes come back as ISO strings.
+    """
+    try:
+        client = get_redis_client()
+        if not force_refresh:
+            cached = client.get(key)
+            if cached is not None:
+                return json.loads(cached)
+        lock = client.lock(
+            f"{key}:lock",
+            timeout=CACHE_LOCK_TIMEOUT_SECONDS,
+            blocking_timeout=CACHE_LOCK_WAIT_SECONDS,
+        )
+        acquired = lock.acquire(blocking=True)
+    except redis.RedisError as e:
+        logger.warning(f"Cache unavailable for {key}: {e}")
+        return compute()
+
+    if not acquired:
+        # Інший запит рахує занадто довго - рахуємо самі, але не пишемо в кеш
+        logger.warning(f"Cache lock wait timed out for {key}, computing without cache")
+        return compute()
+
+    try:
+        if not force_refresh:
+            # Поки чекали на лок, значення міг порахувати інший запит
+            try:
+                cached = client.get(key)
+                if cached is not None:
+                    return json.loads(cached)
+            except redis.RedisError as e:
+                logger.warning(f"Cache read failed for {key}: {e}")
+
+        value = compute()
+
+        try:
+            client.set(key, json.dumps(value, default=_json_default), ex=ttl)
+        except (redis.RedisError, TypeError) as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+
+        return value
+    finally:
+        try:
+            lock.release()
+        except redis.RedisError:
+            # Лок міг протухнути (timeout) - це не помилка для клієнта
+            pass
+
+
+def get_namespace_version(namespace: str) -> Optional[int]:
+    """
+    Current version of a cache namespace (0 if never invalidated).
+
+    Returns:
+        Version number, or None if Redis is unavailable (caller should
+        compute without caching)
+    """
+    try:
+        version = get_redis_client().get(f"{CACHE_KEY_PREFIX}:version:{namespace}")
+    except redis.RedisError as e:
+        logger.warning(f"Cache unavailable for namespace {namespace}: {e}")
+        return None
+    return int(version) if version is not None else 0
+
+
+def invalidate_namespace(namespace: str) -> None:
+    """
+    Drops all cached entries of a namespace by bumping its version.
+
+    Old entries are no longer read and expire by their TTL. If Redis is
+    unavailable the entries are not reachable anyway; stale values written
+    before the outage live at most until TTL.
+    """
+    try:
+        get_redis_client().incr(f"{CACHE_KEY_PREFIX}:version:{namespace}")
+    except redis.RedisError as e:
+        logger.warning(f"Cache invalidation failed for namespace {namespace}: {e}")
@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import worker_process_shutdown
 from typing import Optional
 
 # Load configuration from environment
@@ -7,6 +8,35 @@ REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", REDIS_URL)
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", REDIS_URL)
 
+# Notification fan-out: розбиття отримувачів на чанки в окремій черзі
+NOTIFICATION_QUEUE = os.getenv("NOTIFICATION_QUEUE", "notifications")
+NOTIFICATION_CHUNK_SIZE = int(os.getenv("NOTIFICATION_CHUNK_SIZE", "10"))
+# Celery rate limit чанк-тасок на worker (наприклад "30/m"); порожньо - без ліміту
+NOTIFICATION_RATE_LIMIT = os.getenv("NOTIFICATION_RATE_LIMIT") or None
+
+# Retry scheduler невдалих листів (beat)
+NOTIFICATION_RETRY_SCAN_INTERVAL_SECONDS = int(os.getenv("NOTIFICATION_RETRY_SCAN_INTERVAL_SECONDS", "60"))
+NOTIFICATION_RETRY_BATCH_SIZE = int(os.getenv("NOTIFICATION_RETRY_BATCH_SIZE", "50"))
+
+# Digest mode: вікно накопичення подій та розмір пачки користувачів на flush
+NOTIFICATION_DIGEST_WINDOW_MINUTES = int(os.getenv("NOTIFICATION_DIGEST_WINDOW_MINUTES", "15"))
+NOTIFICATION_DIGEST_BATCH_USERS = int(os.getenv("NOTIFICATION_DIGEST_BATCH_USERS", "200"))
+NOTIFICATION_DIGEST_MAX_ITEMS = int(os.getenv("NOTIFICATION_DIGEST_MAX_ITEMS", "50"))  # Подій у листі, решта - лічильником
+
+# SLA escalation scanning (beat)
+SLA_ESCALATION_SCAN_INTERVAL_SECONDS = int(os.getenv("SLA_ESCALATION_SCAN_INTERVAL_SECONDS", "300"))
+SLA_ESCALATION_BATCH_SIZE = int(os.getenv("SLA_ESCALATION_BATCH_SIZE", "1000"))
+
+# Мініатюри/прев'ю вкладень - CPU-важкі, в окремій черзі
+PREVIEW_QUEUE = os.getenv("PREVIEW_QUEUE", "previews")
+
+# Збирання blob'ів вкладень без посилань (beat)
+BLOB_GC_INTERVAL_SECONDS = int(os.getenv("BLOB_GC_INTERVAL_SECONDS", "3600"))
+# Повторна постановка / FAILED асинхронних подань із загубленою таскою
+CASE_SUBMISSION_RECOVERY_INTERVAL_SECONDS = int(os.getenv("CASE_SUBMISSION_RECOVERY_INTERVAL_SECONDS", "300"))
+# Звірка вкладень і файлів сховища: SCRUB_BATCHES_PER_RUN партій за запуск
+ATTACHMENT_SCRUB_INTERVAL_SECONDS = int(os.getenv("ATTACHMENT_SCRUB_INTERVAL_SECONDS", "3600"))
+
 # Initialize Celery
 celery = Celery(
     "ohmatdyt_crm",
@@ -30,6 +60,48 @@ celery.conf.update(
     imports=(
         'app.celery_app',
     ),
+    # Розсилка листів - в окремій черзі, щоб не блокувати інші таски
+    task_routes={
+        "app.celery_app.send_new_case_notification_chunk": {"queue": NOTIFICATION_QUEUE},
+        "app.celery_app.summarize_notification_fanout": {"queue": NOTIFICATION_QUEUE},
+        "app.celery_app.retry_due_notifications": {"queue": NOTIFICATION_QUEUE},
+        "app.celery_app.flush_notification_digests": {"queue": NOTIFICATION_QUEUE},
+        "app.celery_app.generate_attachment_previews": {"queue": PREVIEW_QUEUE},
+    },
+    # Periodic tasks (celery beat)
+    beat_schedule={
+        "retry-due-notifications": {
+            "task": "app.celery_app.retry_due_notifications",
+            "schedule": NOTIFICATION_RETRY_SCAN_INTERVAL_SECONDS,
+            "options": {"expires": NOTIFICATION_RETRY_SCAN_INTERVAL_SECONDS},
+        },
+        "flush-notification-digests": {
+            "task": "app.celery_app.flush_notification_digests",
+            "schedule": NOTIFICATION_DIGEST_WINDOW_MINUTES * 60,
+            "options": {"expires": NOTIFICATION_DIGEST_WINDOW_MINUTES * 60},
+        },
+        "scan-sla-breaches": {
+            "task": "app.celery_app.scan_sla_breaches",
+            "schedule": SLA_ESCALATION_SCAN_INTERVAL_SECONDS,
+            # Не накопичувати пропущені запуски, якщо worker був недоступний
+            "options": {"expires": SLA_ESCALATION_SCAN_INTERVAL_SECONDS},
+        },
+        "collect-unreferenced-blobs": {
+            "task": "app.celery_app.collect_unreferenced_blobs",
+            "schedule": BLOB_GC_INTERVAL_SECONDS,
+            "options": {"expires": BLOB_GC_INTERVAL_SECONDS},
+        },
+        "recover-case-submissions": {
+            "task": "app.celery_app.recover_case_submissions",
+            "schedule": CASE_SUBMISSION_RECOVERY_INTERVAL_SECONDS,
+            "options": {"expires": CASE_SUBMISSION_RECOVERY_INTERVAL_SECONDS},
+        },
+        "scrub-attachments": {
+            "task": "app.celery_app.scrub_attachments",
+            "schedule": ATTACHMENT_SCRUB_INTERVAL_SECONDS,
+            "options": {"expires": ATTACHMENT_SCRUB_INTERVAL_SECONDS},
+        },
+    },
 )
 
 # Example task
@@ -44,6 +116,279 @@ def test_task(x, y):
     return x + y
 
 
+def deliver_notification(db, notification) -> bool:
+    """
+    Send a logged notification and record the outcome on its log row.
+    
+    The email is built from the stored subject/body, so a retry resends
+    exactly what was rendered the first time. On failure the row is
+    scheduled for the retry scheduler (next_retry_at with backoff).
+    
+    Args:
+        db: Database session
+        notification: NotificationLog row (new, or claimed for retry)
+        
+    Returns:
+        True if sent
+    """
+    from app import models, crud
+    from app.email_service import send_email
+    
+    success = send_email(
+        to=notification.recipient_email,
+        subject=notification.subject,
+        body_text=notification.body_text or "",
+        body_html=notification.body_html,
+        notification_log_id=notification.id,
+    )
+    
+    if success:
+        crud.update_notification_status(
+            db=db,
+            notification_id=notification.id,
+            status=models.NotificationStatus.SENT,
+        )
+    else:
+        crud.update_notification_status(
+            db=db,
+            notification_id=notification.id,
+            status=models.NotificationStatus.FAILED,
+            error_message="SMTP send failed",
+        )
+    return success
+
+
+def deliver_notifications(db, notifications: list) -> tuple[int, int]:
+    """
+    Send a batch of logged notifications concurrently and record each outcome.
+    
+    Messages go out over up to SMTP_ASYNC_CONCURRENCY SMTP sessions at once
+    (email_service.send_emails_concurrently), so the task does not wait for
+    every network round trip in turn. Each NotificationLog row gets its own
+    result: SENT, or FAILED with the SMTP error and a retry backoff.
+    
+    Args:
+        db: Database session
+        notifications: NotificationLog rows (new, or claimed for retry)
+    
+    Returns:
+        Tuple (sent, failed)
+    """
+    from app import models, crud
+    from app.email_service import send_emails_concurrently
+    
+    errors = send_emails_concurrently([
+        {
+            "to": notification.recipient_email,
+            "subject": notification.subject,
+            "body_text": notification.body_text or "",
+            "body_html": notification.body_html,
+        }
+        for notification in notifications
+    ])
+    
+    sent_count = 0
+    for notification, error in zip(notifications, errors):
+        if error is None:
+            crud.update_notification_status(
+                db=db,
+                notification_id=notification.id,
+                status=models.NotificationStatus.SENT,
+            )
+            sent_count += 1
+        else:
+            crud.update_notification_status(
+                db=db,
+                notification_id=notification.id,
+                status=models.NotificationStatus.FAILED,
+                error_message=f"SMTP send failed: {error}"[:1000],
+            )
+    return sent_count, len(notifications) - sent_count
+
+
+@celery.task(name="app.celery_app.retry_due_notifications")
+def retry_due_notifications():
+    """
+    Periodic task: resend failed notifications whose next_retry_at is due.
+    
+    Claims a batch with FOR UPDATE SKIP LOCKED (crud.claim_due_notifications)
+    and resends it concurrently (deliver_notifications). A full batch means more
+    work is due, so another drain task is queued first - several workers then
+    drain the retry queue in parallel, each with its own rows.
+    
+    Returns:
+        Dictionary with claimed / sent / failed counts
+    """
+    from app.database import SessionLocal
+    from app import crud
+    
+    db = SessionLocal()
+    
+    try:
+        notifications = crud.claim_due_notifications(db, limit=NOTIFICATION_RETRY_BATCH_SIZE)
+        
+        if len(notifications) == NOTIFICATION_RETRY_BATCH_SIZE:
+            retry_due_notifications.delay()
+        
+        sent_count, failed_count = deliver_notifications(db, notifications)
+        
+        if notifications:
+            print(f"[NOTIFICATION] Retry batch: sent {sent_count}, failed {failed_count}")
+        
+        return {
+            "claimed": len(notifications),
+            "sent": sent_count,
+            "failed": failed_count,
+        }
+    finally:
+        db.close()
+
+
+@celery.task(name="app.celery_app.flush_notification_digests")
+def flush_notification_digests():
+    """
+    Periodic task: send one digest email per user with buffered events.
+    
+    Runs every NOTIFICATION_DIGEST_WINDOW_MINUTES. Events of a batch of users
+    are loaded with one query; per user the digest is rendered once, logged
+    (dedup_key from the event ids, so a rerun after a crash reuses the same
+    log row) and the events are deleted. A full batch of users then queues
+    another flush (it cannot pick the same events) and the emails are sent
+    through the pooled SMTP client. Failed digests are picked up by the
+    retry scheduler.
+    
+    Returns:
+        Dictionary with users / events / sent / failed counts
+    """
+    import hashlib
+    from itertools import groupby
+    from app.database import SessionLocal
+    from app import models, crud
+    from app.email_service import render_template
+    
+    type_display = {
+        models.NotificationType.NEW_CASE: "Нове звернення",
+        models.NotificationType.NEW_COMMENT: "Коментар",
+        models.NotificationType.STATUS_CHANGED: "Зміна статусу",
+        models.NotificationType.CASE_TAKEN: "Взято в роботу",
+        models.NotificationType.CASE_REASSIGNED: "Передано іншому виконавцю",
+    }
+    
+    db = SessionLocal()
+    
+    try:
+        user_ids = crud.get_digest_pending_user_ids(db, limit=NOTIFICATION_DIGEST_BATCH_USERS)
+        items = crud.get_notification_digest_items(db, user_ids)
+        
+        sent_count = 0
+        failed_count = 0
+        digests = []
+        
+        for _, group in groupby(items, key=lambda item: item.user_id):
+            user_items = list(group)
+            user = user_items[0].user
+            
+            digest_id = hashlib.sha256(
+                ",".join(sorted(str(item.id) for item in user_items)).encode()
+            ).hexdigest()[:32]
+            dedup_key = crud.make_notification_dedup_key(
+                models.NotificationType.DIGEST, digest_id, user.email
+            )
+            notification = crud.get_notification_log_by_dedup_key(db, dedup_key)
+            created = False
+            
+            if notification is None:
+                shown = user_items[:NOTIFICATION_DIGEST_MAX_ITEMS]
+                text_body, html_body = render_template("digest", {
+                    "recipient_name": user.full_name,
+                    "period_start": user_items[0].created_at.strftime("%d.%m.%Y %H:%M"),
+                    "period_end": user_items[-1].created_at.strftime("%d.%m.%Y %H:%M"),
+                    "items_count": len(user_items),
+                    "hidden_count": len(user_items) - len(shown),
+                    "items": [
+                        {
+                            "type_display": type_display.get(item.notification_type, item.notification_type.value),
+                            "case_public_id": item.case_public_id,
+                            "title": item.title,
+                            "details": item.details or "",
+                            "created_at": item.created_at.strftime("%d.%m.%Y %H:%M"),
+                        }
+                        for item in shown
+                    ],
+                })
+                
+                notification, created = crud.get_or_create_notification_log(
+                    db=db,
+                    dedup_key=dedup_key,
+                    notification_type=models.NotificationType.DIGEST,
+                    recipient_email=user.email,
+                    recipient_user_id=user.id,
+                    related_entity_id=digest_id,
+                    subject=f"Дайджест сповіщень ({len(user_items)})",
+                    body_text=text_body,
+                    body_html=html_body,
+                )
+            
+            # Події вже в лог-записі дайджесту - буфер більше не потрібен
+            crud.delete_notification_digest_items(db, [item.id for item in user_items])
+            
+            if notification.status != models.NotificationStatus.SENT:
+                digests.append((notification, created))
+        
+        # Події батчу вже видалені (commit) - наступний flush бере інших користувачів
+        if len(user_ids) == NOTIFICATION_DIGEST_BATCH_USERS:
+            flush_notification_digests.delay()
+        
+        for notification, created in digests:
+            if not created:
+                notification = crud.claim_notification(db, notification.id)
+                if notification is None:
+                    continue
+            
+            if deliver_notification(db, notification):
+                sent_count += 1
+            else:
+                failed_count += 1
+        
+        if items:
+            print(
+                f"[DIGEST] {len(user_ids)} user(s), {len(items)} event(s): "
+                f"sent {sent_count}, failed {failed_count}"
+            )
+        
+        return {
+            "users": len(user_ids),
+            "events": len(items),
+            "sent": sent_count,
+            "failed": failed_count,
+        }
+    finally:
+        db.close()
+
+
+@worker_process_shutdown.connect
+def close_smtp_connections(**kwargs):
+    """Close pooled SMTP sessions when a worker process exits"""
+    from app.email_service import close_smtp_pool, close_async_smtp_sender
+    close_smtp_pool()
+    close_async_smtp_sender()
+
+
+@celery.task(name="app.celery_app.smtp_pool_stats")
+def smtp_pool_stats():
+    """
+    Return SMTP connection pool metrics of the worker process that ran the task.
+    
+    Usage: celery -A app.celery_app:celery call app.celery_app.smtp_pool_stats
+    """
+    from app.email_service import get_smtp_pool, get_async_smtp_sender
+    return {
+        "pid": os.getpid(),
+        **get_smtp_pool().stats(),
+        "async": get_async_smtp_sender().stats(),
+    }
+
+
 @celery.task(
     name="app.celery_app.send_new_case_notification",
     bind=True,
@@ -55,23 +400,116 @@ def send_new_case_notification(self, case_id: str, case_public_id: int, category
     Send email notification to executors when a new case is created.
     
     This task is queued when an operator creates a new case.
-    It retrieves all executors for the category and sends them an email notification.
+    Recipients are the executors with access to the case category and
+    admins (crud.get_category_recipient_ids, cached per category).
+    It only resolves the recipients and fans the sending out: recipients are
+    split into chunks of NOTIFICATION_CHUNK_SIZE, each chunk is a
+    send_new_case_notification_chunk subtask on the notifications queue,
+    dispatched as a chord whose callback summarizes the delivery.
+    A slow SMTP exchange therefore only delays its own chunk, and
+    time-to-last-email scales with the number of notification workers.
+    
+    Args:
+        case_id: UUID of the case (as string)
+        case_public_id: 6-digit public ID of the case
+        category_id: UUID of the category (as string)
+    """
+    from uuid import UUID
+    from app.database import SessionLocal
+    from app import models, crud
+    from celery import chord
+    from sqlalchemy import select
+    
+    db = SessionLocal()
+    
+    try:
+        case_exists = db.execute(
+            select(models.Case.id).where(models.Case.id == UUID(case_id))
+        ).scalar_one_or_none()
+        
+        if not case_exists:
+            print(f"[NOTIFICATION] Case {case_id} not found, skipping")
+            return {"status": "skipped", "reason": "case_not_found"}
+        
+        # Виконавці з доступом до категорії + адміни (кешована мапа)
+        recipient_ids = crud.get_category_recipient_ids(db, UUID(category_id))
+    except Exception as exc:
+        print(f"[BE-013] Error in send_new_case_notification: {exc}")
+        
+        # Exponential backoff: 60s, 120s, 240s, 480s, 960s
+        retry_delay = 60 * (2 ** self.request.retries)
+        
+        raise self.retry(exc=exc, countdown=retry_delay, max_retries=5)
+        
+    finally:
+        db.close()
+    
+    if not recipient_ids:
+        return {"status": "skipped", "reason": "no_recipients"}
+    
+    chunks = [
+        recipient_ids[i:i + NOTIFICATION_CHUNK_SIZE]
+        for i in range(0, len(recipient_ids), NOTIFICATION_CHUNK_SIZE)
+    ]
+    
+    chord(
+        send_new_case_notification_chunk.s(case_id, case_public_id, category_id, chunk)
+        for chunk in chunks
+    )(summarize_notification_fanout.s(case_id, case_public_id))
+    
+    print(f"[BE-013] Case #{case_public_id}: {len(recipient_ids)} recipient(s) in {len(chunks)} chunk(s)")
+    
+    return {
+        "status": "dispatched",
+        "case_id": case_id,
+        "public_id": case_public_id,
+        "recipients": len(recipient_ids),
+        "chunks": len(chunks),
+    }
+
+
+@celery.task(
+    name="app.celery_app.send_new_case_notification_chunk",
+    bind=True,
+    max_retries=5,
+    default_retry_delay=60,  # 1 minute
+    rate_limit=NOTIFICATION_RATE_LIMIT,
+)
+def send_new_case_notification_chunk(
+    self,
+    case_id: str,
+    case_public_id: int,
+    category_id: str,
+    recipient_ids: list[str]
+):
+    """
+    Send new case email to one chunk of recipients (notifications queue).
     
     Improvements in BE-013:
     - Logs notifications to notification_logs table
     - Proper exponential backoff retry
     - Email sending через email_service module
     
+    Per-recipient checkpointing: кожен отримувач має власний запис
+    notification_logs (dedup_key). При retry таски отримувачі зі статусом
+    SENT пропускаються, решті відправляється вже збережений лист. Записи,
+    які тримає інший worker або retry scheduler (спроба ще не настала),
+    теж пропускаються і рахуються окремо (leased).
+    
     Args:
         case_id: UUID of the case (as string)
         case_public_id: 6-digit public ID of the case
         category_id: UUID of the category (as string)
+        recipient_ids: UUIDs of users in this chunk (as strings)
+        
+    Returns:
+        Dictionary with sent / failed / skipped (already sent) / leased
+        counts of the chunk
     """
     from uuid import UUID
     from app.database import SessionLocal
     from app import models, crud
-    from app.email_service import send_email, render_template
-    from datetime import datetime, timedelta
+    from app.email_service import render_shared_template
     from sqlalchemy import select
     
     db = SessionLocal()
@@ -84,7 +522,7 @@ def send_new_case_notification(self, case_id: str, case_public_id: int, category
         
         if not case:
             print(f"[NOTIFICATION] Case {case_id} not found, skipping")
-            return {"status": "skipped", "reason": "case_not_found"}
+            return {"sent": 0, "failed": 0, "skipped": len(recipient_ids)}
         
         # Get category details
         category = db.execute(
@@ -93,87 +531,111 @@ def send_new_case_notification(self, case_id: str, case_public_id: int, category
         
         category_name = category.name if category else "Unknown"
         
-        # Get executors (simplified - gets all active executors)
         executors = db.execute(
             select(models.User).where(
-                models.User.role.in_([models.UserRole.EXECUTOR, models.UserRole.ADMIN]),
+                models.User.id.in_([UUID(user_id) for user_id in recipient_ids]),
                 models.User.is_active == True
             )
         ).scalars().all()
         
-        print(f"[BE-013] Sending notifications for new case #{case_public_id}")
-        print(f"[BE-013] Category: {category_name}")
-        print(f"[BE-013] Executors to notify: {len(executors)}")
+        skipped_count = 0
+        leased_count = 0
+        shared = None
+        to_deliver = []
         
-        sent_count = 0
-        failed_count = 0
+        # Digest mode: подія буферизується, лист піде в зведеному дайджесті
+        digest_users = [executor for executor in executors if executor.email_digest_enabled]
+        digested_count = crud.add_notification_digest_items(db, [
+            {
+                "user_id": executor.id,
+                "notification_type": models.NotificationType.NEW_CASE,
+                "event_key": crud.make_notification_dedup_key(
+                    models.NotificationType.NEW_CASE, case_id, executor.email
+                ),
+                "related_case_id": case.id,
+                "case_public_id": case_public_id,
+                "title": f"Категорія «{category_name}»",
+                "details": f"{case.applicant_name}: {case.summary[:200]}" if case.summary else case.applicant_name,
+            }
+            for executor in digest_users
+        ])
         
         for executor in executors:
-            # Render email template
-            text_body, html_body = render_template("new_case", {
-                "executor_name": executor.full_name,
-                "case_public_id": case_public_id,
-                "category_name": category_name,
-                "channel_name": "Email",  # TODO: get from case
-                "applicant_name": case.applicant_name,
-                "applicant_phone": case.applicant_phone or "",
-                "applicant_email": case.applicant_email or "",
-                "description": case.summary[:500] if case.summary else "",
-                "created_at": case.created_at.strftime("%d.%m.%Y %H:%M") if case.created_at else "",
-            })
-            
-            # Create notification log entry
-            notification = crud.create_notification_log(
-                db=db,
-                notification_type=models.NotificationType.NEW_CASE,
-                recipient_email=executor.email,
-                recipient_user_id=executor.id if isinstance(executor.id, UUID) else UUID(executor.id),
-                related_case_id=UUID(case_id) if isinstance(case_id, str) else case_id,
-                subject=f"Нове звернення #{case_public_id}",
-                body_text=text_body,
-                body_html=html_body,
-                celery_task_id=self.request.id,
-            )
+            if executor.email_digest_enabled:
+                continue
             
-            # Send email
-            success = send_email(
-                to=executor.email,
-                subject=f"Нове звернення #{case_public_id}",
-                body_text=text_body,
-                body_html=html_body,
-                notification_log_id=notification.id,
+            # Чекпоінт на отримувача: retry таски не дублює листи та записи логу
+            dedup_key = crud.make_notification_dedup_key(
+                models.NotificationType.NEW_CASE, case_id, executor.email
             )
+            notification = crud.get_notification_log_by_dedup_key(db, dedup_key)
+            created = False
             
-            # Update notification status
-            if success:
-                crud.update_notification_status(
-                    db=db,
-                    notification_id=notification.id,
-                    status=models.NotificationStatus.SENT,
-                )
-                sent_count += 1
-            else:
-                crud.update_notification_status(
+            if notification is None:
+                # Render email template (лише для нових отримувачів;
+                # при retry відправляємо вже збережений лист).
+                # Спільна частина рендериться один раз на чанк.
+                if shared is None:
+                    shared = render_shared_template("new_case", {
+                        "case_public_id": case_public_id,
+                        "category_name": category_name,
+                        "channel_name": "Email",  # TODO: get from case
+                        "applicant_name": case.applicant_name,
+                        "applicant_phone": case.applicant_phone or "",
+                        "applicant_email": case.applicant_email or "",
+                        "description": case.summary[:500] if case.summary else "",
+                        "created_at": case.created_at.strftime("%d.%m.%Y %H:%M") if case.created_at else "",
+                    }, personal_fields=("executor_name",))
+                
+                notification, created = crud.get_or_create_notification_log(
                     db=db,
-                    notification_id=notification.id,
-                    status=models.NotificationStatus.FAILED,
-                    error_message="SMTP send failed (placeholder)",
+                    dedup_key=dedup_key,
+                    notification_type=models.NotificationType.NEW_CASE,
+                    recipient_email=executor.email,
+                    recipient_user_id=executor.id if isinstance(executor.id, UUID) else UUID(executor.id),
+                    related_case_id=UUID(case_id) if isinstance(case_id, str) else case_id,
+                    subject=f"Нове звернення #{case_public_id}",
+                    # Спільне тіло зберігається один раз, ім'я - параметр запису
+                    body_text=shared.text_body,
+                    body_html=shared.html_body,
+                    body_params={"executor_name": executor.full_name},
+                    celery_task_id=self.request.id,
                 )
-                failed_count += 1
+            
+            if notification.status == models.NotificationStatus.SENT:
+                skipped_count += 1
+                continue
+            
+            if not created:
+                # Запис з попередньої спроби: відправляємо, лише якщо його не
+                # тримає інший worker і retry scheduler не запланував пізнішу спробу
+                notification = crud.claim_notification(db, notification.id)
+                if notification is None:
+                    leased_count += 1
+                    continue
+            
+            to_deliver.append(notification)
         
-        print(f"[BE-013] Sent: {sent_count}, Failed: {failed_count}")
+        # Весь чанк - паралельно через кілька SMTP сесій
+        sent_count, failed_count = deliver_notifications(db, to_deliver)
+        
+        print(
+            f"[BE-013] Case #{case_public_id} chunk: sent {sent_count}, "
+            f"failed {failed_count}, already sent {skipped_count}, "
+            f"leased / not due {leased_count}, to digest {digested_count}"
+        )
         
         return {
-            "status": "completed",
-            "case_id": case_id,
-            "public_id": case_public_id,
             "sent": sent_count,
             "failed": failed_count,
+            "skipped": skipped_count,
+            "leased": leased_count,
+            "digested": digested_count,
         }
         
     except Exception as exc:
         # Log error
-        print(f"[BE-013] Error in send_new_case_notification: {exc}")
+        print(f"[BE-013] Error in send_new_case_notification_chunk: {exc}")
         
         # Exponential backoff: 60s, 120s, 240s, 480s, 960s
         retry_delay = 60 * (2 ** self.request.retries)
@@ -184,6 +646,38 @@ def send_new_case_notification(self, case_id: str, case_public_id: int, category
         db.close()
 
 
+@celery.task(name="app.celery_app.summarize_notification_fanout")
+def summarize_notification_fanout(results: list[dict], case_id: str, case_public_id: int):
+    """
+    Chord callback: aggregate delivery results of all chunks of a fan-out.
+    
+    Args:
+        results: Return values of send_new_case_notification_chunk
+        case_id: UUID of the case (as string)
+        case_public_id: 6-digit public ID of the case
+    """
+    summary = {
+        "status": "completed",
+        "case_id": case_id,
+        "public_id": case_public_id,
+        "chunks": len(results),
+        "sent": sum(result.get("sent", 0) for result in results),
+        "failed": sum(result.get("failed", 0) for result in results),
+        "skipped": sum(result.get("skipped", 0) for result in results),
+        "leased": sum(result.get("leased", 0) for result in results),
+        "digested": sum(result.get("digested", 0) for result in results),
+    }
+    
+    print(
+        f"[BE-013] Case #{case_public_id} notifications done: sent {summary['sent']}, "
+        f"failed {summary['failed']}, already sent {summary['skipped']}, "
+        f"leased / not due {summary['leased']}, "
+        f"to digest {summary['digested']} ({summary['chunks']} chunks)"
+    )
+    
+    return summary
+
+
 @celery.task(
     name="app.celery_app.send_case_taken_notification",
     bind=True,
@@ -462,9 +956,11 @@ def send_comment_notification(
                 for user in executors_admins:
                     if str(user.id) != author_id:  # Не надсилати автору коментаря
                         recipients.append({
+                            "user_id": user.id,
                             "email": user.email,
                             "full_name": user.full_name,
-                            "role": user.role.value
+                            "role": user.role.value,
+                            "digest": user.email_digest_enabled
                         })
                 
                 print(f"[NOTIFICATION] Notifying {len(recipients)} executor(s)/admin(s)")
@@ -483,9 +979,11 @@ def send_comment_notification(
                 
                 if case_author and str(case_author.id) != author_id:
                     recipients.append({
+                        "user_id": case_author.id,
                         "email": case_author.email,
                         "full_name": case_author.full_name,
-                        "role": "Case Author"
+                        "role": "Case Author",
+                        "digest": case_author.email_digest_enabled
                     })
                 
                 # Відповідальний виконавець
@@ -496,9 +994,11 @@ def send_comment_notification(
                     
                     if responsible and str(responsible.id) != author_id:
                         recipients.append({
+                            "user_id": responsible.id,
                             "email": responsible.email,
                             "full_name": responsible.full_name,
-                            "role": "Responsible"
+                            "role": "Responsible",
+                            "digest": responsible.email_digest_enabled
                         })
                 
                 print(f"[NOTIFICATION] Notifying {len(recipients)} user(s)")
@@ -508,7 +1008,27 @@ def send_comment_notification(
             print(f"[NOTIFICATION] Comment type: {'Internal' if is_internal else 'Public'}")
             print(f"[NOTIFICATION] Comment preview: {comment_text[:100]}...")
             
+            # Digest mode: коментар потрапить у зведений лист отримувача
+            from app import crud
+            
+            digested_count = crud.add_notification_digest_items(db, [
+                {
+                    "user_id": recipient["user_id"],
+                    "notification_type": models.NotificationType.NEW_COMMENT,
+                    "event_key": crud.make_notification_dedup_key(
+                        models.NotificationType.NEW_COMMENT, comment_id, recipient["email"]
+                    ),
+                    "related_case_id": UUID(case_id),
+                    "case_public_id": case_public_id,
+                    "title": f"{author_name} ({'внутрішній' if is_internal else 'публічний'})",
+                    "details": comment_text[:200],
+                }
+                for recipient in recipients if recipient["digest"]
+            ])
+            
             for recipient in recipients:
+                if recipient["digest"]:
+                    continue
                 print(f"[NOTIFICATION] Would send email to: {recipient['email']} ({recipient['full_name']}) - {recipient['role']}")
                 # TODO: Implement actual email sending in BE-014
                 # send_email(
@@ -530,7 +1050,8 @@ def send_comment_notification(
                 "public_id": case_public_id,
                 "comment_id": comment_id,
                 "is_internal": is_internal,
-                "recipients_notified": len(recipients)
+                "recipients_notified": len(recipients),
+                "digested": digested_count
             }
             
         finally:
@@ -544,6 +1065,367 @@ def send_comment_notification(
         raise self.retry(exc=exc, countdown=retry_delay)
 
 
+@celery.task(name="app.celery_app.scan_sla_breaches")
+def scan_sla_breaches():
+    """
+    Periodic task (beat): find cases with breached SLA deadline and escalate them.
+    
+    Escalations are recorded set-based in case_escalations (one per
+    breached deadline, see crud.escalate_breached_cases); a notification
+    task is queued only for newly created escalations, so repeated scans
+    never send the same escalation twice.
+    """
+    from app.database import SessionLocal
+    from app import crud
+    
+    db = SessionLocal()
+    
+    try:
+        escalation_ids = crud.escalate_breached_cases(
+            db, batch_size=SLA_ESCALATION_BATCH_SIZE
+        )
+        
+        for escalation_id in escalation_ids:
+            send_case_escalation_notification.delay(str(escalation_id))
+        
+        print(f"[SLA] Scan completed, new escalations: {len(escalation_ids)}")
+        
+        return {
+            "status": "completed",
+            "escalated": len(escalation_ids),
+        }
+        
+    finally:
+        db.close()
+
+
+@celery.task(
+    name="app.celery_app.send_case_escalation_notification",
+    bind=True,
+    max_retries=5,
+    default_retry_delay=60  # 1 minute
+)
+def send_case_escalation_notification(self, escalation_id: str):
+    """
+    Send SLA escalation email (escalation.html) to admins and the responsible executor.
+    
+    Idempotent: each recipient has its own notification log (dedup_key),
+    recipients already SENT are skipped on retry. The escalation is marked
+    with notified_at only when every recipient got the email; otherwise the
+    task is retried for the rest (failed sends, logs held by the retry
+    scheduler).
+    
+    Args:
+        escalation_id: UUID of the case escalation (as string)
+    """
+    from uuid import UUID
+    from datetime import datetime
+    from celery.exceptions import Retry
+    from app.database import SessionLocal
+    from app import models, crud
+    from app.email_service import render_template
+    
+    db = SessionLocal()
+    
+    try:
+        escalation = crud.get_case_escalation(db, UUID(escalation_id))
+        
+        if not escalation:
+            print(f"[SLA] Escalation {escalation_id} not found, skipping")
+            return {"status": "skipped", "reason": "escalation_not_found"}
+        
+        if escalation.notified_at is not None:
+            return {"status": "skipped", "reason": "already_notified"}
+        
+        case = escalation.case
+        recipients = crud.get_escalation_recipients(db, case)
+        
+        status_display = {
+            "NEW": "Новий",
+            "IN_PROGRESS": "В роботі",
+            "NEEDS_INFO": "Потрібна додаткова інформація",
+        }.get(escalation.status.value, escalation.status.value)
+        
+        days_overdue = (datetime.utcnow() - escalation.due_at).days
+        subject = f"Ескалація: звернення #{case.public_id} прострочено"
+        
+        sent_count = 0
+        failed_count = 0
+        skipped_count = 0
+        pending_count = 0
+        escalation_body = None
+        
+        for recipient in recipients:
+            dedup_key = crud.make_notification_dedup_key(
+                models.NotificationType.CASE_ESCALATION, escalation_id, recipient.email
+            )
+            notification = crud.get_notification_log_by_dedup_key(db, dedup_key)
+            created = False
+            
+            if notification is None:
+                # Лист однаковий для всіх отримувачів - рендеримо один раз
+                if escalation_body is None:
+                    escalation_body = render_template("escalation", {
+                        "case_public_id": case.public_id,
+                        "escalation_reason": (
+                            f"Порушено SLA: звернення в статусі «{status_display}» "
+                            f"мало бути оброблене до {escalation.due_at.strftime('%d.%m.%Y %H:%M')}"
+                        ),
+                        "created_at": case.created_at.strftime("%d.%m.%Y %H:%M") if case.created_at else "",
+                        "escalated_at": escalation.escalated_at.strftime("%d.%m.%Y %H:%M"),
+                        "executor_name": case.responsible.full_name if case.responsible else "Не призначено",
+                        "status_class": escalation.status.value.lower().replace("_", "-"),
+                        "status_display": status_display,
+                        "days_overdue": days_overdue,
+                        "category_name": case.category.name if case.category else "Unknown",
+                        "applicant_name": case.applicant_name,
+                        "applicant_phone": case.applicant_phone or "",
+                        "description": case.summary[:500] if case.summary else "",
+                    })
+                
+                text_body, html_body = escalation_body
+                
+                notification, created = crud.get_or_create_notification_log(
+                    db=db,
+                    dedup_key=dedup_key,
+                    notification_type=models.NotificationType.CASE_ESCALATION,
+                    recipient_email=recipient.email,
+                    recipient_user_id=recipient.id,
+                    related_case_id=case.id,
+                    related_entity_id=escalation_id,
+                    subject=subject,
+                    body_text=text_body,
+                    body_html=html_body,
+                    celery_task_id=self.request.id,
+                )
+            
+            if notification.status == models.NotificationStatus.SENT:
+                skipped_count += 1
+                continue
+            
+            if not created:
+                # Запис з попередньої спроби: відправляємо, лише якщо його не
+                # тримає інший worker і retry scheduler не запланував пізнішу спробу
+                notification = crud.claim_notification(db, notification.id)
+                if notification is None:
+                    pending_count += 1
+                    continue
+            
+            if deliver_notification(db, notification):
+                sent_count += 1
+            else:
+                failed_count += 1
+        
+        escalation.recipients_count = skipped_count + sent_count
+        if not failed_count and not pending_count:
+            escalation.notified_at = datetime.utcnow()
+        db.commit()
+        
+        print(
+            f"[SLA] Escalation for case #{case.public_id}: sent {sent_count}, "
+            f"failed {failed_count}, pending {pending_count}"
+        )
+        
+        if failed_count or pending_count:
+            # notified_at порожній - повтор дошле решті отримувачів
+            raise self.retry(countdown=60 * (2 ** self.request.retries), max_retries=5)
+        
+        return {
+            "status": "completed",
+            "escalation_id": escalation_id,
+            "public_id": case.public_id,
+            "sent": sent_count,
+            "failed": failed_count,
+        }
+        
+    except Retry:
+        raise
+    except Exception as exc:
+        print(f"[SLA] Error in send_case_escalation_notification: {exc}")
+        
+        # Exponential backoff: 60s, 120s, 240s, 480s, 960s
+        retry_delay = 60 * (2 ** self.request.retries)
+        
+        raise self.retry(exc=exc, countdown=retry_delay, max_retries=5)
+        
+    finally:
+        db.close()
+
+
+@celery.task(name="app.celery_app.generate_attachment_previews")
+def generate_attachment_previews(attachment_id: str):
+    """
+    Generate thumbnail and preview images for an image / PDF attachment.
+    
+    Queued via the outbox by crud.create_attachment. Idempotent: existing
+    previews are kept, so attachments sharing a blob render it once.
+    Corrupt or unsupported files are logged and not retried.
+    """
+    from uuid import UUID
+    from app.database import SessionLocal
+    from app import crud, previews
+    
+    db = SessionLocal()
+    
+    try:
+        attachment = crud.get_attachment(db, UUID(attachment_id))
+        if not attachment:
+            return {"status": "skipped", "reason": "attachment not found"}
+        file_path, mime_type = attachment.file_path, attachment.mime_type
+    finally:
+        db.close()
+    
+    try:
+        generated = previews.render_previews(file_path, mime_type)
+    except Exception as exc:
+        print(f"[PREVIEWS] Failed to render previews for attachment {attachment_id}: {exc}")
+        return {"status": "failed", "attachment_id": attachment_id, "error": str(exc)}
+    
+    return {
+        "status": "completed",
+        "attachment_id": attachment_id,
+        "generated": generated,
+    }
+
+
+@celery.task(
+    name="app.celery_app.process_case_submission",
+    bind=True,
+    default_retry_delay=30
+)
+def process_case_submission(self, submission_id: str):
+    """
+    Create the case of an asynchronous submission (POST /api/cases/submissions).
+    
+    Queued via the outbox by crud.create_case_submission (and again by
+    recover_case_submissions if the task was lost). Validation errors fail
+    the submission at once; storage / database errors are retried until the
+    submission has used CASE_SUBMISSION_MAX_RETRIES + 1 attempts (counted
+    in case_submissions.attempts), then it is marked FAILED.
+    Idempotent: a finished submission is skipped.
+    
+    Args:
+        submission_id: UUID of the case submission (as string)
+    """
+    from uuid import UUID
+    from app.database import SessionLocal
+    from app import submissions
+    
+    db = SessionLocal()
+    
+    try:
+        result = submissions.process_case_submission(db, UUID(submission_id))
+        
+        if result["status"] == "completed":
+            print(f"[SUBMISSIONS] Submission {submission_id}: created case #{result['public_id']}")
+        
+        return result
+        
+    except Exception as exc:
+        print(f"[SUBMISSIONS] Error in process_case_submission: {exc}")
+        
+        if submissions.attempts_exhausted(db, UUID(submission_id)):
+            submissions.fail_submission(db, UUID(submission_id), f"Failed to create case: {exc}")
+            return {"status": "failed", "submission_id": submission_id, "error": str(exc)}
+        
+        # Exponential backoff: 30s, 60s, 120s, ... (не більше години)
+        retry_delay = min(30 * (2 ** self.request.retries), 3600)
+        
+        # Кількість спроб обмежує attempts (переживає повторну постановку в чергу)
+        raise self.retry(exc=exc, countdown=retry_delay, max_retries=None)
+        
+    finally:
+        db.close()
+
+
+@celery.task(name="app.celery_app.recover_case_submissions")
+def recover_case_submissions():
+    """
+    Periodic task (beat): re-queue or fail submissions whose task was lost.
+    
+    Submissions without progress for CASE_SUBMISSION_STUCK_SECONDS are
+    queued again; those that used all attempts are marked FAILED and their
+    staged files are removed.
+    """
+    from app.database import SessionLocal
+    from app import submissions
+    
+    db = SessionLocal()
+    
+    try:
+        stats = submissions.recover_stuck_submissions(db)
+        
+        if stats["requeued"] or stats["failed"]:
+            print(f"[SUBMISSIONS] Stuck submissions: requeued {stats['requeued']}, failed {stats['failed']}")
+        
+        return {
+            "status": "completed",
+            **stats,
+        }
+        
+    finally:
+        db.close()
+
+
+@celery.task(name="app.celery_app.collect_unreferenced_blobs")
+def collect_unreferenced_blobs():
+    """
+    Periodic task (beat): remove attachment blobs without references.
+    
+    Blobs reach ref_count 0 when cases are deleted together with their
+    attachments; single attachment deletes collect their blob right away.
+    """
+    from app.database import SessionLocal
+    from app import blobs
+    
+    db = SessionLocal()
+    
+    try:
+        total = 0
+        while collected := blobs.collect_unreferenced_blobs(db):
+            total += collected
+        
+        print(f"[BLOBS] Collected unreferenced blobs: {total}")
+        
+        return {
+            "status": "completed",
+            "collected": total,
+        }
+        
+    finally:
+        db.close()
+
+
+@celery.task(name="app.celery_app.scrub_attachments")
+def scrub_attachments():
+    """
+    Periodic task (beat): check attachments against storage files.
+    
+    Each run continues from the saved cursors and processes at most
+    SCRUB_BATCHES_PER_RUN batches per phase. Reports missing files,
+    size / checksum mismatches and orphan files; deletes orphans and rows
+    of missing files only with SCRUB_FIX=true.
+    """
+    from app.database import SessionLocal
+    from app import scrubber
+    
+    db = SessionLocal()
+    
+    try:
+        result = scrubber.run_scrub(db)
+        
+        print(f"[SCRUB] Attachments: {result['attachments']}")
+        print(f"[SCRUB] Storage: {result['storage']}")
+        
+        return {
+            "status": "completed",
+            **result,
+        }
+        
+    finally:
+        db.close()
+
+
 # Auto-discover tasks from this module
 celery.autodiscover_tasks(['app.celery_app'], related_name='', force=True)
 
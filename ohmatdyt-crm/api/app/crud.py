@@ -1,14 +1,16 @@
 """CRUD operations for database models."""
 
 import logging
+import os
 import sys
 from typing import Optional
 from uuid import UUID
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import select, delete
 
-from app import models, schemas
+from app import models, schemas, cache
 from app.auth import hash_password
+from app.previews import is_previewable
 
 # Налаштування логування
 logger = logging.getLogger(__name__)
@@ -55,6 +57,7 @@ def create_user(db: Session, user: schemas.UserCreate) -> models.User:
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    invalidate_notification_recipients()
     
     return db_user
 
@@ -263,6 +266,7 @@ def update_user(
     
     db.commit()
     db.refresh(db_user)
+    invalidate_notification_recipients()
     
     return db_user
 
@@ -312,6 +316,7 @@ def delete_user(db: Session, user_id: UUID) -> bool:
     
     db.delete(db_user)
     db.commit()
+    invalidate_notification_recipients()
     
     return True
 
@@ -335,6 +340,7 @@ def deactivate_user(db: Session, user_id: UUID) -> Optional[models.User]:
     
     db.commit()
     db.refresh(db_user)
+    invalidate_notification_recipients()
     
     return db_user
 
@@ -358,6 +364,7 @@ def activate_user(db: Session, user_id: UUID) -> Optional[models.User]:
     
     db.commit()
     db.refresh(db_user)
+    invalidate_notification_recipients()
     
     return db_user
 
@@ -732,15 +739,432 @@ def activate_channel(db: Session, channel_id: UUID) -> Optional[models.Channel]:
     return db_channel
 
 
+# ==================== Case SLA ====================
+
+# Нормативний час обробки звернення в статусі (години), якщо для статусу
+# немає політики в sla_policies. Статуси без запису не мають дедлайну.
+CASE_SLA_HOURS = {
+    models.CaseStatus.NEW: int(os.getenv("CASE_SLA_NEW_HOURS", "72")),
+    models.CaseStatus.IN_PROGRESS: int(os.getenv("CASE_SLA_IN_PROGRESS_HOURS", "168")),
+}
+
+# Закриті статуси ніколи не мають дедлайну
+SLA_CLOSED_STATUSES = (models.CaseStatus.DONE, models.CaseStatus.REJECTED)
+
+
+def get_sla_target_hours(
+    db: Session,
+    category_id: Optional[UUID],
+    status: models.CaseStatus
+) -> Optional[int]:
+    """
+    Resolve effective SLA target (hours) for a category and status.
+    
+    Priority: category policy -> default policy (category_id IS NULL)
+    -> CASE_SLA_HOURS fallback.
+    
+    Args:
+        db: Database session
+        category_id: Case category UUID
+        status: Case status
+        
+    Returns:
+        Target hours, or None if the status has no SLA
+    """
+    from sqlalchemy import or_
+    
+    if status in SLA_CLOSED_STATUSES:
+        return None
+    
+    hours = db.execute(
+        select(models.SLAPolicy.target_hours)
+        .where(
+            models.SLAPolicy.status == status,
+            or_(
+                models.SLAPolicy.category_id == category_id,
+                models.SLAPolicy.category_id.is_(None)
+            )
+        )
+        # Політика категорії (category_id NOT NULL) має пріоритет
+        .order_by(models.SLAPolicy.category_id.is_(None))
+        .limit(1)
+    ).scalar_one_or_none()
+    
+    if hours is None:
+        hours = CASE_SLA_HOURS.get(status)
+    return hours
+
+
+def compute_case_due_at(target_hours: Optional[int], started_at=None):
+    """
+    Calculate SLA deadline from target hours.
+    
+    Args:
+        target_hours: SLA target (see get_sla_target_hours), None - no SLA
+        started_at: Moment the case entered the status (defaults to now)
+        
+    Returns:
+        datetime deadline, or None if there is no SLA
+    """
+    from datetime import datetime, timedelta
+    
+    if target_hours is None:
+        return None
+    return (started_at or datetime.utcnow()) + timedelta(hours=target_hours)
+
+
+def set_case_status(
+    db: Session,
+    db_case: models.Case,
+    status: models.CaseStatus,
+    changed_at=None
+) -> None:
+    """
+    Set case status and recalculate its SLA deadline (due_at).
+    
+    All status changes must go through this helper so that due_at
+    stays consistent with the overdue filters and escalation scanning.
+    """
+    db_case.status = status
+    db_case.due_at = compute_case_due_at(
+        get_sla_target_hours(db, db_case.category_id, status),
+        changed_at
+    )
+
+
+def overdue_case_clause(now=None):
+    """
+    SQL predicate for overdue cases (shared by dashboard and list filters).
+    
+    A case is overdue when it has a deadline and the deadline has passed.
+    Served by the partial index ix_cases_due_at_open.
+    """
+    from datetime import datetime
+    from sqlalchemy import and_
+    
+    return and_(
+        models.Case.due_at.isnot(None),
+        models.Case.due_at < (now or datetime.utcnow())
+    )
+
+
+def not_overdue_case_clause(now=None):
+    """SQL predicate complementary to overdue_case_clause"""
+    from datetime import datetime
+    from sqlalchemy import or_
+    
+    return or_(
+        models.Case.due_at.is_(None),
+        models.Case.due_at >= (now or datetime.utcnow())
+    )
+
+
+# ==================== SLA Policy CRUD Operations ====================
+
+def get_sla_policies(
+    db: Session,
+    category_id: Optional[UUID] = None
+) -> list[models.SLAPolicy]:
+    """
+    Get SLA policies.
+    
+    Args:
+        db: Database session
+        category_id: Only policies of this category (default policies are always included)
+        
+    Returns:
+        List of SLA policies, default policies first
+    """
+    from sqlalchemy import or_
+    
+    query = select(models.SLAPolicy)
+    if category_id is not None:
+        query = query.where(
+            or_(
+                models.SLAPolicy.category_id == category_id,
+                models.SLAPolicy.category_id.is_(None)
+            )
+        )
+    query = query.order_by(
+        models.SLAPolicy.category_id.isnot(None),
+        models.SLAPolicy.category_id,
+        models.SLAPolicy.status
+    )
+    return list(db.execute(query).scalars().all())
+
+
+def get_sla_policy(db: Session, policy_id: UUID) -> Optional[models.SLAPolicy]:
+    """Get SLA policy by UUID"""
+    return db.execute(
+        select(models.SLAPolicy).where(models.SLAPolicy.id == policy_id)
+    ).scalar_one_or_none()
+
+
+def upsert_sla_policy(db: Session, policy: schemas.SLAPolicyUpsert) -> models.SLAPolicy:
+    """
+    Create or update SLA policy for (category, status) and recalculate
+    deadlines of affected open cases.
+    
+    Args:
+        db: Database session
+        policy: Policy data (category_id = None for the default policy)
+        
+    Returns:
+        Created or updated policy
+        
+    Raises:
+        ValueError: If category doesn't exist or status is closed
+    """
+    from uuid import UUID as parse_uuid
+    
+    if policy.status in SLA_CLOSED_STATUSES:
+        raise ValueError(f"SLA cannot be set for closed status {policy.status.value}")
+    
+    category_id = None
+    if policy.category_id:
+        category_id = parse_uuid(policy.category_id)
+        if not get_category(db, category_id):
+            raise ValueError(f"Category with id '{policy.category_id}' not found")
+    
+    db_policy = db.execute(
+        select(models.SLAPolicy).where(
+            models.SLAPolicy.status == policy.status,
+            models.SLAPolicy.category_id == category_id
+            if category_id is not None
+            else models.SLAPolicy.category_id.is_(None)
+        )
+    ).scalar_one_or_none()
+    
+    if db_policy:
+        db_policy.target_hours = policy.target_hours
+    else:
+        db_policy = models.SLAPolicy(
+            category_id=category_id,
+            status=policy.status,
+            target_hours=policy.target_hours
+        )
+        db.add(db_policy)
+    
+    db.flush()
+    recalculate_case_due_dates(db, policy.status, category_id)
+    
+    db.commit()
+    db.refresh(db_policy)
+    
+    return db_policy
+
+
+def delete_sla_policy(db: Session, policy_id: UUID) -> bool:
+    """
+    Delete SLA policy and recalculate deadlines of affected open cases
+    (they fall back to the default policy / CASE_SLA_HOURS).
+    
+    Returns:
+        True if deleted, False if not found
+    """
+    db_policy = get_sla_policy(db, policy_id)
+    if not db_policy:
+        return False
+    
+    status, category_id = db_policy.status, db_policy.category_id
+    db.delete(db_policy)
+    db.flush()
+    recalculate_case_due_dates(db, status, category_id)
+    
+    db.commit()
+    return True
+
+
+def recalculate_case_due_dates(
+    db: Session,
+    status: models.CaseStatus,
+    category_id: Optional[UUID] = None
+) -> int:
+    """
+    Recalculate due_at of open cases in a status after an SLA policy change.
+    
+    Single set-based UPDATE: the deadline is counted from the last time
+    the case entered its current status (status_history), or created_at.
+    Does not commit - the caller commits together with the policy change.
+    
+    Args:
+        db: Database session
+        status: Status whose policy changed
+        category_id: Category of the changed policy; None - default policy,
+                     applied to categories without their own policy
+        
+    Returns:
+        Number of updated cases
+    """
+    from sqlalchemy import update, func, literal, exists
+    
+    hours = get_sla_target_hours(db, category_id, status)
+    
+    entered_at = func.coalesce(
+        select(func.max(models.StatusHistory.changed_at))
+        .where(
+            models.StatusHistory.case_id == models.Case.id,
+            models.StatusHistory.new_status == models.Case.status
+        )
+        .scalar_subquery(),
+        models.Case.created_at
+    )
+    
+    if hours is None:
+        due_at = literal(None)
+    else:
+        due_at = entered_at + func.make_interval(0, 0, 0, 0, hours)
+    
+    stmt = update(models.Case).where(models.Case.status == status).values(due_at=due_at)
+    
+    if category_id is not None:
+        stmt = stmt.where(models.Case.category_id == category_id)
+    else:
+        # Категорії з власною політикою не зачіпаємо
+        stmt = stmt.where(
+            ~exists().where(
+                models.SLAPolicy.category_id == models.Case.category_id,
+                models.SLAPolicy.status == status
+            )
+        )
+    
+    result = db.execute(stmt.execution_options(synchronize_session=False))
+    return result.rowcount
+
+
+# ==================== Case Escalation Operations ====================
+
+def escalate_breached_cases(
+    db: Session,
+    now=None,
+    batch_size: int = 1000
+) -> list[UUID]:
+    """
+    Record escalations for all cases whose SLA deadline has passed.
+    
+    Breached cases are read in keyset batches ordered by (due_at, id) -
+    a range scan on the partial index ix_cases_due_at_open. Each batch is
+    one statement: the batch CTE feeds INSERT ... ON CONFLICT DO NOTHING
+    RETURNING, so every breach (case_id, due_at) is escalated exactly once
+    no matter how often the scan runs, and no per-case round trips are made.
+    
+    Args:
+        db: Database session
+        now: Scan moment (defaults to now)
+        batch_size: Number of cases per batch
+        
+    Returns:
+        UUIDs of newly created escalations
+    """
+    from datetime import datetime
+    from sqlalchemy import or_, func, literal
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    
+    now = now or datetime.utcnow()
+    created_ids = []
+    last_due_at, last_id = None, None
+    
+    while True:
+        batch_query = (
+            select(models.Case.id, models.Case.status, models.Case.due_at)
+            .where(overdue_case_clause(now))
+            .order_by(models.Case.due_at, models.Case.id)
+            .limit(batch_size)
+        )
+        if last_due_at is not None:
+            batch_query = batch_query.where(
+                models.Case.due_at >= last_due_at,
+                or_(
+                    models.Case.due_at > last_due_at,
+                    models.Case.id > last_id
+                )
+            )
+        batch = batch_query.cte("batch")
+        
+        inserted = (
+            pg_insert(models.CaseEscalation)
+            .from_select(
+                ['id', 'case_id', 'status', 'due_at', 'escalated_at', 'recipients_count'],
+                select(
+                    func.gen_random_uuid(),
+                    batch.c.id,
+                    batch.c.status,
+                    batch.c.due_at,
+                    literal(now),
+                    literal(0)
+                )
+            )
+            .on_conflict_do_nothing(index_elements=['case_id', 'due_at'])
+            .returning(models.CaseEscalation.id)
+            .cte("inserted")
+        )
+        
+        # Останній ключ батча (курсор) + id створених ескалацій
+        last_row = (
+            select(batch.c.due_at, batch.c.id)
+            .order_by(batch.c.due_at.desc(), batch.c.id.desc())
+            .limit(1)
+            .subquery()
+        )
+        result = db.execute(
+            select(
+                select(func.count()).select_from(batch).scalar_subquery().label('batch_count'),
+                select(last_row.c.due_at).scalar_subquery().label('last_due_at'),
+                select(last_row.c.id).scalar_subquery().label('last_id'),
+                select(func.array_agg(inserted.c.id)).scalar_subquery().label('inserted_ids'),
+            )
+        ).one()
+        db.commit()
+        
+        created_ids.extend(result.inserted_ids or [])
+        
+        if result.batch_count < batch_size:
+            break
+        last_due_at, last_id = result.last_due_at, result.last_id
+    
+    return created_ids
+
+
+def get_case_escalation(db: Session, escalation_id: UUID) -> Optional[models.CaseEscalation]:
+    """Get case escalation by UUID (with case, category and responsible loaded)"""
+    return db.execute(
+        select(models.CaseEscalation)
+        .options(
+            joinedload(models.CaseEscalation.case).joinedload(models.Case.category),
+            joinedload(models.CaseEscalation.case).joinedload(models.Case.responsible)
+        )
+        .where(models.CaseEscalation.id == escalation_id)
+    ).scalar_one_or_none()
+
+
+def get_escalation_recipients(db: Session, case: models.Case) -> list[models.User]:
+    """
+    Recipients of an SLA escalation: all active admins and the
+    responsible executor (if assigned and active).
+    """
+    from sqlalchemy import or_
+    
+    conditions = [models.User.role == models.UserRole.ADMIN]
+    if case.responsible_id:
+        conditions.append(models.User.id == case.responsible_id)
+    
+    return list(db.execute(
+        select(models.User).where(
+            models.User.is_active == True,
+            or_(*conditions)
+        )
+    ).scalars().all())
+
+
 # ==================== Case CRUD Operations ====================
 
-def create_case(
-    db: Session, 
-    case: schemas.CaseCreate, 
+def add_case(
+    db: Session,
+    case: schemas.CaseCreate,
     author_id: UUID
 ) -> models.Case:
     """
-    Create a new case with a unique 6-digit public_id.
+    Validate and add a new case with its notification event (no commit).
     
     Args:
         db: Database session
@@ -748,7 +1172,7 @@ def create_case(
         author_id: UUID of the user creating the case (OPERATOR)
         
     Returns:
-        Created case model
+        Flushed case model (id and public_id assigned)
         
     Raises:
         ValueError: If category, channel, or responsible user doesn't exist
@@ -796,11 +1220,49 @@ def create_case(
         applicant_email=case.applicant_email,
         summary=case.summary,
         status=models.CaseStatus.NEW,
+        due_at=compute_case_due_at(
+            get_sla_target_hours(db, category.id, models.CaseStatus.NEW)
+        ),
         author_id=author_id,
         responsible_id=responsible_id_uuid
     )
     
     db.add(db_case)
+    db.flush()
+    
+    # Нотифікація виконавцям - через outbox, в одній транзакції зі зверненням
+    add_outbox_event(
+        db,
+        "app.celery_app.send_new_case_notification",
+        case_id=str(db_case.id),
+        case_public_id=db_case.public_id,
+        category_id=str(db_case.category_id),
+    )
+    
+    return db_case
+
+
+def create_case(
+    db: Session, 
+    case: schemas.CaseCreate, 
+    author_id: UUID
+) -> models.Case:
+    """
+    Create a new case with a unique 6-digit public_id.
+    
+    Args:
+        db: Database session
+        case: Case creation schema
+        author_id: UUID of the user creating the case (OPERATOR)
+        
+    Returns:
+        Created case model
+        
+    Raises:
+        ValueError: If category, channel, or responsible user doesn't exist
+    """
+    db_case = add_case(db, case, author_id)
+    
     db.commit()
     db.refresh(db_case)
     
@@ -813,7 +1275,277 @@ def create_case(
         changed_by_id=author_id
     )
     
-    return db_case
+    return db_case
+
+
+def create_case_with_attachments(
+    db: Session,
+    case: schemas.CaseCreate,
+    author_id: UUID,
+    files: list[dict],
+    submission: Optional[models.CaseSubmission] = None
+) -> tuple[models.Case, list[models.Attachment]]:
+    """
+    Create a case together with its uploaded files in one transaction.
+    
+    The case is validated first (no file I/O for an invalid case), then
+    the files are stored in parallel (blobs.store_blobs) and the
+    attachment rows are inserted in one bulk INSERT. Case, status history,
+    blob references, attachments and outbox events are committed at once,
+    so a failure leaves neither a case without files nor rows without a
+    case.
+    
+    Args:
+        db: Database session
+        case: Case creation schema
+        author_id: UUID of the user creating the case
+        files: Dicts with temp_path, sha256, size, original_name, mime_type
+            (temp files from utils.stream_upload_to_temp)
+        submission: Locked asynchronous submission, marked COMPLETED in
+            the same transaction (see start_case_submission)
+        
+    Returns:
+        Tuple of (created case, created attachments in upload order)
+        
+    Raises:
+        ValueError: If category, channel, or responsible user doesn't exist
+        Exception: Storage errors while saving files
+    """
+    import uuid
+    from datetime import datetime
+    from sqlalchemy import insert
+    from app import blobs
+    
+    try:
+        db_case = add_case(db, case, author_id)
+    except Exception:
+        db.rollback()
+        raise
+    
+    if submission is not None:
+        # Повтор таски побачить COMPLETED і не створить друге звернення
+        submission.case_id = db_case.id
+        submission.status = models.CaseSubmissionStatus.COMPLETED
+        submission.error = None
+        submission.completed_at = datetime.utcnow()
+    
+    db.add(models.StatusHistory(
+        case_id=db_case.id,
+        old_status=None,
+        new_status=models.CaseStatus.NEW,
+        changed_by_id=author_id
+    ))
+    
+    # Відкатує транзакцію (разом зі зверненням) і прибирає temp-файли при помилці
+    stored = blobs.store_blobs(
+        db, [(f['temp_path'], f['sha256'], f['size']) for f in files]
+    )
+    
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "case_id": db_case.id,
+            "file_path": blob.file_path,
+            "original_name": f['original_name'],
+            "size_bytes": f['size'],
+            "mime_type": f['mime_type'],
+            "sha256": f['sha256'],
+            "blob_id": blob.id,
+            "uploaded_by_id": author_id,
+        }
+        for f, blob in zip(files, stored)
+    ]
+    if rows:
+        db.execute(insert(models.Attachment), rows)
+    for row in rows:
+        if is_previewable(row["mime_type"]):
+            add_outbox_event(
+                db,
+                "app.celery_app.generate_attachment_previews",
+                attachment_id=str(row["id"]),
+            )
+    
+    db.commit()
+    db.refresh(db_case)
+    
+    attachments = []
+    if rows:
+        by_id = {
+            attachment.id: attachment
+            for attachment in db.execute(
+                select(models.Attachment).where(models.Attachment.id.in_([row["id"] for row in rows]))
+            ).scalars()
+        }
+        attachments = [by_id[row["id"]] for row in rows]
+    
+    return db_case, attachments
+
+
+def create_case_submission(
+    db: Session,
+    submission_id: UUID,
+    author_id: UUID,
+    payload: dict
+) -> models.CaseSubmission:
+    """
+    Record an asynchronous case submission and queue its processing.
+    
+    The submission row and the outbox event are committed together, the
+    worker (app.celery_app.process_case_submission) creates the case.
+    
+    Args:
+        db: Database session
+        submission_id: Pre-generated UUID (staging keys depend on it)
+        author_id: UUID of the submitting user
+        payload: CaseCreate fields ("case") and staged files ("files")
+        
+    Returns:
+        Created submission (PENDING)
+    """
+    import json
+    
+    submission = models.CaseSubmission(
+        id=submission_id,
+        author_id=author_id,
+        status=models.CaseSubmissionStatus.PENDING,
+        payload=json.dumps(payload),
+    )
+    db.add(submission)
+    add_outbox_event(
+        db,
+        "app.celery_app.process_case_submission",
+        submission_id=str(submission_id),
+    )
+    db.commit()
+    db.refresh(submission)
+    return submission
+
+
+def get_case_submission(db: Session, submission_id: UUID) -> Optional[models.CaseSubmission]:
+    """
+    Get asynchronous case submission by UUID.
+    
+    Args:
+        db: Database session
+        submission_id: Submission UUID
+        
+    Returns:
+        CaseSubmission model or None if not found
+    """
+    return db.get(models.CaseSubmission, submission_id)
+
+
+def start_case_submission(db: Session, submission_id: UUID) -> Optional[models.CaseSubmission]:
+    """
+    Mark a submission PROCESSING and lock it for case creation.
+    
+    The status change is committed (visible to the status endpoint), then
+    the row is locked FOR UPDATE until crud.create_case_with_attachments
+    commits it as COMPLETED. A duplicate delivery of the task waits for
+    the lock and gets None once the submission is finished.
+    
+    Args:
+        db: Database session
+        submission_id: Submission UUID
+        
+    Returns:
+        Locked submission or None if it is already COMPLETED / FAILED
+    """
+    from datetime import datetime
+    from sqlalchemy import update
+    
+    open_statuses = (models.CaseSubmissionStatus.PENDING, models.CaseSubmissionStatus.PROCESSING)
+    db.execute(
+        update(models.CaseSubmission)
+        .where(
+            models.CaseSubmission.id == submission_id,
+            models.CaseSubmission.status.in_(open_statuses),
+        )
+        .values(
+            status=models.CaseSubmissionStatus.PROCESSING,
+            attempts=models.CaseSubmission.attempts + 1,
+            updated_at=datetime.utcnow(),
+        )
+    )
+    db.commit()
+    
+    return db.execute(
+        select(models.CaseSubmission)
+        .where(
+            models.CaseSubmission.id == submission_id,
+            models.CaseSubmission.status == models.CaseSubmissionStatus.PROCESSING,
+        )
+        .with_for_update()
+    ).scalar_one_or_none()
+
+
+def lock_stale_case_submissions(
+    db: Session,
+    older_than,
+    limit: int = 100
+) -> list[models.CaseSubmission]:
+    """
+    Lock unfinished submissions not updated since older_than (no commit).
+    
+    FOR UPDATE SKIP LOCKED: submissions locked by a working task
+    (start_case_submission) are skipped.
+    
+    Args:
+        db: Database session
+        older_than: Cutoff for updated_at (UTC)
+        limit: Batch size
+        
+    Returns:
+        List of locked PENDING / PROCESSING submissions
+    """
+    query = (
+        select(models.CaseSubmission)
+        .where(
+            models.CaseSubmission.status.in_(
+                (models.CaseSubmissionStatus.PENDING, models.CaseSubmissionStatus.PROCESSING)
+            ),
+            models.CaseSubmission.updated_at < older_than,
+        )
+        .order_by(models.CaseSubmission.updated_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return list(db.execute(query).scalars().all())
+
+
+def fail_case_submission(db: Session, submission_id: UUID, error: str) -> bool:
+    """
+    Mark an unfinished submission FAILED and commit.
+    
+    Args:
+        db: Database session
+        submission_id: Submission UUID
+        error: Reason shown by the status endpoint
+        
+    Returns:
+        True if the submission was marked, False if it was already finished
+    """
+    from datetime import datetime
+    from sqlalchemy import update
+    
+    now = datetime.utcnow()
+    result = db.execute(
+        update(models.CaseSubmission)
+        .where(
+            models.CaseSubmission.id == submission_id,
+            models.CaseSubmission.status.in_(
+                (models.CaseSubmissionStatus.PENDING, models.CaseSubmissionStatus.PROCESSING)
+            ),
+        )
+        .values(
+            status=models.CaseSubmissionStatus.FAILED,
+            error=error,
+            completed_at=now,
+            updated_at=now,
+        )
+    )
+    db.commit()
+    return result.rowcount > 0
 
 
 def get_case(db: Session, case_id: UUID) -> Optional[models.Case]:
@@ -889,7 +1621,7 @@ def get_all_cases(
         public_id: Filter by 6-digit public ID
         date_from: Filter by created date from (ISO format)
         date_to: Filter by created date to (ISO format)
-        overdue: Filter overdue cases (requires SLA field - placeholder)
+        overdue: Filter overdue cases (SLA deadline due_at has passed)
         order_by: Sort field (prefix with - for descending, e.g., -created_at)
         skip: Number of records to skip (pagination)
         limit: Maximum number of records to return
@@ -1029,28 +1761,9 @@ def get_all_cases(
         except ValueError:
             pass  # Invalid date format, skip filter
     
-    # Overdue filter (placeholder - will be implemented when SLA fields are added)
-    # For now, we'll mark cases as overdue if they're in NEW or IN_PROGRESS status
-    # and older than 7 days
+    # Overdue filter: SLA deadline (due_at) has passed
     if overdue is not None:
-        from datetime import timedelta
-        seven_days_ago = datetime.utcnow() - timedelta(days=7)
-        
-        if overdue:
-            # Cases that are overdue: old and not resolved
-            query = query.where(
-                models.Case.created_at < seven_days_ago,
-                models.Case.status.in_([models.CaseStatus.NEW, models.CaseStatus.IN_PROGRESS])
-            )
-        else:
-            # Cases that are not overdue
-            from sqlalchemy import or_
-            query = query.where(
-                or_(
-                    models.Case.created_at >= seven_days_ago,
-                    models.Case.status.in_([models.CaseStatus.DONE, models.CaseStatus.REJECTED])
-                )
-            )
+        query = query.where(overdue_case_clause() if overdue else not_overdue_case_clause())
     
     # Get total count BEFORE applying joins and pagination
     # Create a count query from the current filter conditions
@@ -1129,22 +1842,7 @@ def get_all_cases(
     
     # Overdue filter
     if overdue is not None:
-        from datetime import timedelta
-        seven_days_ago = datetime.utcnow() - timedelta(days=7)
-        
-        if overdue:
-            count_query = count_query.where(
-                models.Case.created_at < seven_days_ago,
-                models.Case.status.in_([models.CaseStatus.NEW, models.CaseStatus.IN_PROGRESS])
-            )
-        else:
-            from sqlalchemy import or_
-            count_query = count_query.where(
-                or_(
-                    models.Case.created_at >= seven_days_ago,
-                    models.Case.status.in_([models.CaseStatus.DONE, models.CaseStatus.REJECTED])
-                )
-            )
+        count_query = count_query.where(overdue_case_clause() if overdue else not_overdue_case_clause())
     
     # Execute count query
     total = db.execute(count_query).scalar() or 0
@@ -1244,7 +1942,7 @@ def update_case(
     if case_update.status is not None and case_update.status != db_case.status:
         # Log status change
         old_status = db_case.status
-        db_case.status = case_update.status
+        set_case_status(db, db_case, case_update.status)
         
         # Note: changed_by_id should be passed separately, using case author for now
         # This should be updated when we add user context to update operations
@@ -1289,37 +1987,105 @@ def delete_case(db: Session, case_id: UUID) -> bool:
     if not db_case:
         return False
     
+    # Каскад видаляє attachments - відпускаємо їхні blob'и тут;
+    # файли без посилань прибирає blobs.collect_unreferenced_blobs
+    release_case_attachment_blobs(db, case_id)
+    
     db.delete(db_case)
     db.commit()
     
     return True
 
 
+# Кеш мапи категорія -> отримувачі нотифікацій про нові звернення
+NOTIFICATION_RECIPIENTS_CACHE_NAMESPACE = "notification:recipients"
+
+
+def _category_recipients_clause(category_id: UUID):
+    """Активні адміни + активні виконавці з доступом до категорії (BE-019)"""
+    from sqlalchemy import or_, and_
+    
+    has_access = select(models.ExecutorCategoryAccess.executor_id).where(
+        models.ExecutorCategoryAccess.category_id == category_id
+    )
+    return and_(
+        models.User.is_active == True,
+        or_(
+            models.User.role == models.UserRole.ADMIN,
+            and_(
+                models.User.role == models.UserRole.EXECUTOR,
+                models.User.id.in_(has_access),
+            ),
+        ),
+    )
+
+
 def get_executors_for_category(
     db: Session,
     category_id: UUID
 ) -> list[models.User]:
     """
-    Get all active executors (users with EXECUTOR or ADMIN role).
+    Get users to notify about cases of a category.
     
-    Note: In the future, this can be enhanced to filter by category assignment.
-    For now, returns all active executors.
+    Active executors with access to the category (executor_category_access)
+    and all active admins.
     
     Args:
         db: Database session
-        category_id: Category UUID (currently not used, for future enhancement)
+        category_id: Category UUID
         
     Returns:
-        List of executor users
+        List of executor / admin users
     """
     query = select(models.User).where(
-        models.User.role.in_([models.UserRole.EXECUTOR, models.UserRole.ADMIN]),
-        models.User.is_active == True
-    )
+        _category_recipients_clause(category_id)
+    ).order_by(models.User.id)
     
     return list(db.execute(query).scalars().all())
 
 
+def get_category_recipient_ids(db: Session, category_id: UUID) -> list[str]:
+    """
+    UUID отримувачів нотифікацій для категорії (кешується в Redis).
+    
+    Кеш інвалідується при зміні доступів до категорій, ролі чи активності
+    користувачів (invalidate_notification_recipients).
+    
+    Args:
+        db: Database session
+        category_id: Category UUID
+        
+    Returns:
+        List of user UUIDs (as strings)
+    """
+    def compute() -> list[str]:
+        return [
+            str(user_id) for user_id in db.execute(
+                select(models.User.id)
+                .where(_category_recipients_clause(category_id))
+                .order_by(models.User.id)
+            ).scalars().all()
+        ]
+    
+    # Версію читаємо до обчислення: інвалідація під час обчислення
+    # змінить ключ, і застарілий результат більше ніхто не прочитає
+    version = cache.get_namespace_version(NOTIFICATION_RECIPIENTS_CACHE_NAMESPACE)
+    if version is None:
+        return compute()
+    
+    key = cache.make_cache_key(
+        NOTIFICATION_RECIPIENTS_CACHE_NAMESPACE,
+        category_id=category_id,
+        version=version,
+    )
+    return cache.get_or_compute(key, compute, ttl=cache.NOTIFICATION_RECIPIENTS_CACHE_TTL_SECONDS)
+
+
+def invalidate_notification_recipients() -> None:
+    """Скидає кеш отримувачів нотифікацій для всіх категорій"""
+    cache.invalidate_namespace(NOTIFICATION_RECIPIENTS_CACHE_NAMESPACE)
+
+
 # ==================== Attachment CRUD Operations ====================
 
 def create_attachment(
@@ -1329,11 +2095,17 @@ def create_attachment(
     original_name: str,
     size_bytes: int,
     mime_type: str,
-    uploaded_by_id: UUID
+    uploaded_by_id: UUID,
+    sha256: Optional[str] = None,
+    blob_id: Optional[str] = None
 ) -> models.Attachment:
     """
     Create a new attachment record.
     
+    With blob_id the reference must already be acquired in the same
+    session (acquire_attachment_blob); the commit here persists both.
+    For images and PDFs preview generation is queued via the outbox.
+    
     Args:
         db: Database session
         case_id: UUID of the case
@@ -1342,6 +2114,8 @@ def create_attachment(
         size_bytes: File size in bytes
         mime_type: MIME type
         uploaded_by_id: UUID of user uploading the file
+        sha256: SHA-256 of file content (hex)
+        blob_id: Shared content blob (AttachmentBlob.id)
         
     Returns:
         Created attachment model
@@ -1360,10 +2134,22 @@ def create_attachment(
         original_name=original_name,
         size_bytes=size_bytes,
         mime_type=mime_type,
+        sha256=sha256,
+        blob_id=blob_id,
         uploaded_by_id=uploaded_by_id
     )
     
     db.add(db_attachment)
+    
+    if is_previewable(mime_type):
+        # Мініатюри генерує worker; подія в тій самій транзакції
+        db.flush()
+        add_outbox_event(
+            db,
+            "app.celery_app.generate_attachment_previews",
+            attachment_id=str(db_attachment.id),
+        )
+    
     db.commit()
     db.refresh(db_attachment)
     
@@ -1390,7 +2176,7 @@ def get_case_attachments(
     db: Session,
     case_id: UUID,
     skip: int = 0,
-    limit: int = 100
+    limit: Optional[int] = 100
 ) -> list[models.Attachment]:
     """
     Get all attachments for a specific case.
@@ -1399,7 +2185,7 @@ def get_case_attachments(
         db: Database session
         case_id: Case UUID
         skip: Number of records to skip
-        limit: Maximum number of records to return
+        limit: Maximum number of records to return (None - all)
         
     Returns:
         List of attachment models
@@ -1415,8 +2201,10 @@ def delete_attachment(db: Session, attachment_id: UUID) -> bool:
     """
     Delete attachment record from database.
     
-    Note: This does NOT delete the physical file. File deletion should be
-    handled separately by the calling code.
+    Releases the reference to the shared blob (ref_count - 1). Note: This
+    does NOT delete the physical file: the blob file is removed by
+    blobs.collect_unreferenced_blobs once no references are left, legacy
+    files (blob_id NULL) should be handled by the calling code.
     
     Args:
         db: Database session
@@ -1429,12 +2217,197 @@ def delete_attachment(db: Session, attachment_id: UUID) -> bool:
     if not db_attachment:
         return False
     
+    if db_attachment.blob_id:
+        release_attachment_blob(db, db_attachment.blob_id)
+    
     db.delete(db_attachment)
     db.commit()
     
     return True
 
 
+def acquire_attachment_blob(
+    db: Session,
+    sha256: str,
+    size_bytes: int,
+    file_path: str
+) -> models.AttachmentBlob:
+    """
+    Додає посилання на blob вмісту (створює рядок або ref_count + 1).
+    
+    INSERT ... ON CONFLICT DO UPDATE тримає блокування рядка до commit,
+    тому паралельне збирання сміття не видалить файл між перевіркою його
+    наявності та commit. Commit робить викликач (create_attachment).
+    
+    Args:
+        db: Database session
+        sha256: SHA-256 вмісту (hex)
+        size_bytes: Розмір файлу
+        file_path: Шлях blob'а відносно MEDIA_ROOT (для нового рядка)
+        
+    Returns:
+        AttachmentBlob model
+    """
+    from datetime import datetime
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    
+    stmt = pg_insert(models.AttachmentBlob).values(
+        id=sha256,
+        file_path=file_path,
+        size_bytes=size_bytes,
+        ref_count=1,
+        created_at=datetime.utcnow(),
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[models.AttachmentBlob.id],
+            set_={"ref_count": models.AttachmentBlob.ref_count + 1},
+        )
+    )
+    
+    return db.get(models.AttachmentBlob, sha256, populate_existing=True)
+
+
+def release_case_attachment_blobs(db: Session, case_id: UUID) -> int:
+    """
+    Відпускає посилання всіх вкладень звернення на blob'и (без commit).
+    
+    Рядки blob'ів спершу блокуються в порядку id (SHA-256), як у
+    blobs.store_blobs, тож видалення звернення не стає в deadlock з
+    паралельним upload'ом того самого вмісту.
+    
+    Args:
+        db: Database session
+        case_id: Case UUID
+        
+    Returns:
+        Number of blobs updated
+    """
+    from sqlalchemy import func, update
+    
+    refs = (
+        select(
+            models.Attachment.blob_id,
+            func.count().label("refs"),
+        )
+        .where(
+            models.Attachment.case_id == case_id,
+            models.Attachment.blob_id.isnot(None),
+        )
+        .group_by(models.Attachment.blob_id)
+        .subquery()
+    )
+    db.execute(
+        select(models.AttachmentBlob.id)
+        .where(models.AttachmentBlob.id.in_(select(refs.c.blob_id)))
+        .order_by(models.AttachmentBlob.id)
+        .with_for_update()
+    )
+    result = db.execute(
+        update(models.AttachmentBlob)
+        .where(models.AttachmentBlob.id == refs.c.blob_id)
+        .values(ref_count=models.AttachmentBlob.ref_count - refs.c.refs)
+    )
+    return result.rowcount
+
+
+def release_attachment_blob(db: Session, blob_id: str) -> None:
+    """
+    Знімає одне посилання на blob (ref_count - 1), без commit.
+    
+    Файл видаляє blobs.collect_unreferenced_blobs, коли посилань не лишилось.
+    
+    Args:
+        db: Database session
+        blob_id: AttachmentBlob.id (SHA-256 вмісту)
+    """
+    from sqlalchemy import update
+    
+    db.execute(
+        update(models.AttachmentBlob)
+        .where(models.AttachmentBlob.id == blob_id)
+        .values(ref_count=models.AttachmentBlob.ref_count - 1)
+    )
+
+
+def lock_unreferenced_blobs(
+    db: Session,
+    limit: int = 100,
+    blob_ids: Optional[list[str]] = None
+) -> list[models.AttachmentBlob]:
+    """
+    Вибирає blob'и без посилань (ref_count <= 0) з блокуванням рядків.
+    
+    FOR UPDATE SKIP LOCKED: blob, на який саме зараз додається посилання
+    (acquire_attachment_blob), пропускається - після його commit
+    ref_count вже буде > 0.
+    
+    Args:
+        db: Database session
+        limit: Максимальна кількість blob'ів
+        blob_ids: Перевірити лише ці blob'и
+        
+    Returns:
+        List of locked AttachmentBlob models
+    """
+    query = (
+        select(models.AttachmentBlob)
+        .where(models.AttachmentBlob.ref_count <= 0)
+        .order_by(models.AttachmentBlob.created_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    if blob_ids is not None:
+        query = query.where(models.AttachmentBlob.id.in_(blob_ids))
+    
+    return list(db.execute(query).scalars().all())
+
+
+def get_scrub_cursor(db: Session, name: str) -> Optional[str]:
+    """
+    Get the saved position of a scrub phase (None - start from the beginning).
+    
+    Args:
+        db: Database session
+        name: Phase name (attachments, storage)
+        
+    Returns:
+        Last processed attachment id / storage key or None
+    """
+    cursor = db.get(models.ScrubCursor, name)
+    return cursor.position if cursor else None
+
+
+def save_scrub_cursor(
+    db: Session,
+    name: str,
+    position: Optional[str],
+    completed: bool = False
+) -> None:
+    """
+    Save the position of a scrub phase and commit.
+    
+    position=None - the next run starts from the beginning.
+    
+    Args:
+        db: Database session
+        name: Phase name (attachments, storage)
+        position: Last processed attachment id / storage key
+        completed: A full pass has just finished (sets last_completed_at)
+    """
+    from datetime import datetime
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    
+    now = datetime.utcnow()
+    values = {"position": position, "updated_at": now}
+    if completed:
+        values["last_completed_at"] = now
+    
+    stmt = pg_insert(models.ScrubCursor).values(name=name, **values)
+    db.execute(stmt.on_conflict_do_update(index_elements=[models.ScrubCursor.name], set_=values))
+    db.commit()
+
+
 # ==================== Comment CRUD Operations ====================
 
 def get_case_comments(
@@ -1618,9 +2591,19 @@ def take_case(
     
     # Update case
     old_status = db_case.status
-    db_case.status = models.CaseStatus.IN_PROGRESS
+    set_case_status(db, db_case, models.CaseStatus.IN_PROGRESS)
     db_case.responsible_id = executor_id
     
+    # Нотифікація автору звернення
+    add_outbox_event(
+        db,
+        "app.celery_app.send_case_taken_notification",
+        case_id=str(db_case.id),
+        case_public_id=db_case.public_id,
+        executor_id=str(executor_id),
+        author_id=str(db_case.author_id),
+    )
+    
     db.commit()
     db.refresh(db_case)
     
@@ -1770,18 +2753,15 @@ def change_case_status(
     # Update case status (only if it actually changes)
     old_status = db_case.status
     if old_status != to_status:
-        db_case.status = to_status
-        db.commit()
-        db.refresh(db_case)
+        set_case_status(db, db_case, to_status)
         
-        # Create status history record
-        create_status_history(
-            db=db,
+        # Status history, comment and outbox event - in one commit with the status
+        db.add(models.StatusHistory(
             case_id=case_id,
             old_status=old_status,
             new_status=to_status,
             changed_by_id=executor_id
-        )
+        ))
     
     # Create comment (internal comment visible to executors/admin)
     db_comment = models.Comment(
@@ -1792,8 +2772,21 @@ def change_case_status(
     )
     
     db.add(db_comment)
+    
+    # Нотифікація автору звернення
+    add_outbox_event(
+        db,
+        "app.celery_app.send_case_status_changed_notification",
+        case_id=str(db_case.id),
+        case_public_id=db_case.public_id,
+        new_status=db_case.status.value,
+        executor_id=str(executor_id),
+        author_id=str(db_case.author_id),
+        comment=comment_text,
+    )
+    
     db.commit()
-    db.refresh(db_comment)
+    db.refresh(db_case)
     
     return db_case
 
@@ -1842,7 +2835,8 @@ def assign_case_executor(
     if executor_id is None:
         # Unassign: Clear responsible and set status to NEW
         db_case.responsible_id = None
-        db_case.status = models.CaseStatus.NEW
+        if old_status != models.CaseStatus.NEW:
+            set_case_status(db, db_case, models.CaseStatus.NEW)
         
         # Create status history if status changed
         if old_status != models.CaseStatus.NEW:
@@ -1875,7 +2869,7 @@ def assign_case_executor(
         
         # If case was NEW, change to IN_PROGRESS
         if db_case.status == models.CaseStatus.NEW:
-            db_case.status = models.CaseStatus.IN_PROGRESS
+            set_case_status(db, db_case, models.CaseStatus.IN_PROGRESS)
         
         # Create status history if status changed
         if old_status != db_case.status:
@@ -1925,6 +2919,26 @@ def create_comment(
     )
     
     db.add(db_comment)
+    db.flush()
+    
+    # Нотифікації учасникам звернення - через outbox, в одній транзакції з коментарем
+    db_case = get_case(db, case_id)
+    author = get_user(db, author_id)
+    add_outbox_event(
+        db,
+        "app.celery_app.send_comment_notification",
+        case_id=str(db_case.id),
+        case_public_id=db_case.public_id,
+        comment_id=str(db_comment.id),
+        comment_text=db_comment.text,
+        is_internal=db_comment.is_internal,
+        author_id=str(author_id),
+        author_name=author.full_name,
+        case_author_id=str(db_case.author_id),
+        responsible_id=str(db_case.responsible_id) if db_case.responsible_id else None,
+        category_id=str(db_case.category_id),
+    )
+    
     db.commit()
     db.refresh(db_comment)
     
@@ -2067,16 +3081,180 @@ def deactivate_user_with_check(
     db_user.is_active = False
     db.commit()
     db.refresh(db_user)
+    invalidate_notification_recipients()
     
     return True, None, None
 
 
-# ============================================================================
-# Notification Log CRUD
-# ============================================================================
+# ============================================================================
+# Notification Log CRUD
+# ============================================================================
+
+# Повторна відправка невдалих листів (beat retry scheduler):
+# затримка = base * 2^retry_count, але не більше max
+NOTIFICATION_RETRY_BASE_SECONDS = int(os.getenv("NOTIFICATION_RETRY_BASE_SECONDS", "60"))
+NOTIFICATION_RETRY_MAX_DELAY_SECONDS = int(os.getenv("NOTIFICATION_RETRY_MAX_DELAY_SECONDS", "3600"))
+# Оренда запису на час відправки: якщо worker впав, запис знову
+# стає доступним для retry після закінчення оренди
+NOTIFICATION_SEND_LEASE_SECONDS = int(os.getenv("NOTIFICATION_SEND_LEASE_SECONDS", "300"))
+
+
+def notification_retry_delay(retry_count: int) -> int:
+    """Exponential backoff (секунди) перед наступною спробою"""
+    return min(
+        NOTIFICATION_RETRY_BASE_SECONDS * (2 ** retry_count),
+        NOTIFICATION_RETRY_MAX_DELAY_SECONDS,
+    )
+
+
+def make_notification_body_id(body_text: Optional[str], body_html: Optional[str]) -> str:
+    """
+    Content hash тіла листа (id в notification_bodies).
+    
+    sha256 від text + U+001F + html; міграція рахує той самий хеш в SQL.
+    """
+    import hashlib
+    
+    content = f"{body_text or ''}\x1f{body_html or ''}"
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def save_notification_body(
+    db: Session,
+    body_text: Optional[str],
+    body_html: Optional[str]
+) -> Optional[str]:
+    """
+    Зберігає тіло листа один раз на унікальний контент (gzip).
+    
+    INSERT ... ON CONFLICT DO NOTHING; commit робить викликач.
+    
+    Args:
+        db: Database session
+        body_text: Текстова версія листа
+        body_html: HTML версія листа
+        
+    Returns:
+        body_id (sha256) або None, якщо тіла немає
+    """
+    from datetime import datetime
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    
+    if body_text is None and body_html is None:
+        return None
+    
+    body_id = make_notification_body_id(body_text, body_html)
+    db.execute(
+        pg_insert(models.NotificationBody)
+        .values(
+            id=body_id,
+            body_text_gz=models.NotificationBody.compress(body_text or ""),
+            body_html_gz=models.NotificationBody.compress(body_html),
+            created_at=datetime.utcnow(),
+        )
+        .on_conflict_do_nothing(index_elements=['id'])
+    )
+    return body_id
+
+
+def create_notification_log(
+    db: Session,
+    notification_type: models.NotificationType,
+    recipient_email: str,
+    subject: str,
+    body_text: Optional[str] = None,
+    body_html: Optional[str] = None,
+    recipient_user_id: Optional[UUID] = None,
+    related_case_id: Optional[UUID] = None,
+    related_entity_id: Optional[str] = None,
+    celery_task_id: Optional[str] = None,
+    body_params: Optional[dict] = None,
+) -> models.NotificationLog:
+    """
+    Створює запис в логу нотифікацій.
+    
+    Args:
+        db: Database session
+        notification_type: Тип нотифікації (NEW_CASE, CASE_TAKEN, etc.)
+        recipient_email: Email отримувача
+        subject: Тема листа
+        body_text: Текстова версія листа
+        body_html: HTML версія листа
+        recipient_user_id: UUID отримувача (якщо є)
+        related_case_id: UUID пов'язаного звернення
+        related_entity_id: ID іншої пов'язаної сутності
+        celery_task_id: ID Celery таски
+        body_params: Персональні поля отримувача, якщо body_text/body_html
+            відрендерені через render_shared_template (з маркерами)
+        
+    Returns:
+        Created notification log entry
+    """
+    import json
+    from datetime import datetime, timedelta
+    
+    # next_retry_at = оренда першої відправки: якщо таска не дійде до
+    # send_email, запис підхопить retry scheduler
+    notification = models.NotificationLog(
+        notification_type=notification_type,
+        recipient_email=recipient_email,
+        recipient_user_id=recipient_user_id,
+        related_case_id=related_case_id,
+        related_entity_id=related_entity_id,
+        subject=subject,
+        body_id=save_notification_body(db, body_text, body_html),
+        body_params=json.dumps(body_params, ensure_ascii=False) if body_params else None,
+        status=models.NotificationStatus.PENDING,
+        next_retry_at=datetime.utcnow() + timedelta(seconds=NOTIFICATION_SEND_LEASE_SECONDS),
+        celery_task_id=celery_task_id,
+    )
+    
+    db.add(notification)
+    db.commit()
+    db.refresh(notification)
+    
+    return notification
+
+
+def get_notification_log_by_dedup_key(
+    db: Session,
+    dedup_key: str
+) -> Optional[models.NotificationLog]:
+    """
+    Отримує запис логу нотифікацій за ключем ідемпотентності.
+    
+    Args:
+        db: Database session
+        dedup_key: Ключ (подія + отримувач), див. make_notification_dedup_key
+        
+    Returns:
+        Notification log or None if not found
+    """
+    return db.execute(
+        select(models.NotificationLog).where(
+            models.NotificationLog.dedup_key == dedup_key
+        )
+    ).scalar_one_or_none()
+
+
+def make_notification_dedup_key(
+    notification_type: models.NotificationType,
+    entity_id,
+    recipient_email: str
+) -> str:
+    """
+    Ключ ідемпотентності нотифікації: одна доставка на (подія, отримувач).
+    
+    Example:
+        make_notification_dedup_key(NotificationType.NEW_CASE, case_id, "a@b.c")
+        -> "NEW_CASE:<case_id>:a@b.c"
+    """
+    return f"{notification_type.value}:{entity_id}:{recipient_email.lower()}"
+
 
-def create_notification_log(
+def get_or_create_notification_log(
     db: Session,
+    dedup_key: str,
     notification_type: models.NotificationType,
     recipient_email: str,
     subject: str,
@@ -2086,43 +3264,57 @@ def create_notification_log(
     related_case_id: Optional[UUID] = None,
     related_entity_id: Optional[str] = None,
     celery_task_id: Optional[str] = None,
-) -> models.NotificationLog:
+    body_params: Optional[dict] = None,
+) -> tuple[models.NotificationLog, bool]:
     """
-    Створює запис в логу нотифікацій.
+    Створює запис в логу нотифікацій, якщо для dedup_key його ще немає.
+    
+    INSERT ... ON CONFLICT DO NOTHING: паралельні/повторні таски не
+    створюють дублікатів, а отримують вже існуючий запис.
     
     Args:
         db: Database session
-        notification_type: Тип нотифікації (NEW_CASE, CASE_TAKEN, etc.)
-        recipient_email: Email отримувача
-        subject: Тема листа
-        body_text: Текстова версія листа
-        body_html: HTML версія листа
-        recipient_user_id: UUID отримувача (якщо є)
-        related_case_id: UUID пов'язаного звернення
-        related_entity_id: ID іншої пов'язаної сутності
-        celery_task_id: ID Celery таски
+        dedup_key: Ключ ідемпотентності (див. make_notification_dedup_key)
+        Інші аргументи - як у create_notification_log
         
     Returns:
-        Created notification log entry
+        Tuple (notification log, created)
     """
-    notification = models.NotificationLog(
-        notification_type=notification_type,
-        recipient_email=recipient_email,
-        recipient_user_id=recipient_user_id,
-        related_case_id=related_case_id,
-        related_entity_id=related_entity_id,
-        subject=subject,
-        body_text=body_text,
-        body_html=body_html,
-        status=models.NotificationStatus.PENDING,
-        celery_task_id=celery_task_id,
-    )
-    
-    db.add(notification)
+    import json
+    import uuid
+    from datetime import datetime, timedelta
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    
+    body_id = save_notification_body(db, body_text, body_html)
+    now = datetime.utcnow()
+    
+    inserted_id = db.execute(
+        pg_insert(models.NotificationLog)
+        .values(
+            id=uuid.uuid4(),
+            dedup_key=dedup_key,
+            notification_type=notification_type,
+            recipient_email=recipient_email,
+            recipient_user_id=recipient_user_id,
+            related_case_id=related_case_id,
+            related_entity_id=related_entity_id,
+            subject=subject,
+            body_id=body_id,
+            body_params=json.dumps(body_params, ensure_ascii=False) if body_params else None,
+            status=models.NotificationStatus.PENDING,
+            retry_count=0,
+            max_retries=5,
+            created_at=now,
+            next_retry_at=now + timedelta(seconds=NOTIFICATION_SEND_LEASE_SECONDS),
+            celery_task_id=celery_task_id,
+        )
+        .on_conflict_do_nothing(index_elements=['dedup_key'])
+        .returning(models.NotificationLog.id)
+    ).scalar_one_or_none()
     db.commit()
-    db.refresh(notification)
     
-    return notification
+    notification = get_notification_log_by_dedup_key(db, dedup_key)
+    return notification, inserted_id is not None
 
 
 def update_notification_status(
@@ -2159,13 +3351,21 @@ def update_notification_status(
     if status == models.NotificationStatus.SENT:
         from datetime import datetime
         notification.sent_at = datetime.utcnow()
+        notification.next_retry_at = None
     elif status == models.NotificationStatus.FAILED:
-        from datetime import datetime
+        from datetime import datetime, timedelta
         notification.failed_at = datetime.utcnow()
         if error_message:
             notification.last_error = error_message
         if error_details:
             notification.error_details = error_details
+        # Наступна спроба - через backoff; після max_retries - остаточна помилка
+        if notification.retry_count < notification.max_retries:
+            notification.next_retry_at = notification.failed_at + timedelta(
+                seconds=notification_retry_delay(notification.retry_count)
+            )
+        else:
+            notification.next_retry_at = None
     elif status == models.NotificationStatus.RETRYING:
         notification.retry_count += 1
         if error_message:
@@ -2213,6 +3413,122 @@ def get_pending_notifications(
     return list(notifications)
 
 
+def _retry_claim_values(now) -> dict:
+    from datetime import timedelta
+    
+    return {
+        "status": models.NotificationStatus.RETRYING,
+        "retry_count": models.NotificationLog.retry_count + 1,
+        "next_retry_at": now + timedelta(seconds=NOTIFICATION_SEND_LEASE_SECONDS),
+    }
+
+
+def _retry_due_clause(now):
+    return (
+        models.NotificationLog.status != models.NotificationStatus.SENT,
+        models.NotificationLog.retry_count < models.NotificationLog.max_retries,
+        models.NotificationLog.next_retry_at <= now,
+    )
+
+
+def claim_due_notifications(
+    db: Session,
+    limit: int = 50,
+    now=None
+) -> list[models.NotificationLog]:
+    """
+    Забирає пачку нотифікацій, для яких настав next_retry_at.
+    
+    Один UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED):
+    записи переводяться в RETRYING, retry_count += 1, next_retry_at
+    зсувається на час оренди. Паралельні worker'и отримують різні записи
+    і не відправляють лист двічі; якщо worker впав, запис повертається
+    в чергу після закінчення оренди.
+    
+    Args:
+        db: Database session
+        limit: Розмір пачки
+        now: Поточний час (UTC), за замовчуванням datetime.utcnow()
+        
+    Returns:
+        Claimed notifications (status RETRYING)
+    """
+    from datetime import datetime
+    from sqlalchemy import update
+    
+    now = now or datetime.utcnow()
+    
+    due_ids = (
+        select(models.NotificationLog.id)
+        .where(*_retry_due_clause(now))
+        .order_by(models.NotificationLog.next_retry_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    
+    claimed_ids = db.execute(
+        update(models.NotificationLog)
+        .where(models.NotificationLog.id.in_(due_ids))
+        .values(**_retry_claim_values(now))
+        .returning(models.NotificationLog.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.commit()
+    
+    if not claimed_ids:
+        return []
+    
+    return list(db.execute(
+        select(models.NotificationLog)
+        .where(models.NotificationLog.id.in_(claimed_ids))
+        .order_by(models.NotificationLog.next_retry_at)
+        .execution_options(populate_existing=True)
+    ).scalars().all())
+
+
+def claim_notification(
+    db: Session,
+    notification_id: UUID,
+    now=None
+) -> Optional[models.NotificationLog]:
+    """
+    Забирає одну не відправлену нотифікацію для повторної відправки.
+    
+    Використовується при retry fan-out таски: запис забирається лише якщо
+    його не тримає інший worker і не запланований пізніший retry.
+    
+    Args:
+        db: Database session
+        notification_id: UUID нотифікації
+        now: Поточний час (UTC)
+        
+    Returns:
+        Claimed notification or None (SENT / зайнятий / retry ще не настав)
+    """
+    from datetime import datetime
+    from sqlalchemy import update
+    
+    now = now or datetime.utcnow()
+    
+    claimed_id = db.execute(
+        update(models.NotificationLog)
+        .where(models.NotificationLog.id == notification_id, *_retry_due_clause(now))
+        .values(**_retry_claim_values(now))
+        .returning(models.NotificationLog.id)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+    db.commit()
+    
+    if claimed_id is None:
+        return None
+    
+    return db.execute(
+        select(models.NotificationLog)
+        .where(models.NotificationLog.id == claimed_id)
+        .execution_options(populate_existing=True)
+    ).scalar_one()
+
+
 def get_notification_stats(db: Session) -> dict:
     """
     Отримує статистику по нотифікаціям.
@@ -2235,6 +3551,200 @@ def get_notification_stats(db: Session) -> dict:
     return stats
 
 
+# ==================== Notification Digest ====================
+
+def update_user_notification_settings(
+    db: Session,
+    user: models.User,
+    settings: schemas.NotificationSettingsUpdate
+) -> models.User:
+    """
+    Оновлює налаштування сповіщень користувача (digest mode).
+    
+    Args:
+        db: Database session
+        user: Користувач
+        settings: Нові налаштування
+        
+    Returns:
+        Updated user
+    """
+    user.email_digest_enabled = settings.email_digest_enabled
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def add_notification_digest_items(db: Session, items: list[dict]) -> int:
+    """
+    Буферизує події для користувачів у digest mode (один INSERT).
+    
+    Події з уже відомим event_key пропускаються (ON CONFLICT DO NOTHING).
+    
+    Args:
+        db: Database session
+        items: Словники з полями NotificationDigestItem
+            (user_id, notification_type, event_key, title, ...)
+        
+    Returns:
+        Кількість доданих подій
+    """
+    import uuid
+    from datetime import datetime
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    
+    if not items:
+        return 0
+    
+    now = datetime.utcnow()
+    inserted = db.execute(
+        pg_insert(models.NotificationDigestItem)
+        .values([
+            {"id": uuid.uuid4(), "created_at": now, **item}
+            for item in items
+        ])
+        .on_conflict_do_nothing(index_elements=['event_key'])
+        .returning(models.NotificationDigestItem.id)
+    ).scalars().all()
+    db.commit()
+    
+    return len(inserted)
+
+
+def get_digest_pending_user_ids(db: Session, limit: int = 500) -> list[UUID]:
+    """
+    Користувачі, для яких накопичились події дайджесту.
+    
+    Args:
+        db: Database session
+        limit: Максимальна кількість користувачів
+        
+    Returns:
+        List of user UUIDs
+    """
+    from sqlalchemy import func
+    
+    return list(db.execute(
+        select(models.NotificationDigestItem.user_id)
+        .group_by(models.NotificationDigestItem.user_id)
+        .order_by(func.min(models.NotificationDigestItem.created_at))
+        .limit(limit)
+    ).scalars().all())
+
+
+def get_notification_digest_items(
+    db: Session,
+    user_ids: list[UUID]
+) -> list[models.NotificationDigestItem]:
+    """
+    Всі накопичені події для списку користувачів одним запитом.
+    
+    Args:
+        db: Database session
+        user_ids: UUID користувачів
+        
+    Returns:
+        Items ordered by user and time (user loaded)
+    """
+    if not user_ids:
+        return []
+    
+    return list(db.execute(
+        select(models.NotificationDigestItem)
+        .options(joinedload(models.NotificationDigestItem.user))
+        .where(models.NotificationDigestItem.user_id.in_(user_ids))
+        .order_by(
+            models.NotificationDigestItem.user_id,
+            models.NotificationDigestItem.created_at,
+        )
+    ).scalars().all())
+
+
+def delete_notification_digest_items(db: Session, item_ids: list[UUID]) -> int:
+    """
+    Видаляє події, що вже потрапили в дайджест.
+    
+    Returns:
+        Кількість видалених записів
+    """
+    if not item_ids:
+        return 0
+    
+    result = db.execute(
+        delete(models.NotificationDigestItem).where(
+            models.NotificationDigestItem.id.in_(item_ids)
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+# ==================== Transactional Outbox ====================
+
+def add_outbox_event(db: Session, task_name: str, **kwargs) -> models.OutboxEvent:
+    """
+    Додає доменну подію в outbox (без commit).
+
+    Викликається перед commit зміни звернення/коментаря, тому подія
+    зберігається в тій самій транзакції. Публікацію в Celery виконує
+    relay (app/outbox.py), обробник запиту не чекає на брокер.
+
+    Args:
+        db: Database session
+        task_name: Ім'я Celery таски (наприклад, app.celery_app.send_comment_notification)
+        **kwargs: JSON-серіалізовані аргументи таски
+
+    Returns:
+        Outbox event (pending)
+    """
+    import json
+
+    event = models.OutboxEvent(task_name=task_name, payload=json.dumps(kwargs))
+    db.add(event)
+    return event
+
+
+def claim_pending_outbox_events(db: Session, limit: int = 100) -> list[models.OutboxEvent]:
+    """
+    Блокує пачку неопублікованих подій у порядку створення.
+
+    SELECT ... FOR UPDATE SKIP LOCKED: кілька relay-процесів отримують
+    різні події. Блокування тримається до commit, який робить викликач
+    після публікації (див. outbox.relay_outbox_batch).
+
+    Args:
+        db: Database session
+        limit: Розмір пачки
+
+    Returns:
+        Pending outbox events (locked)
+    """
+    return list(db.execute(
+        select(models.OutboxEvent)
+        .where(models.OutboxEvent.dispatched_at.is_(None))
+        .order_by(models.OutboxEvent.created_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).scalars().all())
+
+
+def delete_dispatched_outbox_events(db: Session, older_than) -> int:
+    """
+    Видаляє опубліковані події, старші за older_than (UTC).
+
+    Returns:
+        Кількість видалених записів
+    """
+    result = db.execute(
+        delete(models.OutboxEvent).where(
+            models.OutboxEvent.dispatched_at.isnot(None),
+            models.OutboxEvent.dispatched_at < older_than,
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
 # ==================== BE-301: Dashboard Analytics Functions ====================
 
 def get_dashboard_summary(
@@ -2385,51 +3895,75 @@ def get_status_distribution(
     }
 
 
-def get_overdue_cases(db: Session) -> dict:
+def get_overdue_cases(db: Session, skip: int = 0, limit: int = 50) -> dict:
     """
-    Отримує список прострочених звернень (>3 днів в статусі NEW).
+    Отримує сторінку прострочених звернень (SLA дедлайн due_at минув).
+    
+    Використовує той самий критерій, що й фільтр overdue у списках
+    звернень (overdue_case_clause). Запит - range scan по частковому
+    індексу ix_cases_due_at_open, days_overdue рахується в SQL.
     
     Args:
         db: Database session
+        skip: Number of records to skip
+        limit: Maximum number of records to return
         
     Returns:
-        Dictionary with overdue cases list
+        Dictionary with total count and overdue cases page
     """
-    from datetime import datetime, timedelta
+    from datetime import datetime
+    from sqlalchemy import func, extract
+    
+    now = datetime.utcnow()
+    overdue_filter = overdue_case_clause(now)
+    
+    total_overdue = db.execute(
+        select(func.count(models.Case.id)).where(overdue_filter)
+    ).scalar() or 0
     
-    # Дата 3 дні тому
-    three_days_ago = datetime.utcnow() - timedelta(days=3)
+    days_overdue = func.floor(
+        extract('epoch', now - models.Case.due_at) / 86400
+    ).label('days_overdue')
     
-    # Запит прострочених звернень
     query = (
-        select(models.Case)
-        .options(joinedload(models.Case.category))
-        .options(joinedload(models.Case.responsible))
-        .where(models.Case.status == models.CaseStatus.NEW)
-        .where(models.Case.created_at <= three_days_ago)
-        .order_by(models.Case.created_at.asc())
+        select(
+            models.Case.id,
+            models.Case.public_id,
+            models.Category.name.label('category_name'),
+            models.Case.applicant_name,
+            models.Case.created_at,
+            models.Case.due_at,
+            days_overdue,
+            models.Case.responsible_id,
+            models.User.full_name.label('responsible_name'),
+        )
+        .outerjoin(models.Category, models.Category.id == models.Case.category_id)
+        .outerjoin(models.User, models.User.id == models.Case.responsible_id)
+        .where(overdue_filter)
+        .order_by(models.Case.due_at.asc(), models.Case.id.asc())
+        .offset(skip)
+        .limit(limit)
     )
     
-    overdue_cases = db.execute(query).scalars().all()
-    
-    # Формуємо список
-    cases_list = []
-    for case in overdue_cases:
-        days_overdue = (datetime.utcnow() - case.created_at).days
-        
-        cases_list.append({
-            'id': str(case.id),
-            'public_id': case.public_id,
-            'category_name': case.category.name if case.category else 'Unknown',
-            'applicant_name': case.applicant_name,
-            'created_at': case.created_at,
-            'days_overdue': days_overdue,
-            'responsible_id': str(case.responsible_id) if case.responsible_id else None,
-            'responsible_name': case.responsible.full_name if case.responsible else None,
-        })
+    cases_list = [
+        {
+            'id': str(row.id),
+            'public_id': row.public_id,
+            'category_name': row.category_name or 'Unknown',
+            'applicant_name': row.applicant_name,
+            'created_at': row.created_at,
+            'due_at': row.due_at,
+            'days_overdue': int(row.days_overdue),
+            'responsible_id': str(row.responsible_id) if row.responsible_id else None,
+            'responsible_name': row.responsible_name,
+        }
+        for row in db.execute(query).all()
+    ]
     
     return {
-        'total_overdue': len(cases_list),
+        'total_overdue': total_overdue,
+        'skip': skip,
+        'limit': limit,
         'cases': cases_list
     }
 
@@ -2451,7 +3985,7 @@ def get_executors_efficiency(
         Dictionary with executors efficiency data
     """
     from sqlalchemy import func, and_
-    from datetime import datetime, timedelta
+    from datetime import datetime
     
     # Отримуємо всіх виконавців
     executors = db.execute(
@@ -2533,14 +4067,12 @@ def get_executors_efficiency(
             
             avg_completion_days = round(total_days / completed_in_period, 1) if completed_in_period > 0 else None
         
-        # Прострочені (>3 днів в NEW) з відповідальним = executor
-        three_days_ago = datetime.utcnow() - timedelta(days=3)
+        # Прострочені (SLA дедлайн минув) з відповідальним = executor
         overdue_count = db.execute(
             select(func.count(models.Case.id)).where(
                 and_(
                     models.Case.responsible_id == executor.id,
-                    models.Case.status == models.CaseStatus.NEW,
-                    models.Case.created_at <= three_days_ago
+                    overdue_case_clause()
                 )
             )
         ).scalar() or 0
@@ -2693,6 +4225,142 @@ def get_top_categories(
     }
 
 
+def get_resolution_time_stats(
+    db: Session,
+    group_by: str = "category",
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
+) -> dict:
+    """
+    Рахує перцентилі (p50/p90/p99) часу реакції та виконання звернень.
+    
+    Інтервали беруться з status_history:
+    - time_to_take: від створення звернення до першого переходу в IN_PROGRESS
+    - time_to_resolve: від створення звернення до (останнього) переходу в DONE
+    
+    Все рахується в SQL через percentile_cont, тому кілька "застарілих"
+    звернень не спотворюють результат так, як середнє значення.
+    Звернення без відповідної події (ще не взяті / не виконані) в перцентилі
+    відповідного інтервалу не потрапляють.
+    
+    Args:
+        db: Database session
+        group_by: Групування - "category", "channel" або "executor"
+        date_from: Початок періоду по даті створення звернення (ISO format)
+        date_to: Кінець періоду по даті створення звернення (ISO format)
+        
+    Returns:
+        Dictionary with percentile statistics per group (values in hours)
+        
+    Raises:
+        ValueError: якщо group_by невідомий або дата в невірному форматі
+    """
+    from sqlalchemy import func
+    from datetime import datetime
+    
+    group_columns = {
+        "category": (models.Case.category_id, models.Category, models.Category.name),
+        "channel": (models.Case.channel_id, models.Channel, models.Channel.name),
+        "executor": (models.Case.responsible_id, models.User, models.User.full_name),
+    }
+    if group_by not in group_columns:
+        raise ValueError(f"group_by must be one of: {', '.join(group_columns)}")
+    
+    group_column, name_model, name_column = group_columns[group_by]
+    
+    # Фільтр по даті створення звернення
+    base_filter = []
+    date_from_dt = None
+    date_to_dt = None
+    
+    if date_from:
+        date_from_dt = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
+        base_filter.append(models.Case.created_at >= date_from_dt)
+    
+    if date_to:
+        date_to_dt = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
+        # If time is not specified (00:00:00), set to end of day (23:59:59)
+        if date_to_dt.hour == 0 and date_to_dt.minute == 0 and date_to_dt.second == 0:
+            date_to_dt = date_to_dt.replace(hour=23, minute=59, second=59, microsecond=999999)
+        base_filter.append(models.Case.created_at <= date_to_dt)
+    
+    history = models.StatusHistory
+    
+    # Ключові події по кожному зверненню (index scan по case_id, changed_at)
+    per_case_query = select(
+        models.Case.id.label('case_id'),
+        group_column.label('group_id'),
+        models.Case.created_at.label('created_at'),
+        func.min(history.changed_at).filter(
+            history.new_status == models.CaseStatus.IN_PROGRESS
+        ).label('taken_at'),
+        func.max(history.changed_at).filter(
+            history.new_status == models.CaseStatus.DONE
+        ).label('done_at'),
+    ).join(
+        history, history.case_id == models.Case.id
+    ).group_by(models.Case.id)
+    
+    if base_filter:
+        per_case_query = per_case_query.where(*base_filter)
+    
+    per_case = per_case_query.subquery()
+    
+    # Інтервали в годинах
+    take_hours = func.extract('epoch', per_case.c.taken_at - per_case.c.created_at) / 3600.0
+    resolve_hours = func.extract('epoch', per_case.c.done_at - per_case.c.created_at) / 3600.0
+    
+    def percentiles(hours_expr, label: str) -> list:
+        return [
+            func.percentile_cont(fraction).within_group(hours_expr).label(f"{label}_p{int(fraction * 100)}")
+            for fraction in (0.5, 0.9, 0.99)
+        ]
+    
+    stats_query = select(
+        per_case.c.group_id,
+        name_column.label('group_name'),
+        func.count().label('total_cases'),
+        func.count(per_case.c.done_at).label('resolved_cases'),
+        *percentiles(take_hours, 'take'),
+        *percentiles(resolve_hours, 'resolve'),
+    ).select_from(per_case).outerjoin(
+        name_model, name_model.id == per_case.c.group_id
+    ).group_by(
+        per_case.c.group_id, name_column
+    ).order_by(
+        func.count().desc()
+    )
+    
+    def hours(value) -> Optional[float]:
+        return round(float(value), 2) if value is not None else None
+    
+    groups = []
+    for row in db.execute(stats_query).mappings():
+        groups.append({
+            'group_id': str(row['group_id']) if row['group_id'] else None,
+            'group_name': row['group_name'] or 'Unknown',
+            'total_cases': row['total_cases'],
+            'resolved_cases': row['resolved_cases'],
+            'time_to_take_hours': {
+                'p50': hours(row['take_p50']),
+                'p90': hours(row['take_p90']),
+                'p99': hours(row['take_p99']),
+            },
+            'time_to_resolve_hours': {
+                'p50': hours(row['resolve_p50']),
+                'p90': hours(row['resolve_p90']),
+                'p99': hours(row['resolve_p99']),
+            },
+        })
+    
+    return {
+        'group_by': group_by,
+        'period_start': date_from_dt,
+        'period_end': date_to_dt,
+        'groups': groups,
+    }
+
+
 def get_executor_cases(
     db: Session,
     executor_id: UUID,
@@ -2893,22 +4561,7 @@ def get_executor_cases(
     
     # Overdue filter
     if overdue is not None:
-        from datetime import timedelta
-        seven_days_ago = datetime.utcnow() - timedelta(days=7)
-        
-        if overdue:
-            query = query.where(
-                models.Case.created_at < seven_days_ago,
-                models.Case.status.in_([models.CaseStatus.NEW, models.CaseStatus.IN_PROGRESS])
-            )
-        else:
-            from sqlalchemy import or_ as or_clause
-            query = query.where(
-                or_clause(
-                    models.Case.created_at >= seven_days_ago,
-                    models.Case.status.in_([models.CaseStatus.DONE, models.CaseStatus.REJECTED])
-                )
-            )
+        query = query.where(overdue_case_clause() if overdue else not_overdue_case_clause())
     
     # Count query with same filters
     count_query = select(func.count()).select_from(models.Case).where(executor_filter)
@@ -2984,22 +4637,7 @@ def get_executor_cases(
     
     # Overdue filter for count
     if overdue is not None:
-        from datetime import timedelta
-        seven_days_ago = datetime.utcnow() - timedelta(days=7)
-        
-        if overdue:
-            count_query = count_query.where(
-                models.Case.created_at < seven_days_ago,
-                models.Case.status.in_([models.CaseStatus.NEW, models.CaseStatus.IN_PROGRESS])
-            )
-        else:
-            from sqlalchemy import or_ as or_clause
-            count_query = count_query.where(
-                or_clause(
-                    models.Case.created_at >= seven_days_ago,
-                    models.Case.status.in_([models.CaseStatus.DONE, models.CaseStatus.REJECTED])
-                )
-            )
+        count_query = count_query.where(overdue_case_clause() if overdue else not_overdue_case_clause())
     
     # Get total count
     total = db.execute(count_query).scalar()
@@ -3128,6 +4766,7 @@ def add_executor_category_access(
         # Refresh всі створені записи
         for record in created_records:
             db.refresh(record)
+        invalidate_notification_recipients()
     
     return created_records, error_messages
 
@@ -3160,6 +4799,7 @@ def remove_executor_category_access(
     
     db.delete(access)
     db.commit()
+    invalidate_notification_recipients()
     
     return True
 
@@ -3236,6 +4876,7 @@ def replace_executor_category_access(
     # Refresh всі створені записи
     for record in new_records:
         db.refresh(record)
+    invalidate_notification_recipients()
     
     return new_records, deleted_count
 
@@ -3,29 +3,51 @@ Email service для відправки нотифікацій через SMTP.
 
 BE-014: Повна реалізація SMTP з HTML шаблонами.
 Підтримує всі типи нотифікацій з красивими HTML шаблонами.
+
+Листи відправляються через пул постійних SMTP з'єднань (SMTPConnectionPool):
+TLS handshake та login виконуються один раз на з'єднання, а не на кожен лист.
+Пул створюється окремо в кожному процесі worker'а.
+
+Пачки листів (fan-out, retry) відправляються асинхронно через aiosmtplib
+(send_emails_concurrently): кілька SMTP сесій одночасно, результат
+окремо для кожного листа.
+
+Для розсилок одного листа багатьом отримувачам шаблон рендериться один раз
+(render_shared_template), а персональні поля підставляються окремо для
+кожного отримувача (SharedEmailRender.personalize).
 """
 
+import asyncio
 import os
+import time
 import logging
 import smtplib
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Optional
 from datetime import datetime
 from pathlib import Path
 from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import escape
 
 logger = logging.getLogger(__name__)
 
 # Шлях до шаблонів
 TEMPLATES_DIR = Path(__file__).parent / "templates" / "emails"
 
+# Скомпільовані шаблони кешуються в Environment на весь процес worker'а.
+# Без auto_reload get_template не перевіряє mtime файлу на кожен рендер
+# (шаблони вбудовані в образ і не змінюються під час роботи).
+EMAIL_TEMPLATES_AUTO_RELOAD = os.getenv("EMAIL_TEMPLATES_AUTO_RELOAD", "false").lower() == "true"
+
 # Jinja2 Environment
 jinja_env = Environment(
     loader=FileSystemLoader(TEMPLATES_DIR),
     autoescape=select_autoescape(['html', 'xml']),
     trim_blocks=True,
     lstrip_blocks=True,
+    auto_reload=EMAIL_TEMPLATES_AUTO_RELOAD,
 )
 
 # SMTP Configuration з .env
@@ -33,6 +55,8 @@ SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
 SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
 SMTP_USER = os.getenv("SMTP_USER", "")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+# false - relay без автентифікації (внутрішній MTA, локальний SMTP stand-in)
+SMTP_AUTH = os.getenv("SMTP_AUTH", "true").lower() == "true"
 SMTP_USE_TLS = os.getenv("SMTP_TLS", "true").lower() == "true"
 SMTP_USE_SSL = os.getenv("SMTP_SSL", "false").lower() == "true"
 SMTP_FROM_EMAIL = os.getenv("EMAILS_FROM_EMAIL", "noreply@ohmatdyt.com")
@@ -41,6 +65,264 @@ SMTP_FROM_NAME = os.getenv("EMAILS_FROM_NAME", "Ohmatdyt CRM")
 # URL CRM для посилань у листах
 CRM_URL = os.getenv("CRM_URL", "http://localhost:3000")
 
+# SMTP connection pool
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))
+SMTP_POOL_MAX_MESSAGES = int(os.getenv("SMTP_POOL_MAX_MESSAGES", "100"))  # Ліміт листів на з'єднання
+SMTP_POOL_MAX_IDLE_SECONDS = float(os.getenv("SMTP_POOL_MAX_IDLE_SECONDS", "30"))  # Після простою - перевірка NOOP
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+# Async доставка пачки листів однією таскою (send_emails_concurrently)
+SMTP_ASYNC_CONCURRENCY = int(os.getenv("SMTP_ASYNC_CONCURRENCY", "4"))  # Одночасних SMTP сесій
+
+
+class _PooledConnection:
+    """Authenticated SMTP session with usage counters"""
+
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """
+    Pool of persistent authenticated SMTP connections.
+    
+    - Reuses sessions across messages and Celery tasks of the same process
+    - At most max_size connections are open at the same time
+    - A connection is closed after max_messages_per_connection messages
+      (servers limit messages per session)
+    - A connection idle longer than max_idle_seconds is checked with NOOP
+      before reuse and replaced if the server has dropped it
+    - A send that fails with a connection-level error (disconnect, 421)
+      is retried once on a fresh connection
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str = "",
+        password: str = "",
+        use_tls: bool = True,
+        use_ssl: bool = False,
+        max_size: int = SMTP_POOL_SIZE,
+        max_messages_per_connection: int = SMTP_POOL_MAX_MESSAGES,
+        max_idle_seconds: float = SMTP_POOL_MAX_IDLE_SECONDS,
+        timeout: float = SMTP_TIMEOUT_SECONDS,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.use_ssl = use_ssl
+        self.max_size = max_size
+        self.max_messages_per_connection = max_messages_per_connection
+        self.max_idle_seconds = max_idle_seconds
+        self.timeout = timeout
+        
+        self._idle: list[_PooledConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._in_use = 0
+        self._metrics = {
+            "connections_opened": 0,
+            "connections_reused": 0,
+            "connections_closed": 0,
+            "stale_replaced": 0,
+            "messages_sent": 0,
+            "send_errors": 0,
+        }
+
+    def _count(self, metric: str) -> None:
+        with self._lock:
+            self._metrics[metric] += 1
+
+    def _connect(self) -> _PooledConnection:
+        """Open a new connection: TLS + login"""
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls and not self.use_ssl:
+                server.starttls()
+            if self.user:
+                server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        self._count("connections_opened")
+        return _PooledConnection(server)
+
+    def _close(self, conn: _PooledConnection) -> None:
+        try:
+            conn.server.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.server.close()
+        self._count("connections_closed")
+
+    @staticmethod
+    def _is_alive(conn: _PooledConnection) -> bool:
+        try:
+            return conn.server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    @staticmethod
+    def _is_connection_error(exc: Exception) -> bool:
+        """Errors after which the session is unusable and a retry makes sense"""
+        if isinstance(exc, (smtplib.SMTPServerDisconnected, OSError)):
+            return True
+        # 421: сервер закриває канал (в т.ч. через ліміт листів на сесію)
+        return isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code == 421
+
+    def _acquire(self) -> tuple[_PooledConnection, bool]:
+        """
+        Take an idle connection or open a new one.
+        
+        Returns:
+            Tuple (connection, is_fresh)
+        """
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    conn, fresh = self._connect(), True
+                    break
+                idle_for = time.monotonic() - conn.last_used
+                if idle_for > self.max_idle_seconds and not self._is_alive(conn):
+                    # Сервер закрив неактивну сесію - відкриваємо нову
+                    self._close(conn)
+                    self._count("stale_replaced")
+                    continue
+                self._count("connections_reused")
+                conn, fresh = conn, False
+                break
+        except Exception:
+            self._slots.release()
+            raise
+        
+        with self._lock:
+            self._in_use += 1
+        return conn, fresh
+
+    def _release(self, conn: _PooledConnection, reusable: bool) -> None:
+        with self._lock:
+            self._in_use -= 1
+        if reusable and conn.messages_sent < self.max_messages_per_connection:
+            conn.last_used = time.monotonic()
+            with self._lock:
+                self._idle.append(conn)
+        else:
+            self._close(conn)
+        self._slots.release()
+
+    def send_message(self, msg) -> None:
+        """
+        Send message through a pooled connection.
+        
+        Raises:
+            smtplib.SMTPException / OSError: If sending failed
+        """
+        while True:
+            conn, fresh = self._acquire()
+            try:
+                conn.server.send_message(msg)
+            except Exception as e:
+                self._release(conn, reusable=False)
+                self._count("send_errors")
+                # Повторюємо один раз, якщо впала вже використана сесія
+                if not fresh and self._is_connection_error(e):
+                    logger.info(f"SMTP session lost ({e}), retrying on a new connection")
+                    continue
+                raise
+            conn.messages_sent += 1
+            self._count("messages_sent")
+            self._release(conn, reusable=True)
+            return
+
+    def close(self) -> None:
+        """Close all idle connections"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._close(conn)
+
+    def stats(self) -> dict:
+        """Pool metrics (counters since pool creation + current state)"""
+        with self._lock:
+            return {
+                **self._metrics,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "max_size": self.max_size,
+            }
+
+
+_smtp_pool: Optional[SMTPConnectionPool] = None
+_smtp_pool_pid: Optional[int] = None
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """
+    Returns SMTP connection pool of the current process (lazy initialized).
+    
+    Celery prefork workers fork after import, so the pool is bound to the
+    PID: a child process never reuses sockets opened by its parent.
+    """
+    global _smtp_pool, _smtp_pool_pid
+    if _smtp_pool is None or _smtp_pool_pid != os.getpid():
+        _smtp_pool = SMTPConnectionPool(
+            host=SMTP_HOST,
+            port=SMTP_PORT,
+            user=SMTP_USER if SMTP_AUTH else "",
+            password=SMTP_PASSWORD,
+            use_tls=SMTP_USE_TLS,
+            use_ssl=SMTP_USE_SSL,
+        )
+        _smtp_pool_pid = os.getpid()
+    return _smtp_pool
+
+
+def close_smtp_pool() -> None:
+    """Close pooled connections of the current process (worker shutdown)"""
+    global _smtp_pool
+    if _smtp_pool is not None and _smtp_pool_pid == os.getpid():
+        logger.info(f"Closing SMTP pool: {_smtp_pool.stats()}")
+        _smtp_pool.close()
+    _smtp_pool = None
+
+
+def smtp_configured() -> bool:
+    """SMTP credentials are set (or the relay does not need them)"""
+    return not SMTP_AUTH or bool(SMTP_USER and SMTP_PASSWORD)
+
+
+def build_message(
+    to: str,
+    subject: str,
+    body_text: str,
+    body_html: Optional[str] = None,
+) -> MIMEMultipart:
+    """Build multipart/alternative email (text + optional HTML)"""
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = f"{SMTP_FROM_NAME} <{SMTP_FROM_EMAIL}>"
+    msg['To'] = to
+    msg['Date'] = datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S +0000')
+    
+    # Додаємо текстову частину
+    msg.attach(MIMEText(body_text, 'plain', 'utf-8'))
+    
+    # Додаємо HTML частину якщо є
+    if body_html:
+        msg.attach(MIMEText(body_html, 'html', 'utf-8'))
+    
+    return msg
+
 
 def send_email(
     to: str,
@@ -64,42 +346,17 @@ def send_email(
     """
     try:
         # Перевірка налаштувань SMTP
-        if not SMTP_USER or not SMTP_PASSWORD:
+        if not smtp_configured():
             logger.warning("SMTP credentials not configured. Email not sent.")
             logger.info(f"Would send email to {to}: {subject}")
             # У dev режимі логуємо замість відправки
             logger.debug(f"Body: {body_text[:200]}...")
             return False  # Не вважаємо помилкою - просто не налаштовано
         
-        # Створення повідомлення
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = f"{SMTP_FROM_NAME} <{SMTP_FROM_EMAIL}>"
-        msg['To'] = to
-        msg['Date'] = datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S +0000')
-        
-        # Додаємо текстову частину
-        part_text = MIMEText(body_text, 'plain', 'utf-8')
-        msg.attach(part_text)
-        
-        # Додаємо HTML частину якщо є
-        if body_html:
-            part_html = MIMEText(body_html, 'html', 'utf-8')
-            msg.attach(part_html)
-        
-        # Відправка через SMTP
-        if SMTP_USE_SSL:
-            # SSL з'єднання
-            with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT) as server:
-                server.login(SMTP_USER, SMTP_PASSWORD)
-                server.send_message(msg)
-        else:
-            # TLS з'єднання (default)
-            with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-                if SMTP_USE_TLS:
-                    server.starttls()
-                server.login(SMTP_USER, SMTP_PASSWORD)
-                server.send_message(msg)
+        msg = build_message(to, subject, body_text, body_html)
+        
+        # Відправка через пул постійних SMTP з'єднань
+        get_smtp_pool().send_message(msg)
         
         logger.info(f"✅ Email sent successfully to {to}: {subject}")
         if notification_log_id:
@@ -155,6 +412,312 @@ def send_bulk_email(
     return {"sent": sent_count, "failed": failed_count}
 
 
+class AsyncSMTPSender:
+    """
+    Concurrent SMTP delivery of message batches (aiosmtplib).
+    
+    - One task pushes a whole batch: up to max_sessions SMTP sessions send
+      at the same time, each taking the next message from a shared queue,
+      so a slow round trip only holds back its own session
+    - Sessions live on a background event loop of the process and are kept
+      between batches (same rotation / idle check / retry-once policy as
+      SMTPConnectionPool)
+    - A message refused by the server (e.g. 550 recipient) only fails
+      itself; the session is reset and reused
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str = "",
+        password: str = "",
+        use_tls: bool = True,
+        use_ssl: bool = False,
+        max_sessions: int = SMTP_ASYNC_CONCURRENCY,
+        max_messages_per_connection: int = SMTP_POOL_MAX_MESSAGES,
+        max_idle_seconds: float = SMTP_POOL_MAX_IDLE_SECONDS,
+        timeout: float = SMTP_TIMEOUT_SECONDS,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.use_ssl = use_ssl
+        self.max_sessions = max_sessions
+        self.max_messages_per_connection = max_messages_per_connection
+        self.max_idle_seconds = max_idle_seconds
+        self.timeout = timeout
+        
+        # Сесії та лічильники використовуються лише з потоку event loop
+        self._idle: list[_PooledConnection] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # Ліміт сесій на процес, навіть якщо пачки надсилають кілька потоків
+        self._session_slots = asyncio.Semaphore(max_sessions)
+        self._metrics = {
+            "connections_opened": 0,
+            "connections_reused": 0,
+            "connections_closed": 0,
+            "stale_replaced": 0,
+            "messages_sent": 0,
+            "send_errors": 0,
+        }
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="async-smtp", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    async def _connect(self) -> _PooledConnection:
+        """Open a new session: TLS + login"""
+        import aiosmtplib
+        
+        smtp = aiosmtplib.SMTP(
+            hostname=self.host,
+            port=self.port,
+            use_tls=self.use_ssl,
+            start_tls=self.use_tls and not self.use_ssl,
+            timeout=self.timeout,
+        )
+        await smtp.connect()
+        try:
+            if self.user:
+                await smtp.login(self.user, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self._metrics["connections_opened"] += 1
+        return _PooledConnection(smtp)
+
+    async def _close(self, conn: _PooledConnection, graceful: bool = True) -> None:
+        import aiosmtplib
+        
+        try:
+            if graceful:
+                await conn.server.quit()
+            else:
+                conn.server.close()
+        except (aiosmtplib.SMTPException, OSError):
+            conn.server.close()
+        self._metrics["connections_closed"] += 1
+
+    async def _acquire(self) -> tuple[_PooledConnection, bool]:
+        """
+        Take an idle session or open a new one.
+        
+        Returns:
+            Tuple (connection, is_fresh)
+        """
+        import aiosmtplib
+        
+        while self._idle:
+            conn = self._idle.pop()
+            if time.monotonic() - conn.last_used > self.max_idle_seconds:
+                try:
+                    alive = (await conn.server.noop()).code == 250
+                except (aiosmtplib.SMTPException, OSError):
+                    alive = False
+                if not alive:
+                    # Сервер закрив неактивну сесію - відкриваємо нову
+                    await self._close(conn, graceful=False)
+                    self._metrics["stale_replaced"] += 1
+                    continue
+            self._metrics["connections_reused"] += 1
+            return conn, False
+        return await self._connect(), True
+
+    async def _release(self, conn: _PooledConnection) -> None:
+        if conn.messages_sent < self.max_messages_per_connection:
+            conn.last_used = time.monotonic()
+            self._idle.append(conn)
+        else:
+            await self._close(conn)
+
+    @staticmethod
+    def _is_connection_error(exc: Exception) -> bool:
+        """Errors after which the session is unusable and a retry makes sense"""
+        import aiosmtplib
+        
+        if isinstance(exc, (aiosmtplib.SMTPServerDisconnected, OSError)):
+            return True
+        # 421: сервер закриває канал (в т.ч. через ліміт листів на сесію)
+        return isinstance(exc, aiosmtplib.SMTPResponseException) and exc.code == 421
+
+    async def _send_one(self, msg) -> Optional[str]:
+        """Send one message on a pooled session; returns error text or None"""
+        while True:
+            try:
+                conn, fresh = await self._acquire()
+            except Exception as e:
+                self._metrics["send_errors"] += 1
+                return str(e) or e.__class__.__name__
+            try:
+                await conn.server.send_message(msg)
+            except Exception as e:
+                self._metrics["send_errors"] += 1
+                if self._is_connection_error(e):
+                    await self._close(conn, graceful=False)
+                    # Повторюємо один раз, якщо впала вже використана сесія
+                    if not fresh:
+                        logger.info(f"SMTP session lost ({e}), retrying on a new connection")
+                        continue
+                else:
+                    # Відмова по конкретному листу - сесія придатна після RSET
+                    try:
+                        await conn.server.rset()
+                        await self._release(conn)
+                    except Exception:
+                        await self._close(conn, graceful=False)
+                return str(e) or e.__class__.__name__
+            conn.messages_sent += 1
+            self._metrics["messages_sent"] += 1
+            await self._release(conn)
+            return None
+
+    async def _send_batch(self, messages: list, concurrency: int) -> list[Optional[str]]:
+        results: list[Optional[str]] = [None] * len(messages)
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in enumerate(messages):
+            queue.put_nowait(item)
+        
+        async def session_worker():
+            async with self._session_slots:
+                while not queue.empty():
+                    index, msg = queue.get_nowait()
+                    results[index] = await self._send_one(msg)
+        
+        sessions = max(1, min(concurrency, self.max_sessions, len(messages)))
+        await asyncio.gather(*(session_worker() for _ in range(sessions)))
+        return results
+
+    def send_batch(self, messages: list, concurrency: Optional[int] = None) -> list[Optional[str]]:
+        """
+        Send messages concurrently (blocks until the whole batch is done).
+        
+        Args:
+            messages: email.message objects
+            concurrency: Max simultaneous sessions for this batch (<= max_sessions)
+            
+        Returns:
+            Per message, in order: None if sent, error text otherwise
+        """
+        if not messages:
+            return []
+        future = asyncio.run_coroutine_threadsafe(
+            self._send_batch(messages, concurrency or self.max_sessions),
+            self._ensure_loop(),
+        )
+        return future.result()
+
+    def close(self) -> None:
+        """Close idle sessions and stop the event loop"""
+        if self._loop is None:
+            return
+        
+        async def close_idle():
+            idle, self._idle = self._idle, []
+            for conn in idle:
+                await self._close(conn)
+        
+        asyncio.run_coroutine_threadsafe(close_idle(), self._loop).result(timeout=self.timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=self.timeout)
+        self._loop.close()
+        self._loop = None
+
+    def stats(self) -> dict:
+        """Sender metrics (counters since creation + current state)"""
+        return {
+            **self._metrics,
+            "idle": len(self._idle),
+            "max_sessions": self.max_sessions,
+        }
+
+
+_async_sender: Optional[AsyncSMTPSender] = None
+_async_sender_pid: Optional[int] = None
+
+
+def get_async_smtp_sender() -> AsyncSMTPSender:
+    """
+    Returns async SMTP sender of the current process (lazy initialized).
+    
+    Bound to the PID like get_smtp_pool: a forked worker child never
+    reuses the event loop thread or sessions of its parent.
+    """
+    global _async_sender, _async_sender_pid
+    if _async_sender is None or _async_sender_pid != os.getpid():
+        _async_sender = AsyncSMTPSender(
+            host=SMTP_HOST,
+            port=SMTP_PORT,
+            user=SMTP_USER if SMTP_AUTH else "",
+            password=SMTP_PASSWORD,
+            use_tls=SMTP_USE_TLS,
+            use_ssl=SMTP_USE_SSL,
+        )
+        _async_sender_pid = os.getpid()
+    return _async_sender
+
+
+def close_async_smtp_sender() -> None:
+    """Close async SMTP sessions of the current process (worker shutdown)"""
+    global _async_sender
+    if _async_sender is not None and _async_sender_pid == os.getpid():
+        logger.info(f"Closing async SMTP sender: {_async_sender.stats()}")
+        _async_sender.close()
+    _async_sender = None
+
+
+def send_emails_concurrently(
+    emails: list[dict],
+    concurrency: Optional[int] = None,
+) -> list[Optional[str]]:
+    """
+    Відправляє пачку листів паралельно (AsyncSMTPSender).
+    
+    Одна таска відправляє всю пачку через кілька SMTP сесій одночасно,
+    замість очікування мережевих round trip'ів кожного листа по черзі.
+    
+    Args:
+        emails: Листи - dict з ключами to, subject, body_text, body_html
+        concurrency: Максимум одночасних SMTP сесій (за замовчуванням
+            SMTP_ASYNC_CONCURRENCY)
+        
+    Returns:
+        Результат для кожного листа (в тому ж порядку):
+        None якщо відправлено, текст помилки якщо ні
+    """
+    if not emails:
+        return []
+    
+    if not smtp_configured():
+        logger.warning(f"SMTP credentials not configured. {len(emails)} email(s) not sent.")
+        return ["SMTP not configured"] * len(emails)
+    
+    messages = [
+        build_message(email["to"], email["subject"], email["body_text"], email.get("body_html"))
+        for email in emails
+    ]
+    
+    try:
+        results = get_async_smtp_sender().send_batch(messages, concurrency)
+    except Exception as e:
+        logger.error(f"❌ Async SMTP batch failed: {e}")
+        return [str(e)] * len(emails)
+    
+    failed = sum(1 for error in results if error is not None)
+    logger.info(f"Async SMTP batch: {len(results) - failed} sent, {failed} failed")
+    return results
+
+
 def render_template(template_name: str, context: dict) -> tuple[str, str]:
     """
     Рендерить email template (text та HTML версії).
@@ -189,6 +752,68 @@ def render_template(template_name: str, context: dict) -> tuple[str, str]:
         return text, html
 
 
+class SharedEmailRender:
+    """
+    Один раз відрендерений лист з маркерами персональних полів.
+
+    Маркери мають вигляд @@name@@ і переживають HTML autoescape без змін,
+    тому personalize лише замінює їх у готовому тексті.
+    """
+
+    def __init__(self, text_body: str, html_body: str, personal_fields: tuple[str, ...]):
+        self.text_body = text_body
+        self.html_body = html_body
+        self.personal_fields = personal_fields
+
+    @staticmethod
+    def marker(field: str) -> str:
+        return f"@@{field}@@"
+
+    def personalize(self, **values) -> tuple[str, str]:
+        """
+        Підставляє персональні значення отримувача.
+
+        Args:
+            **values: Значення персональних полів (наприклад, executor_name)
+
+        Returns:
+            Tuple (text_body, html_body)
+        """
+        text_body, html_body = self.text_body, self.html_body
+        for field in self.personal_fields:
+            value = str(values.get(field, ""))
+            text_body = text_body.replace(self.marker(field), value)
+            html_body = html_body.replace(self.marker(field), str(escape(value)))
+        return text_body, html_body
+
+
+def render_shared_template(
+    template_name: str,
+    context: dict,
+    personal_fields: tuple[str, ...] = ()
+) -> SharedEmailRender:
+    """
+    Рендерить спільну частину листа один раз для всіх отримувачів події.
+
+    Персональні поля рендеряться як маркери; значення для конкретного
+    отримувача підставляє SharedEmailRender.personalize.
+
+    Args:
+        template_name: Назва шаблону (наприклад, "new_case")
+        context: Спільні дані події
+        personal_fields: Поля контексту, що відрізняються між отримувачами
+
+    Returns:
+        SharedEmailRender
+    """
+    shared_context = dict(context)
+    for field in personal_fields:
+        shared_context[field] = SharedEmailRender.marker(field)
+
+    text_body, html_body = render_template(template_name, shared_context)
+    return SharedEmailRender(text_body, html_body, tuple(personal_fields))
+
+
 def _generate_text_version(template_name: str, context: dict) -> str:
     """
     Генерує текстову версію email на основі типу шаблону.
@@ -350,6 +975,24 @@ Email: {email}
 Посилання: {crm_url}/cases/{case_public_id}
 
 ---
+© {current_year} Національна дитяча спеціалізована лікарня "ОХМАТДИТ"
+""",
+
+        "digest": """
+🏥 Ohmatdyt CRM - Дайджест сповіщень
+
+Вітаємо, {recipient_name}!
+
+За період {period_start} – {period_end} у системі відбулося подій: {items_count}.
+
+{items_text}
+{hidden_line}
+
+Посилання: {crm_url}/cases
+
+---
+Ви отримуєте зведений лист, бо увімкнули режим дайджесту.
+
 © {current_year} Національна дитяча спеціалізована лікарня "ОХМАТДИТ"
 """,
 
@@ -398,6 +1041,12 @@ Email: {email}
     text_context['reason_section'] = f"ПРИЧИНА ПЕРЕДАЧІ:\n{context.get('reassignment_reason', '')}\n" if context.get('reassignment_reason') else ""
     text_context['overdue_line'] = f"⏱️ Прострочено на {context.get('days_overdue', 0)} днів" if context.get('days_overdue', 0) > 0 else ""
     text_context['comment_type'] = "🔒 Внутрішній" if context.get('is_internal') else "👁️ Публічний"
+    text_context['items_text'] = "\n".join(
+        f"- {item['type_display']} · {item['created_at']}: "
+        f"{'#' + str(item['case_public_id']) + ' ' if item.get('case_public_id') else ''}{item['title']}"
+        for item in context.get('items', [])
+    )
+    text_context['hidden_line'] = f"…та ще {context.get('hidden_count')} подій." if context.get('hidden_count') else ""
     
     try:
         return template.format(**text_context).strip()
@@ -12,7 +12,7 @@ from sqlalchemy.orm import Session
 from app import crud, schemas, models
 from app.database import get_db, check_db_connection, check_redis_connection
 from app.dependencies import get_current_user, require_admin, get_current_active_user
-from app.routers import auth, categories, channels, attachments, cases, comments, users, dashboard
+from app.routers import auth, categories, channels, attachments, cases, comments, users, dashboard, sla_policies
 from app.middleware import RequestTrackingMiddleware
 from app.utils.logging_config import setup_logging, get_logger
 
@@ -113,6 +113,7 @@ app.include_router(cases.router)
 app.include_router(comments.router)
 app.include_router(users.router, prefix="/api")  # User management (ADMIN)
 app.include_router(dashboard.router)  # BE-301: Dashboard analytics (ADMIN)
+app.include_router(sla_policies.router)  # SLA targets per category/status (ADMIN)
 
 
 # BE-015: Application lifecycle events
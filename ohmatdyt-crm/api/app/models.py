@@ -2,11 +2,13 @@
 Database models for Ohmatdyt CRM
 """
 import enum
+import gzip
+import json
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, Enum as SQLEnum, Integer, Text, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, Enum as SQLEnum, Integer, Text, ForeignKey, Index, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 import uuid
 
 Base = declarative_base()
@@ -46,6 +48,8 @@ class User(Base):
     password_hash = Column(String(255), nullable=False)
     role = Column(SQLEnum(UserRole), nullable=False, default=UserRole.OPERATOR, index=True)
     is_active = Column(Boolean, default=True, nullable=False, index=True)
+    # Digest mode: нотифікації накопичуються і надсилаються одним листом за вікно
+    email_digest_enabled = Column(Boolean, default=False, server_default="false", nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -164,6 +168,9 @@ class Case(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
+    # SLA: крайній термін обробки в поточному статусі (NULL для закритих / NEEDS_INFO)
+    due_at = Column(DateTime, nullable=True)
+    
     # Relationships
     category = relationship("Category", foreign_keys=[category_id])
     channel = relationship("Channel", foreign_keys=[channel_id])
@@ -173,6 +180,11 @@ class Case(Base):
     comments = relationship("Comment", back_populates="case", cascade="all, delete-orphan")
     status_history = relationship("StatusHistory", back_populates="case", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Часткий індекс: лише відкриті звернення з дедлайном (прострочені = range scan)
+        Index("ix_cases_due_at_open", "due_at", postgresql_where=due_at.isnot(None)),
+    )
+
     def __repr__(self):
         return f"<Case(public_id={self.public_id}, status={self.status.value}, category={self.category_id})>"
 
@@ -193,9 +205,52 @@ class Case(Base):
             "responsible_id": str(self.responsible_id) if self.responsible_id else None,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "due_at": self.due_at.isoformat() if self.due_at else None,
         }
 
 
+class CaseSubmissionStatus(str, enum.Enum):
+    """Asynchronous case submission status enumeration"""
+    PENDING = "PENDING"          # Files staged, waiting for the worker
+    PROCESSING = "PROCESSING"    # Worker is creating the case
+    COMPLETED = "COMPLETED"      # Case created (case_id)
+    FAILED = "FAILED"            # Case was not created (error)
+
+
+class CaseSubmission(Base):
+    """
+    Asynchronous case submission (POST /api/cases/submissions)
+
+    API перевіряє форму, кладе файли у staging сховища і відповідає 202;
+    звернення з вкладеннями створює Celery-таска (app/submissions.py).
+    payload - JSON з полями CaseCreate та метаданими staged-файлів.
+    """
+    __tablename__ = "case_submissions"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    author_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(SQLEnum(CaseSubmissionStatus), nullable=False, default=CaseSubmissionStatus.PENDING)
+    payload = Column(Text, nullable=False)
+    case_id = Column(UUID(as_uuid=True), ForeignKey("cases.id", ondelete="SET NULL"), nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    completed_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    case = relationship("Case", foreign_keys=[case_id])
+
+    @property
+    def data(self) -> dict:
+        return json.loads(self.payload)
+
+    def __repr__(self):
+        return f"<CaseSubmission(id={self.id}, status={self.status.value}, case={self.case_id})>"
+
+
 class Attachment(Base):
     """
     Attachment model for case files
@@ -221,6 +276,9 @@ class Attachment(Base):
     original_name = Column(String(255), nullable=False)  # Original filename from upload
     size_bytes = Column(Integer, nullable=False)  # File size in bytes
     mime_type = Column(String(100), nullable=False)  # MIME type (e.g., application/pdf)
+    sha256 = Column(String(64), nullable=True)  # SHA-256 вмісту (hex), рахується під час upload'у
+    # Спільний файл вмісту; file_path дублює blob.file_path (NULL - старі файли в cases/)
+    blob_id = Column(String(64), ForeignKey("attachment_blobs.id", ondelete="RESTRICT"), nullable=True, index=True)
     
     # Upload metadata
     uploaded_by_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="RESTRICT"), nullable=False, index=True)
@@ -229,6 +287,7 @@ class Attachment(Base):
     # Relationships
     case = relationship("Case", back_populates="attachments")
     uploaded_by = relationship("User", foreign_keys=[uploaded_by_id])
+    blob = relationship("AttachmentBlob")
 
     def __repr__(self):
         return f"<Attachment(case_id={self.case_id}, original_name={self.original_name}, size={self.size_bytes})>"
@@ -242,11 +301,59 @@ class Attachment(Base):
             "original_name": self.original_name,
             "size_bytes": self.size_bytes,
             "mime_type": self.mime_type,
+            "sha256": self.sha256,
             "uploaded_by_id": str(self.uploaded_by_id),
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
 
 
+class AttachmentBlob(Base):
+    """
+    Content-addressed attachment file
+
+    Один файл на унікальний вміст: id = sha256 вмісту, файл лежить у
+    MEDIA_ROOT/blobs/ab/cd/<sha256>. Attachment-рядки посилаються на blob
+    (Attachment.blob_id), ref_count = кількість таких посилань. Файл
+    видаляється разом з рядком, коли зникає останнє посилання
+    (app/blobs.py).
+    """
+    __tablename__ = "attachment_blobs"
+
+    id = Column(String(64), primary_key=True)  # sha256 hex
+    file_path = Column(String(500), nullable=False)  # Relative path from MEDIA_ROOT
+    size_bytes = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # Кандидати на збирання сміття (після каскадного видалення звернень)
+        Index("ix_attachment_blobs_unreferenced", "created_at", postgresql_where=(ref_count <= 0)),
+    )
+
+    def __repr__(self):
+        return f"<AttachmentBlob(id={self.id}, refs={self.ref_count})>"
+
+
+class ScrubCursor(Base):
+    """
+    Resumable position of an attachment integrity scrub phase
+
+    Кожен запуск scrubber'а (app/scrubber.py) обробляє обмежену кількість
+    партій і зберігає, де зупинився: position - останній перевірений id
+    вкладення або ключ сховища. NULL - наступний прохід починається
+    спочатку.
+    """
+    __tablename__ = "scrub_cursors"
+
+    name = Column(String(50), primary_key=True)  # attachments, storage
+    position = Column(String(500), nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_completed_at = Column(DateTime, nullable=True)  # Кінець останнього повного проходу
+
+    def __repr__(self):
+        return f"<ScrubCursor(name={self.name}, position={self.position})>"
+
+
 class Comment(Base):
     """
     Comment model for case comments
@@ -316,6 +423,17 @@ class StatusHistory(Base):
     case = relationship("Case", back_populates="status_history")
     changed_by = relationship("User", foreign_keys=[changed_by_id])
 
+    __table_args__ = (
+        # Timeline of a single case: resolution-time analytics scan history
+        # per case ordered by time; new_status is included for index-only scans
+        Index(
+            "ix_status_history_case_id_changed_at",
+            "case_id",
+            "changed_at",
+            postgresql_include=["new_status"],
+        ),
+    )
+
     def __repr__(self):
         return f"<StatusHistory(case_id={self.case_id}, {self.old_status} -> {self.new_status})>"
 
@@ -346,6 +464,9 @@ class NotificationType(str, enum.Enum):
     STATUS_CHANGED = "STATUS_CHANGED"           # Case status changed
     NEW_COMMENT = "NEW_COMMENT"                 # Comment added
     TEMP_PASSWORD = "TEMP_PASSWORD"             # Temp password generated
+    CASE_REASSIGNED = "CASE_REASSIGNED"         # Case reassigned to another executor
+    CASE_ESCALATION = "CASE_ESCALATION"         # SLA deadline breached
+    DIGEST = "DIGEST"                           # Aggregated digest email
 
 
 class NotificationLog(Base):
@@ -370,8 +491,10 @@ class NotificationLog(Base):
     
     # Email content
     subject = Column(String(500), nullable=False)
-    body_text = Column(Text, nullable=True)  # Plain text version
-    body_html = Column(Text, nullable=True)  # HTML version
+    # Тіло листа зберігається один раз на унікальний контент (notification_bodies);
+    # персональні поля отримувача - JSON для SharedEmailRender.personalize
+    body_id = Column(String(64), ForeignKey("notification_bodies.id"), nullable=True, index=True)
+    body_params = deferred(Column(Text, nullable=True))
     
     # Delivery tracking
     status = Column(SQLEnum(NotificationStatus), nullable=False, default=NotificationStatus.PENDING, index=True)
@@ -391,13 +514,47 @@ class NotificationLog(Base):
     # Celery task tracking
     celery_task_id = Column(String(255), nullable=True, index=True)
     
+    # Ідемпотентність fan-out: один запис на (подія, отримувач),
+    # наприклад "NEW_CASE:{case_id}:{email}". Retry таски не дублює листи.
+    dedup_key = Column(String(255), nullable=True)
+    
     # Relationships
     recipient_user = relationship("User", foreign_keys=[recipient_user_id])
     related_case = relationship("Case", foreign_keys=[related_case_id])
+    body = relationship("NotificationBody")
+
+    __table_args__ = (
+        Index("ux_notification_logs_dedup_key", "dedup_key", unique=True),
+    )
 
     def __repr__(self):
         return f"<NotificationLog(type={self.notification_type.value}, to={self.recipient_email}, status={self.status.value})>"
 
+    def _personalized_body(self) -> tuple[str | None, str | None]:
+        from app.email_service import SharedEmailRender
+
+        if self.body is None:
+            return None, None
+        text_body, html_body = self.body.body_text, self.body.body_html
+        if not self.body_params:
+            return text_body, html_body
+
+        params = json.loads(self.body_params)
+        text_body, html_body = SharedEmailRender(
+            text_body, html_body or "", tuple(params)
+        ).personalize(**params)
+        return text_body, html_body if self.body.body_html is not None else None
+
+    @property
+    def body_text(self):
+        """Plain text version (loads notification body on access)"""
+        return self._personalized_body()[0]
+
+    @property
+    def body_html(self):
+        """HTML version (loads notification body on access)"""
+        return self._personalized_body()[1]
+
     def to_dict(self):
         """Convert notification log to dictionary"""
         return {
@@ -417,9 +574,102 @@ class NotificationLog(Base):
             "failed_at": self.failed_at.isoformat() if self.failed_at else None,
             "next_retry_at": self.next_retry_at.isoformat() if self.next_retry_at else None,
             "celery_task_id": self.celery_task_id,
+            "dedup_key": self.dedup_key,
         }
 
 
+class NotificationBody(Base):
+    """
+    Content-addressed notification body (gzip)
+
+    Один рядок на унікальний контент листа: id = sha256 тексту та HTML,
+    тому однакові листи fan-out'у зберігаються один раз і на них
+    посилаються записи notification_logs (NotificationLog.body_id).
+    """
+    __tablename__ = "notification_bodies"
+
+    id = Column(String(64), primary_key=True)  # sha256 hex
+    body_text_gz = deferred(Column(LargeBinary, nullable=False))
+    body_html_gz = deferred(Column(LargeBinary, nullable=True))
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<NotificationBody(id={self.id})>"
+
+    @staticmethod
+    def compress(value: str | None) -> bytes | None:
+        return gzip.compress(value.encode("utf-8")) if value is not None else None
+
+    @property
+    def body_text(self) -> str:
+        return gzip.decompress(self.body_text_gz).decode("utf-8")
+
+    @property
+    def body_html(self) -> str | None:
+        if self.body_html_gz is None:
+            return None
+        return gzip.decompress(self.body_html_gz).decode("utf-8")
+
+
+class NotificationDigestItem(Base):
+    """
+    Buffered notification event for a user in digest mode
+
+    Замість окремого листа подія зберігається тут і потрапляє в один
+    зведений лист за вікно (beat task flush_notification_digests).
+    Після формування дайджесту записи видаляються.
+    """
+    __tablename__ = "notification_digest_items"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    notification_type = Column(SQLEnum(NotificationType), nullable=False)
+    # Ключ події (як NotificationLog.dedup_key): retry таски не дублює записи
+    event_key = Column(String(255), nullable=False, unique=True)
+    related_case_id = Column(UUID(as_uuid=True), ForeignKey("cases.id", ondelete="CASCADE"), nullable=True)
+    case_public_id = Column(Integer, nullable=True)
+    title = Column(String(500), nullable=False)
+    details = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Relationships
+    user = relationship("User")
+
+    def __repr__(self):
+        return f"<NotificationDigestItem(user_id={self.user_id}, type={self.notification_type.value})>"
+
+
+class OutboxEvent(Base):
+    """
+    Transactional outbox: domain event waiting to be published to Celery
+
+    Записується в тій самій транзакції, що й зміна звернення/коментаря,
+    тому подія не губиться, якщо брокер недоступний. Relay (app/outbox.py)
+    публікує записи пачками і проставляє dispatched_at.
+    """
+    __tablename__ = "outbox_events"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    task_name = Column(String(255), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON kwargs таски
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    dispatched_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # Часткий індекс: relay читає лише неопубліковані події по черзі
+        Index("ix_outbox_events_pending", "created_at", postgresql_where=dispatched_at.is_(None)),
+    )
+
+    @property
+    def kwargs(self) -> dict:
+        return json.loads(self.payload)
+
+    def __repr__(self):
+        return f"<OutboxEvent(task={self.task_name}, dispatched_at={self.dispatched_at})>"
+
+
 class ExecutorCategoryAccess(Base):
     """
     BE-018: Executor category access model
@@ -471,3 +721,91 @@ class ExecutorCategoryAccess(Base):
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
+
+
+class SLAPolicy(Base):
+    """
+    SLA policy model: target processing time per category and status
+    
+    Defines how many hours a case may stay in a status before it is
+    overdue (cases.due_at = entered status + target_hours).
+    
+    Business Rules:
+    - category_id = NULL is the default policy for all categories
+    - A category-specific policy overrides the default one
+    - Statuses without a policy fall back to crud.CASE_SLA_HOURS
+    - Each (category, status) pair must be unique
+    """
+    __tablename__ = "sla_policies"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    
+    # Foreign keys (NULL = default policy)
+    category_id = Column(UUID(as_uuid=True), ForeignKey("categories.id", ondelete="CASCADE"), nullable=True, index=True)
+    
+    # Policy details
+    status = Column(SQLEnum(CaseStatus), nullable=False)
+    target_hours = Column(Integer, nullable=False)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    # Relationships
+    category = relationship("Category", foreign_keys=[category_id])
+
+    __table_args__ = (
+        # NULL category_id is not unique in a plain unique index, so the
+        # default policies get their own partial unique index
+        Index(
+            "ux_sla_policies_category_status",
+            "category_id",
+            "status",
+            unique=True,
+            postgresql_where=category_id.isnot(None),
+        ),
+        Index(
+            "ux_sla_policies_default_status",
+            "status",
+            unique=True,
+            postgresql_where=category_id.is_(None),
+        ),
+    )
+
+    def __repr__(self):
+        return f"<SLAPolicy(category_id={self.category_id}, status={self.status.value}, target_hours={self.target_hours})>"
+
+
+class CaseEscalation(Base):
+    """
+    Case escalation model: one record per breached SLA deadline
+    
+    Created by the beat task that scans cases.due_at. The unique
+    (case_id, due_at) pair makes escalation idempotent: a breach is
+    escalated only once, a new deadline (status change) can be escalated again.
+    """
+    __tablename__ = "case_escalations"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    
+    # Foreign keys
+    case_id = Column(UUID(as_uuid=True), ForeignKey("cases.id", ondelete="CASCADE"), nullable=False)
+    
+    # Breach details
+    status = Column(SQLEnum(CaseStatus), nullable=False)  # Статус на момент порушення
+    due_at = Column(DateTime, nullable=False)  # Порушений дедлайн
+    
+    # Notification tracking
+    escalated_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    notified_at = Column(DateTime, nullable=True)
+    recipients_count = Column(Integer, default=0, nullable=False)
+    
+    # Relationships
+    case = relationship("Case", foreign_keys=[case_id])
+
+    __table_args__ = (
+        Index("ux_case_escalations_case_id_due_at", "case_id", "due_at", unique=True),
+    )
+
+    def __repr__(self):
+        return f"<CaseEscalation(case_id={self.case_id}, due_at={self.due_at})>"
@@ -0,0 +1,128 @@
+"""
+Transactional outbox relay.
+
+Обробники запитів не викликають .delay(): доменні події записуються в
+outbox_events у тій самій транзакції, що й зміна даних
+(crud.add_outbox_event). Цей процес вибирає неопубліковані події
+пачками, публікує їх у Celery і позначає dispatched_at.
+
+Доставка at-least-once: якщо relay впав між публікацією та commit,
+подія буде опублікована ще раз. Таски нотифікацій ідемпотентні
+(dedup_key в notification_logs), тому повтор не дублює листи.
+
+Запуск (окремий сервіс docker-compose):
+    python -m app.outbox
+"""
+import logging
+import os
+import signal
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app import crud
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_INTERVAL_SECONDS = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", "1"))
+# Скільки зберігати опубліковані події (для діагностики), потім видаляються
+OUTBOX_RETENTION_HOURS = int(os.getenv("OUTBOX_RETENTION_HOURS", "24"))
+OUTBOX_CLEANUP_INTERVAL_SECONDS = 3600
+
+
+def relay_outbox_batch(db: Session, limit: int = OUTBOX_BATCH_SIZE) -> dict:
+    """
+    Publish one batch of pending outbox events to Celery.
+
+    Events are locked with FOR UPDATE SKIP LOCKED, so several relays can
+    run side by side. Publishing stops at the first broker error: the
+    failed event keeps dispatched_at NULL (attempts / last_error are
+    recorded) and is retried in order on the next poll.
+
+    Args:
+        db: Database session
+        limit: Batch size
+
+    Returns:
+        Dictionary with claimed / dispatched / failed counts
+    """
+    from app.celery_app import celery
+
+    events = crud.claim_pending_outbox_events(db, limit=limit)
+
+    dispatched = 0
+    failed = 0
+    for event in events:
+        try:
+            celery.send_task(event.task_name, kwargs=event.kwargs)
+        except Exception as e:
+            event.attempts += 1
+            event.last_error = str(e)
+            failed += 1
+            logger.warning(f"Outbox: failed to publish {event.task_name} ({event.id}): {e}")
+            break
+        event.dispatched_at = datetime.utcnow()
+        dispatched += 1
+
+    db.commit()
+
+    return {
+        "claimed": len(events),
+        "dispatched": dispatched,
+        "failed": failed,
+    }
+
+
+def run(poll_interval: float = OUTBOX_POLL_INTERVAL_SECONDS, batch_size: int = OUTBOX_BATCH_SIZE) -> None:
+    """
+    Relay loop: drain full batches back to back, sleep when idle or on error.
+
+    SIGTERM / SIGINT finish the current batch and stop the loop.
+    """
+    from app.database import SessionLocal
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info(f"Outbox relay started: batch={batch_size}, poll={poll_interval}s")
+    last_cleanup = 0.0
+
+    while not stopping:
+        db = SessionLocal()
+        try:
+            result = relay_outbox_batch(db, limit=batch_size)
+            if result["dispatched"]:
+                logger.info(f"Outbox: dispatched {result['dispatched']} events")
+
+            if time.monotonic() - last_cleanup > OUTBOX_CLEANUP_INTERVAL_SECONDS:
+                deleted = crud.delete_dispatched_outbox_events(
+                    db, older_than=datetime.utcnow() - timedelta(hours=OUTBOX_RETENTION_HOURS)
+                )
+                if deleted:
+                    logger.info(f"Outbox: deleted {deleted} dispatched events")
+                last_cleanup = time.monotonic()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Outbox relay error: {e}")
+            result = None
+        finally:
+            db.close()
+
+        # Повна пачка без помилок - одразу наступна, інакше чекаємо
+        if result is None or result["failed"] or result["claimed"] < batch_size:
+            time.sleep(poll_interval)
+
+    logger.info("Outbox relay stopped")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    run()
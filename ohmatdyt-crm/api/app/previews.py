@@ -0,0 +1,224 @@
+"""
+Thumbnails and first-page previews for image and PDF attachments.
+
+Генеруються Celery-таскою (celery_app.generate_attachment_previews),
+яку crud.create_attachment ставить через outbox, і лежать у сховищі
+(app/storage.py) поруч з оригіналом (utils.get_preview_path):
+    <file_path>.thumb.jpg    - мініатюра для списків
+    <file_path>.preview.jpg  - зображення / перша сторінка PDF
+Для content-addressed blob'ів прев'ю спільні для всіх вкладень з
+однаковим вмістом і видаляються разом з blob'ом.
+
+Прев'ю для вкладень, створених до цього пайплайна:
+    python -m app.previews backfill
+"""
+import argparse
+import logging
+import os
+import tempfile
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+from app import utils
+from app.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_MIME_TYPES = {"image/jpeg", "image/png", "application/pdf"}
+# Найдовша сторона в пікселях
+PREVIEW_SIZES = {
+    "thumb": int(os.getenv("PREVIEW_THUMB_SIZE", "256")),
+    "preview": int(os.getenv("PREVIEW_LARGE_SIZE", "1024")),
+}
+PREVIEW_JPEG_QUALITY = int(os.getenv("PREVIEW_JPEG_QUALITY", "80"))
+# Захист від decompression bomb (зображення 10MB може мати сотні мегапікселів)
+PREVIEW_MAX_PIXELS = int(os.getenv("PREVIEW_MAX_PIXELS", str(60_000_000)))
+PREVIEW_BACKFILL_BATCH_SIZE = int(os.getenv("PREVIEW_BACKFILL_BATCH_SIZE", "500"))
+
+
+def is_previewable(mime_type: Optional[str]) -> bool:
+    """Чи генеруються прев'ю для цього типу файлу"""
+    return mime_type in PREVIEW_MIME_TYPES
+
+
+def _load_image(path: str, mime_type: str, max_side: int):
+    """Decode the source at roughly max_side (JPEG draft mode / PDF render scale)"""
+    from PIL import Image, ImageOps
+
+    if mime_type == "application/pdf":
+        import pypdfium2
+
+        pdf = pypdfium2.PdfDocument(path)
+        try:
+            page = pdf[0]
+            width, height = page.get_size()
+            scale = min(max_side / max(width, height, 1), 4.0)
+            image = page.render(scale=scale).to_pil()
+            page.close()
+        finally:
+            pdf.close()
+        return image
+
+    Image.MAX_IMAGE_PIXELS = PREVIEW_MAX_PIXELS
+    image = Image.open(path)
+    # Pillow падає лише понад 2 * MAX_IMAGE_PIXELS (між 1x і 2x - тільки
+    # warning), тому розмір із заголовка перевіряється до декодування
+    if image.width * image.height > PREVIEW_MAX_PIXELS:
+        image.close()
+        raise Image.DecompressionBombError(
+            f"Image size ({image.width}x{image.height} pixels) exceeds limit of {PREVIEW_MAX_PIXELS} pixels"
+        )
+    # JPEG декодується одразу в зменшеному розмірі (1/2 - 1/8)
+    image.draft("RGB", (max_side, max_side))
+    return ImageOps.exif_transpose(image)
+
+
+def _to_rgb(image):
+    from PIL import Image
+
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def _save_jpeg(storage, image, key: str) -> None:
+    """Encode to a local temp file, then move it into storage"""
+    fd, tmp_path = tempfile.mkstemp(suffix=".jpg", dir=storage.get_upload_tmp_dir())
+    os.close(fd)
+    try:
+        image.save(tmp_path, "JPEG", quality=PREVIEW_JPEG_QUALITY, optimize=True)
+        storage.save_file(tmp_path, key)
+    finally:
+        utils.discard_upload(tmp_path)
+
+
+def render_previews(file_path: str, mime_type: str) -> list[str]:
+    """
+    Generate missing preview variants of an attachment file.
+
+    The source is decoded once at the largest size, smaller variants are
+    downscaled from it. Existing variants are kept (content never changes).
+    Non-local backends download the source to a temp file first.
+
+    Args:
+        file_path: Attachment storage key
+        mime_type: MIME type of the attachment
+
+    Returns:
+        Names of generated variants (empty if all exist or not previewable)
+
+    Raises:
+        FileNotFoundError: If the source file is missing
+        Exception: Decoder errors for corrupt files
+    """
+    if not is_previewable(mime_type):
+        return []
+
+    storage = get_storage()
+    # Старий шлях cases/{public_id}/ міг бути перенесений (shard-cases)
+    file_path, _ = storage.locate(file_path)
+    missing = [
+        variant for variant in PREVIEW_SIZES
+        if not storage.exists(utils.get_preview_path(file_path, variant))
+    ]
+    if not missing:
+        return []
+
+    source = storage.local_path(file_path)
+    fetched = None
+    if source is None:
+        source = fetched = storage.fetch_to_temp(file_path)
+    try:
+        image = _load_image(source, mime_type, max(PREVIEW_SIZES[variant] for variant in missing))
+        image = _to_rgb(image)
+    finally:
+        if fetched:
+            utils.discard_upload(fetched)
+
+    for variant in sorted(missing, key=PREVIEW_SIZES.get, reverse=True):
+        size = PREVIEW_SIZES[variant]
+        image.thumbnail((size, size))
+        _save_jpeg(storage, image, utils.get_preview_path(file_path, variant))
+
+    return missing
+
+
+def remove_previews(file_path: str) -> None:
+    """Remove all preview variants of a file"""
+    storage = get_storage()
+    for variant in PREVIEW_SIZES:
+        storage.delete(utils.get_preview_path(file_path, variant))
+
+
+def backfill_previews(db: Session, batch_size: int = PREVIEW_BACKFILL_BATCH_SIZE) -> int:
+    """
+    Queue preview generation for previewable attachments without a thumbnail.
+
+    Args:
+        db: Database session
+        batch_size: Attachments per query (keyset by id)
+
+    Returns:
+        Number of queued tasks
+    """
+    from app.celery_app import celery
+
+    storage = get_storage()
+    queued = 0
+    seen = set()
+    last_id = None
+
+    while True:
+        query = (
+            select(models.Attachment.id, models.Attachment.file_path)
+            .where(models.Attachment.mime_type.in_(PREVIEW_MIME_TYPES))
+            .order_by(models.Attachment.id)
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            query = query.where(models.Attachment.id > last_id)
+
+        rows = db.execute(query).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        for attachment_id, file_path in rows:
+            # Спільний blob - одна таска на файл
+            if file_path in seen:
+                continue
+            seen.add(file_path)
+            if storage.exists(utils.get_preview_path(file_path, "thumb")):
+                continue
+            celery.send_task(
+                "app.celery_app.generate_attachment_previews",
+                kwargs={"attachment_id": str(attachment_id)},
+            )
+            queued += 1
+
+    return queued
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Attachment previews maintenance")
+    parser.add_argument("command", choices=["backfill"], help="backfill: queue previews for attachments without them")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        print(f"queued={backfill_previews(db)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    main()
@@ -2,16 +2,18 @@
 Attachment API endpoints
 """
 import os
-import uuid as uuid_lib
 from typing import Optional
+from urllib.parse import quote
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request, Response, Query
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app import crud, schemas, models
+from app import crud, schemas, models, blobs, previews
 from app.database import get_db
 from app.dependencies import get_current_active_user, require_admin
+from app.storage import get_storage
 from app import utils
 
 router = APIRouter(
@@ -19,10 +21,29 @@ router = APIRouter(
     tags=["attachments"]
 )
 
+# X-Accel-Redirect: API лише перевіряє доступ, файл віддає nginx
+# з internal location (alias на MEDIA_ROOT), див. nginx/nginx.conf.
+# Лише для локального сховища (STORAGE_BACKEND=local)
+ATTACHMENT_DOWNLOAD_OFFLOAD = os.getenv("ATTACHMENT_DOWNLOAD_OFFLOAD", "false").lower() == "true"
+ATTACHMENT_ACCEL_PREFIX = os.getenv("ATTACHMENT_ACCEL_PREFIX", "/protected-media/")
+# Прев'ю незмінні (шлях прив'язаний до вмісту) - кешуються браузером надовго
+PREVIEW_CACHE_MAX_AGE = int(os.getenv("PREVIEW_CACHE_MAX_AGE", str(365 * 24 * 3600)))
+# S3: завантаження напряму зі сховища за presigned URL (307 redirect)
+S3_PRESIGNED_DOWNLOADS = os.getenv("S3_PRESIGNED_DOWNLOADS", "true").lower() == "true"
 
-def get_media_root() -> str:
-    """Get MEDIA_ROOT from environment or use default"""
-    return os.getenv("MEDIA_ROOT", "/var/app/media")
+
+def content_disposition(filename: str) -> str:
+    """Content-Disposition for a download (RFC 6266, non-ASCII names via filename*)"""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def _iter_stored_file(storage, file_path: str):
+    """Read a file from storage when the archive reaches it (legacy paths resolved)"""
+    key, _ = storage.locate(file_path)
+    yield from storage.open_read(key)
 
 
 @router.post("/cases/{case_id}/upload", response_model=schemas.AttachmentResponse, status_code=status.HTTP_201_CREATED)
@@ -38,7 +59,8 @@ async def upload_attachment(
     Allowed file types: pdf, doc, docx, xls, xlsx, jpg, jpeg, png
     Maximum file size: 10MB
     
-    Files are stored in: MEDIA_ROOT/cases/{case_public_id}/
+    Files are stored once per content under: blobs/ab/cd/{sha256}
+    (STORAGE_BACKEND - local MEDIA_ROOT or S3-compatible bucket)
     
     Requires authentication.
     """
@@ -59,19 +81,7 @@ async def upload_attachment(
             detail="Not authorized to upload attachments to this case"
         )
     
-    # Read file content to validate size
-    file_content = await file.read()
-    file_size = len(file_content)
-    
-    # Validate file size
-    is_valid_size, size_error = utils.validate_file_size(file_size)
-    if not is_valid_size:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=size_error
-        )
-    
-    # Validate file type
+    # Validate file type (before reading the content)
     content_type = file.content_type or "application/octet-stream"
     is_valid_type, type_error = utils.validate_file_type(file.filename, content_type)
     if not is_valid_type:
@@ -80,49 +90,51 @@ async def upload_attachment(
             detail=type_error
         )
     
-    # Sanitize filename and generate storage path
-    safe_filename = utils.sanitize_filename(file.filename)
+    storage = get_storage()
     
-    # Add UUID prefix to avoid name collisions
-    unique_filename = f"{uuid_lib.uuid4().hex[:8]}_{safe_filename}"
-    
-    # Get relative path for storage
-    relative_path = utils.get_file_storage_path(case.public_id, unique_filename)
-    
-    # Create full path
-    media_root = get_media_root()
-    full_path = os.path.join(media_root, relative_path)
-    
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    # Stream to a temp file: size limit + SHA-256 in one pass, constant memory
+    try:
+        temp_path, file_size, sha256 = await utils.stream_upload_to_temp(
+            file, storage.get_upload_tmp_dir()
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except OSError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save file: {str(e)}"
+        )
     
-    # Save file to disk
+    # Content-addressed storage: однаковий вміст зберігається один раз
     try:
-        with open(full_path, "wb") as f:
-            f.write(file_content)
+        blob = await run_in_threadpool(blobs.store_blob, db, temp_path, sha256, file_size)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to save file: {str(e)}"
         )
     
-    # Create database record
+    # Create database record (commits the blob reference as well)
     try:
         db_attachment = crud.create_attachment(
             db=db,
             case_id=case_id,
-            file_path=relative_path,
+            file_path=blob.file_path,
             original_name=file.filename,
             size_bytes=file_size,
             mime_type=content_type,
-            uploaded_by_id=current_user.id
+            uploaded_by_id=current_user.id,
+            sha256=sha256,
+            blob_id=blob.id
         )
         
         return db_attachment
     except ValueError as e:
-        # Clean up file if database record creation fails
-        if os.path.exists(full_path):
-            os.remove(full_path)
+        # Посилання без рядка вкладення знімається, новий blob-файл видаляється
+        await run_in_threadpool(blobs.release_blob, db, blob.id)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -182,15 +194,84 @@ async def list_case_attachments(
     }
 
 
+@router.get("/cases/{case_id}/archive")
+async def download_case_archive(
+    case_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """
+    Download all attachments of a case as one ZIP archive.
+    
+    The archive is streamed while it is built: constant memory, no temp
+    file. Images, PDF and Office Open XML files are stored as is, other
+    documents are deflated. Duplicate names get a " (2)" suffix.
+    
+    RBAC:
+    - OPERATOR: can download attachments from own cases
+    - EXECUTOR/ADMIN: can download all attachments
+    """
+    # Verify case exists
+    case = crud.get_case(db, case_id)
+    if not case:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Case with id '{case_id}' not found"
+        )
+    
+    # Check RBAC permissions
+    if current_user.role == models.UserRole.OPERATOR and case.author_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to download attachments for this case"
+        )
+    
+    attachments = crud.get_case_attachments(db, case_id, limit=None)
+    if not attachments:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Case has no attachments"
+        )
+    
+    storage = get_storage()
+    # Старіші першими - порядок завантаження; open_read - генератор,
+    # файл читається зі сховища лише під час передачі
+    entries = [
+        (att.original_name, att.size_bytes, att.created_at, _iter_stored_file(storage, att.file_path))
+        for att in reversed(attachments)
+    ]
+    archive_name = f"case_{case.public_id}_attachments.zip"
+    
+    # Повертаємо з'єднання в пул: не тримати його на час передачі архіву
+    db.close()
+    
+    return StreamingResponse(
+        utils.iter_zip_stream(entries),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": content_disposition(archive_name),
+            # nginx не буферизує відповідь у тимчасовий файл
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+
 @router.get("/{attachment_id}/download")
 async def download_attachment(
     attachment_id: UUID,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Download an attachment file.
     
+    Supports single byte ranges (Range / If-Range) for resumable downloads.
+    With ATTACHMENT_DOWNLOAD_OFFLOAD=true the API only authorizes the
+    request and nginx sends the file (X-Accel-Redirect), Range included.
+    With the S3 backend the client is redirected (307) to a short-lived
+    presigned URL unless S3_PRESIGNED_DOWNLOADS=false.
+    
     RBAC:
     - OPERATOR: can download attachments from own cases
     - EXECUTOR/ADMIN: can download all attachments
@@ -218,23 +299,156 @@ async def download_attachment(
             detail="Not authorized to download this attachment"
         )
     
-    # Get full file path
-    media_root = get_media_root()
-    full_path = os.path.join(media_root, attachment.file_path)
+    storage = get_storage()
+    
+    # Check if file exists (старий шлях cases/{public_id}/ - також після перенесення)
+    file_key, file_size = await run_in_threadpool(storage.locate, attachment.file_path)
+    if file_size is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found in storage"
+        )
+    
+    if S3_PRESIGNED_DOWNLOADS:
+        url = storage.presigned_url(file_key, attachment.original_name, attachment.mime_type)
+        if url:
+            db.close()
+            # Сховище віддає файл саме (Range, Content-Disposition у підписі)
+            return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    
+    full_path = storage.local_path(file_key)
+    
+    # Повертаємо з'єднання в пул: не тримати його на час передачі файлу
+    db.close()
+    
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": content_disposition(attachment.original_name),
+    }
+    if attachment.sha256:
+        # Вміст незмінний (content-addressed), sha256 - сильний валідатор
+        headers["ETag"] = f'"{attachment.sha256}"'
+    
+    if ATTACHMENT_DOWNLOAD_OFFLOAD and full_path:
+        # nginx віддає файл сам (sendfile, Range); Content-Type та
+        # Content-Disposition беруться з цієї відповіді
+        headers["X-Accel-Redirect"] = ATTACHMENT_ACCEL_PREFIX + quote(file_key)
+        return Response(media_type=attachment.mime_type, headers=headers)
+    
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range and if_range != headers.get("ETag"):
+        # Файл змінився з моменту першої частини - віддаємо цілим
+        range_header = None
+    
+    try:
+        byte_range = utils.parse_range_header(range_header, file_size)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail=str(e),
+            headers={"Content-Range": f"bytes */{file_size}"}
+        )
+    
+    if byte_range is None and full_path:
+        # Return file
+        return FileResponse(
+            path=full_path,
+            media_type=attachment.mime_type,
+            headers=headers
+        )
+    
+    if byte_range is None:
+        # Весь об'єкт потоком зі сховища
+        headers["Content-Length"] = str(file_size)
+        return StreamingResponse(
+            storage.open_read(file_key),
+            media_type=attachment.mime_type,
+            headers=headers
+        )
+    
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        storage.open_read(file_key, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=attachment.mime_type,
+        headers=headers
+    )
+
+
+@router.get("/{attachment_id}/thumbnail")
+async def get_attachment_thumbnail(
+    attachment_id: UUID,
+    request: Request,
+    variant: str = Query("thumb", pattern="^(thumb|preview)$", description="thumb - small thumbnail, preview - large first page"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """
+    Get a JPEG thumbnail / first-page preview of an image or PDF attachment.
+    
+    Previews are generated in the background after upload; 404 means the
+    preview is not ready yet or the file type has no preview. Responses
+    are cacheable for a long time (Cache-Control immutable, ETag).
+    
+    RBAC:
+    - OPERATOR: can view attachments from own cases
+    - EXECUTOR/ADMIN: can view all attachments
+    """
+    # Get attachment
+    attachment = crud.get_attachment(db, attachment_id)
+    if not attachment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Attachment with id '{attachment_id}' not found"
+        )
     
-    # Check if file exists
-    if not os.path.exists(full_path):
+    # Get associated case for permission check
+    case = crud.get_case(db, attachment.case_id)
+    if not case:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="File not found on disk"
+            detail="Associated case not found"
         )
     
-    # Return file
-    return FileResponse(
-        path=full_path,
-        filename=attachment.original_name,
-        media_type=attachment.mime_type
+    # Check RBAC permissions
+    if current_user.role == models.UserRole.OPERATOR and case.author_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view this attachment"
+        )
+    
+    storage = get_storage()
+    preview_path, preview_size = await run_in_threadpool(
+        storage.locate, utils.get_preview_path(attachment.file_path, variant)
     )
+    if preview_size is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Thumbnail not available"
+        )
+    
+    # Повертаємо з'єднання в пул: не тримати його на час передачі файлу
+    db.close()
+    
+    headers = {"Cache-Control": f"private, max-age={PREVIEW_CACHE_MAX_AGE}, immutable"}
+    if attachment.sha256:
+        headers["ETag"] = f'"{attachment.sha256}-{variant}"'
+        if request.headers.get("if-none-match") == headers["ETag"]:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    full_path = storage.local_path(preview_path)
+    if ATTACHMENT_DOWNLOAD_OFFLOAD and full_path:
+        headers["X-Accel-Redirect"] = ATTACHMENT_ACCEL_PREFIX + quote(preview_path)
+        return Response(media_type="image/jpeg", headers=headers)
+    
+    if full_path:
+        return FileResponse(path=full_path, media_type="image/jpeg", headers=headers)
+    
+    headers["Content-Length"] = str(preview_size)
+    return StreamingResponse(storage.open_read(preview_path), media_type="image/jpeg", headers=headers)
 
 
 @router.delete("/{attachment_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -280,17 +494,10 @@ async def delete_attachment(
             detail="Not authorized to delete this attachment"
         )
     
-    # Delete file from disk
-    media_root = get_media_root()
-    full_path = os.path.join(media_root, attachment.file_path)
-    if os.path.exists(full_path):
-        try:
-            os.remove(full_path)
-        except Exception as e:
-            # Log error but continue with database deletion
-            print(f"Warning: Failed to delete file {full_path}: {str(e)}")
+    blob_id = attachment.blob_id
+    file_path = attachment.file_path
     
-    # Delete database record
+    # Delete database record (releases the blob reference)
     deleted = crud.delete_attachment(db, attachment_id)
     if not deleted:
         raise HTTPException(
@@ -298,4 +505,25 @@ async def delete_attachment(
             detail="Attachment not found"
         )
     
+    if blob_id:
+        # Файл видаляється лише разом з останнім посиланням на blob
+        try:
+            await run_in_threadpool(blobs.collect_unreferenced_blobs, db, blob_ids=[blob_id])
+        except Exception as e:
+            # Record is already deleted, the blob is collected by the beat GC
+            db.rollback()
+            print(f"Warning: Failed to collect blob {blob_id}: {str(e)}")
+    else:
+        # Legacy file (before content-addressed storage)
+        def delete_legacy_file():
+            file_key, _ = get_storage().locate(file_path)
+            previews.remove_previews(file_key)
+            get_storage().delete(file_key)
+        
+        try:
+            await run_in_threadpool(delete_legacy_file)
+        except Exception as e:
+            # Log error, database record is already deleted
+            print(f"Warning: Failed to delete file {file_path}: {str(e)}")
+    
     return None
@@ -1,8 +1,7 @@
 """
 Case API endpoints with multipart support for file uploads
 """
-import os
-import uuid as uuid_lib
+import asyncio
 from typing import Optional, List
 from uuid import UUID
 from fastapi import (
@@ -12,13 +11,16 @@ from fastapi import (
     status, 
     UploadFile, 
     File, 
-    Form
+    Form,
+    Response
 )
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app import crud, schemas, models
+from app import crud, schemas, models, submissions
 from app.database import get_db
 from app.dependencies import get_current_active_user, require_admin
+from app.storage import get_storage
 from app import utils
 
 router = APIRouter(
@@ -27,11 +29,6 @@ router = APIRouter(
 )
 
 
-def get_media_root() -> str:
-    """Get MEDIA_ROOT from environment or use default"""
-    return os.getenv("MEDIA_ROOT", "/var/app/media")
-
-
 def build_case_response(case: models.Case, db: Session) -> schemas.CaseResponse:
     """
     Build CaseResponse with last_status_change_at calculated from status history.
@@ -66,6 +63,7 @@ def build_case_response(case: models.Case, db: Session) -> schemas.CaseResponse:
         responsible_id=str(case.responsible_id) if case.responsible_id else None,
         created_at=case.created_at,
         updated_at=case.updated_at,
+        due_at=case.due_at,
         last_status_change_at=last_status_change_at,
         # Add nested objects for frontend
         category=schemas.CategoryResponse(
@@ -95,6 +93,91 @@ def build_case_response(case: models.Case, db: Session) -> schemas.CaseResponse:
     )
 
 
+async def _receive_case_form(
+    files: List[UploadFile],
+    **fields
+) -> tuple[schemas.CaseCreate, list[dict]]:
+    """
+    Validate the case form and stream its files to upload temp files.
+    
+    Args:
+        files: Uploaded files (entries without a filename are ignored)
+        **fields: CaseCreate form fields
+        
+    Returns:
+        Tuple of (case schema, dicts with temp_path, size, sha256,
+        original_name, mime_type)
+        
+    Raises:
+        HTTPException: 400 for invalid files / fields, 500 if a file could
+            not be saved (temp files are removed)
+    """
+    # Validate file types first (before reading any content)
+    uploads = [file for file in files or [] if file.filename]
+    for file in uploads:
+        content_type = file.content_type or "application/octet-stream"
+        is_valid_type, type_error = utils.validate_file_type(file.filename, content_type)
+        if not is_valid_type:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"File '{file.filename}': {type_error}"
+            )
+    
+    # Stream all uploads to temp files concurrently
+    # (size limit + SHA-256 in one pass, constant memory per file)
+    tmp_dir = get_storage().get_upload_tmp_dir()
+    results = await asyncio.gather(
+        *(utils.stream_upload_to_temp(file, tmp_dir) for file in uploads),
+        return_exceptions=True
+    )
+    
+    validated_files = []
+    errors = []
+    for file, result in zip(uploads, results):
+        if isinstance(result, BaseException):
+            errors.append((file, result))
+            continue
+        temp_path, file_size, sha256 = result
+        validated_files.append({
+            'temp_path': temp_path,
+            'size': file_size,
+            'sha256': sha256,
+            'original_name': file.filename,
+            'mime_type': file.content_type or "application/octet-stream"
+        })
+    
+    def discard_validated_files():
+        for file_data in validated_files:
+            utils.discard_upload(file_data['temp_path'])
+    
+    if errors:
+        discard_validated_files()
+        file, error = errors[0]
+        if isinstance(error, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"File '{file.filename}': {str(error)}"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save file '{file.filename}': {str(error)}"
+        )
+    
+    try:
+        case_create = schemas.CaseCreate(
+            **fields,
+            responsible_id=None  # Will be assigned later
+        )
+    except ValueError as e:
+        discard_validated_files()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return case_create, validated_files
+
+
 @router.post("", response_model=schemas.CaseResponse, status_code=status.HTTP_201_CREATED)
 async def create_case_with_attachments(
     # Required fields
@@ -125,146 +208,47 @@ async def create_case_with_attachments(
     Files:
     - Allowed types: pdf, doc, docx, xls, xlsx, jpg, jpeg, png
     - Maximum size per file: 10MB
-    - Files are stored in: MEDIA_ROOT/cases/{public_id}/
+    - Files are stored once per content under: blobs/ab/cd/{sha256} (STORAGE_BACKEND)
+    - Files are written in parallel; case and attachments are created in one transaction
     
     Any authenticated user can create cases.
     After creation, triggers email notification to executors of the category.
     
     Returns created case with status=NEW and unique 6-digit public_id.
     """
-    # Validate file uploads (if any)
-    validated_files = []
-    if files:
-        for file in files:
-            # Skip empty files
-            if not file.filename:
-                continue
-                
-            # Read file content to validate size
-            file_content = await file.read()
-            file_size = len(file_content)
-            
-            # Reset file pointer for later use
-            await file.seek(0)
-            
-            # Validate file size
-            is_valid_size, size_error = utils.validate_file_size(file_size)
-            if not is_valid_size:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"File '{file.filename}': {size_error}"
-                )
-            
-            # Validate file type
-            content_type = file.content_type or "application/octet-stream"
-            is_valid_type, type_error = utils.validate_file_type(file.filename, content_type)
-            if not is_valid_type:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"File '{file.filename}': {type_error}"
-                )
-            
-            validated_files.append({
-                'file': file,
-                'content': file_content,
-                'size': file_size,
-                'mime_type': content_type
-            })
-    
-    # Create case using existing CRUD
+    case_create, validated_files = await _receive_case_form(
+        files,
+        category_id=category_id,
+        channel_id=channel_id,
+        subcategory=subcategory,
+        applicant_name=applicant_name,
+        applicant_phone=applicant_phone,
+        applicant_email=applicant_email,
+        summary=summary,
+    )
+    
+    def discard_validated_files():
+        for file_data in validated_files:
+            utils.discard_upload(file_data['temp_path'])
+    
+    # Case, files and attachment rows in one transaction; files are written
+    # to storage in parallel, all of it off the event loop
     try:
-        case_create = schemas.CaseCreate(
-            category_id=category_id,
-            channel_id=channel_id,
-            subcategory=subcategory,
-            applicant_name=applicant_name,
-            applicant_phone=applicant_phone,
-            applicant_email=applicant_email,
-            summary=summary,
-            responsible_id=None  # Will be assigned later
+        db_case, _ = await run_in_threadpool(
+            crud.create_case_with_attachments, db, case_create, current_user.id, validated_files
         )
-        
-        db_case = crud.create_case(db, case_create, current_user.id)
-        
     except ValueError as e:
+        discard_validated_files()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
-    
-    # Save and attach files to the case
-    attachment_responses = []
-    if validated_files:
-        media_root = get_media_root()
-        
-        for file_data in validated_files:
-            file = file_data['file']
-            file_content = file_data['content']
-            file_size = file_data['size']
-            mime_type = file_data['mime_type']
-            
-            # Sanitize filename and generate storage path
-            safe_filename = utils.sanitize_filename(file.filename)
-            
-            # Add UUID prefix to avoid name collisions
-            unique_filename = f"{uuid_lib.uuid4().hex[:8]}_{safe_filename}"
-            
-            # Get relative path for storage
-            relative_path = utils.get_file_storage_path(db_case.public_id, unique_filename)
-            
-            # Create full path
-            full_path = os.path.join(media_root, relative_path)
-            
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(full_path), exist_ok=True)
-            
-            # Save file to disk
-            try:
-                with open(full_path, "wb") as f:
-                    f.write(file_content)
-            except Exception as e:
-                # Rollback: delete case if file save fails
-                crud.delete_case(db, db_case.id)
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Failed to save file '{file.filename}': {str(e)}"
-                )
-            
-            # Create database record for attachment
-            try:
-                db_attachment = crud.create_attachment(
-                    db=db,
-                    case_id=db_case.id,
-                    file_path=relative_path,
-                    original_name=file.filename,
-                    size_bytes=file_size,
-                    mime_type=mime_type,
-                    uploaded_by_id=current_user.id
-                )
-                
-                attachment_responses.append(db_attachment)
-                
-            except ValueError as e:
-                # Clean up file if database record creation fails
-                if os.path.exists(full_path):
-                    os.remove(full_path)
-                # Continue with other files, but log error
-                print(f"Warning: Failed to create attachment record for '{file.filename}': {str(e)}")
-    
-    # Trigger email notification to executors (async via Celery)
-    try:
-        from app.celery_app import send_new_case_notification
-        
-        # Queue notification task
-        send_new_case_notification.delay(
-            case_id=str(db_case.id),
-            case_public_id=db_case.public_id,
-            category_id=str(db_case.category_id)
-        )
-        
     except Exception as e:
-        # Log error but don't fail the request
-        print(f"Warning: Failed to queue notification task: {str(e)}")
+        discard_validated_files()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save files: {str(e)}"
+        )
     
     # Return created case
     return schemas.CaseResponse(
@@ -281,10 +265,124 @@ async def create_case_with_attachments(
         author_id=str(db_case.author_id),
         responsible_id=str(db_case.responsible_id) if db_case.responsible_id else None,
         created_at=db_case.created_at,
-        updated_at=db_case.updated_at
+        updated_at=db_case.updated_at,
+        due_at=db_case.due_at
     )
 
 
+def build_submission_response(submission: models.CaseSubmission) -> schemas.CaseSubmissionResponse:
+    """
+    Build CaseSubmissionResponse (case public_id is loaded for COMPLETED).
+    
+    Args:
+        submission: CaseSubmission model instance
+        
+    Returns:
+        CaseSubmissionResponse
+    """
+    return schemas.CaseSubmissionResponse(
+        id=str(submission.id),
+        status=submission.status,
+        files_count=len(submission.data["files"]),
+        case_id=str(submission.case_id) if submission.case_id else None,
+        case_public_id=submission.case.public_id if submission.case else None,
+        error=submission.error,
+        created_at=submission.created_at,
+        completed_at=submission.completed_at
+    )
+
+
+@router.post(
+    "/submissions",
+    response_model=schemas.CaseSubmissionResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def submit_case_with_attachments(
+    response: Response,
+    # Required fields
+    category_id: str = Form(..., description="UUID of the category"),
+    channel_id: str = Form(..., description="UUID of the channel"),
+    applicant_name: str = Form(..., min_length=1, max_length=200, description="Name of the applicant"),
+    summary: str = Form(..., min_length=1, description="Case summary/description"),
+    
+    # Optional fields
+    subcategory: Optional[str] = Form(None, max_length=200, description="Optional subcategory"),
+    applicant_phone: Optional[str] = Form(None, max_length=50, description="Phone number of the applicant"),
+    applicant_email: Optional[str] = Form(None, description="Email of the applicant"),
+    
+    # File uploads
+    files: List[UploadFile] = File(default=[], description="Attachments (optional)"),
+    
+    # Dependencies
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """
+    Submit a case for asynchronous creation (for large attachment bundles).
+    
+    Accepts the same multipart/form-data as POST /api/cases. Files are
+    validated (type, size) and staged in storage, then the request returns
+    202 with the submission id; the case and its attachments are created
+    by a worker. Poll GET /api/cases/submissions/{id} (Location header)
+    until status is COMPLETED (case_id, case_public_id) or FAILED (error).
+    
+    Category / channel are checked by the worker: an inactive category
+    fails the submission instead of returning 400.
+    """
+    case_create, validated_files = await _receive_case_form(
+        files,
+        category_id=category_id,
+        channel_id=channel_id,
+        subcategory=subcategory,
+        applicant_name=applicant_name,
+        applicant_phone=applicant_phone,
+        applicant_email=applicant_email,
+        summary=summary,
+    )
+    
+    # Файли переносяться у staging, temp-файли прибираються при помилці
+    try:
+        submission = await run_in_threadpool(
+            submissions.submit_case, db, case_create, current_user.id, validated_files
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save files: {str(e)}"
+        )
+    
+    response.headers["Location"] = f"/api/cases/submissions/{submission.id}"
+    return build_submission_response(submission)
+
+
+@router.get("/submissions/{submission_id}", response_model=schemas.CaseSubmissionResponse)
+async def get_case_submission(
+    submission_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """
+    Get status of an asynchronous case submission.
+    
+    Statuses: PENDING -> PROCESSING -> COMPLETED (case_id) / FAILED (error).
+    Available to the submitting user and ADMIN.
+    """
+    submission = crud.get_case_submission(db, submission_id)
+    if not submission:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Submission not found"
+        )
+    
+    if submission.author_id != current_user.id and current_user.role != models.UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view this submission"
+        )
+    
+    return build_submission_response(submission)
+
+
 @router.get("/my", response_model=schemas.CaseListResponse)
 async def list_my_cases(
     skip: int = 0,
@@ -841,7 +939,7 @@ async def list_cases(
     - public_id: Filter by 6-digit public ID
     - date_from: Filter by created date from (ISO format: 2025-10-28T00:00:00)
     - date_to: Filter by created date to (ISO format: 2025-10-28T23:59:59)
-    - overdue: Filter overdue cases (true/false, based on 7-day threshold)
+    - overdue: Filter overdue cases (true/false, SLA deadline due_at has passed)
     - order_by: Sort field (prefix with - for descending)
                 Supported: created_at, updated_at, public_id, status
                 Examples: -created_at (newest first), created_at (oldest first)
@@ -999,20 +1097,6 @@ async def take_case_into_work(
                 detail=error_msg
             )
     
-    # Trigger email notification to case author
-    try:
-        from app.celery_app import send_case_taken_notification
-        
-        send_case_taken_notification.delay(
-            case_id=str(db_case.id),
-            case_public_id=db_case.public_id,
-            executor_id=str(current_user.id),
-            author_id=str(db_case.author_id)
-        )
-    except Exception as e:
-        # Log error but don't fail the request
-        print(f"Warning: Failed to queue case taken notification: {str(e)}")
-    
     return schemas.CaseResponse(
         id=str(db_case.id),
         public_id=db_case.public_id,
@@ -1027,7 +1111,8 @@ async def take_case_into_work(
         author_id=str(db_case.author_id),
         responsible_id=str(db_case.responsible_id) if db_case.responsible_id else None,
         created_at=db_case.created_at,
-        updated_at=db_case.updated_at
+        updated_at=db_case.updated_at,
+        due_at=db_case.due_at
     )
 
 
@@ -1103,22 +1188,6 @@ async def change_case_status(
                 detail=error_msg
             )
     
-    # Trigger email notification to case author (only if status actually changed)
-    try:
-        from app.celery_app import send_case_status_changed_notification
-        
-        send_case_status_changed_notification.delay(
-            case_id=str(db_case.id),
-            case_public_id=db_case.public_id,
-            new_status=db_case.status.value,
-            executor_id=str(current_user.id),
-            author_id=str(db_case.author_id),
-            comment=status_change.comment
-        )
-    except Exception as e:
-        # Log error but don't fail the request
-        print(f"Warning: Failed to queue status change notification: {str(e)}")
-    
     return schemas.CaseResponse(
         id=str(db_case.id),
         public_id=db_case.public_id,
@@ -1133,7 +1202,8 @@ async def change_case_status(
         author_id=str(db_case.author_id),
         responsible_id=str(db_case.responsible_id) if db_case.responsible_id else None,
         created_at=db_case.created_at,
-        updated_at=db_case.updated_at
+        updated_at=db_case.updated_at,
+        due_at=db_case.due_at
     )
 
 
@@ -1204,7 +1274,8 @@ async def assign_case_executor(
             author_id=str(db_case.author_id),
             responsible_id=str(db_case.responsible_id) if db_case.responsible_id else None,
             created_at=db_case.created_at,
-            updated_at=db_case.updated_at
+            updated_at=db_case.updated_at,
+            due_at=db_case.due_at
         )
     except ValueError as e:
         raise HTTPException(
@@ -1293,7 +1364,8 @@ async def update_case_fields(
             author_id=str(db_case.author_id),
             responsible_id=str(db_case.responsible_id) if db_case.responsible_id else None,
             created_at=db_case.created_at,
-            updated_at=db_case.updated_at
+            updated_at=db_case.updated_at,
+            due_at=db_case.due_at
         )
     except ValueError as e:
         raise HTTPException(
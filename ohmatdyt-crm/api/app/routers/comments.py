@@ -70,26 +70,6 @@ def create_comment_on_case(
         is_internal=comment.is_internal
     )
     
-    # Email нотифікації (async через Celery)
-    try:
-        from app.celery_app import send_comment_notification
-        
-        send_comment_notification.delay(
-            case_id=str(db_case.id),
-            case_public_id=db_case.public_id,
-            comment_id=str(db_comment.id),
-            comment_text=db_comment.text,
-            is_internal=db_comment.is_internal,
-            author_id=str(current_user.id),
-            author_name=current_user.full_name,
-            case_author_id=str(db_case.author_id),
-            responsible_id=str(db_case.responsible_id) if db_case.responsible_id else None,
-            category_id=str(db_case.category_id)
-        )
-    except Exception as e:
-        # Логування помилки, але не падаємо
-        print(f"Warning: Failed to queue comment notification: {str(e)}")
-    
     # Завантаження author для відповіді
     db.refresh(db_comment)
     
@@ -7,15 +7,22 @@ Provides statistics and aggregated data for admin dashboard:
 - Overdue cases list
 - Executors efficiency metrics
 - Top categories by case count
+- Resolution-time percentiles per category, channel or executor
 
 All endpoints are ADMIN-only (RBAC enforced).
+
+Aggregate endpoints are cached in Redis (see app.cache) per endpoint and
+normalized date range. Pass `refresh=true` to force recomputation.
 """
 
+from datetime import datetime
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app import crud, schemas, models
+from app import cache
 from app.database import get_db
 from app.dependencies import get_current_active_user
 
@@ -40,6 +47,53 @@ def require_admin(current_user: models.User = Depends(get_current_active_user))
     return current_user
 
 
+def normalize_period(
+    date_from: Optional[str],
+    date_to: Optional[str]
+) -> tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Приводить період до того вигляду, який використовують CRUD функції.
+    
+    - ISO формат, суфікс Z трактується як UTC
+    - date_to без часу (00:00:00) розширюється до кінця дня
+    
+    Використовується для побудови ключа кешу, щоб "2025-01-31" та
+    "2025-01-31T23:59:59.999999" потрапляли в один запис.
+    
+    Raises:
+        ValueError: якщо дата в невірному форматі
+    """
+    period_start = None
+    period_end = None
+    
+    if date_from:
+        period_start = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
+    
+    if date_to:
+        period_end = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
+        if period_end.hour == 0 and period_end.minute == 0 and period_end.second == 0:
+            period_end = period_end.replace(hour=23, minute=59, second=59, microsecond=999999)
+    
+    return period_start, period_end
+
+
+async def cached_aggregate(endpoint: str, compute, refresh: bool, **params):
+    """
+    Повертає результат агрегату з кешу або рахує його (single-flight).
+    
+    Виконується в threadpool, бо очікування на single-flight лок та
+    синхронні запити до БД не повинні блокувати event loop.
+    """
+    key = cache.make_cache_key(f"dashboard:{endpoint}", **params)
+    return await run_in_threadpool(
+        cache.get_or_compute,
+        key,
+        compute,
+        cache.DASHBOARD_CACHE_TTL_SECONDS,
+        refresh,
+    )
+
+
 @router.get("/summary", response_model=schemas.DashboardSummaryResponse)
 async def get_dashboard_summary(
     date_from: Optional[str] = Query(
@@ -50,6 +104,10 @@ async def get_dashboard_summary(
         None,
         description="End date for filtering (ISO format, e.g., 2025-12-31T23:59:59)"
     ),
+    refresh: bool = Query(
+        False,
+        description="Ignore cached value and recompute"
+    ),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(require_admin)
 ):
@@ -68,12 +126,17 @@ async def get_dashboard_summary(
     - `date_to`: Кінець періоду (необов'язково)
     
     Якщо період не вказано - рахує всі звернення в системі.
+    
+    Результат кешується на DASHBOARD_CACHE_TTL_SECONDS; `refresh=true` примусово перераховує.
     """
     try:
-        summary = crud.get_dashboard_summary(
-            db=db,
-            date_from=date_from,
-            date_to=date_to
+        period_start, period_end = normalize_period(date_from, date_to)
+        summary = await cached_aggregate(
+            "summary",
+            lambda: crud.get_dashboard_summary(db=db, date_from=date_from, date_to=date_to),
+            refresh,
+            date_from=period_start,
+            date_to=period_end,
         )
         return summary
     except ValueError as e:
@@ -98,6 +161,10 @@ async def get_status_distribution(
         None,
         description="End date for filtering (ISO format)"
     ),
+    refresh: bool = Query(
+        False,
+        description="Ignore cached value and recompute"
+    ),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(require_admin)
 ):
@@ -115,10 +182,13 @@ async def get_status_distribution(
     Дані ідеально підходять для pie chart (кругова діаграма) або bar chart.
     """
     try:
-        distribution = crud.get_status_distribution(
-            db=db,
-            date_from=date_from,
-            date_to=date_to
+        period_start, period_end = normalize_period(date_from, date_to)
+        distribution = await cached_aggregate(
+            "status-distribution",
+            lambda: crud.get_status_distribution(db=db, date_from=date_from, date_to=date_to),
+            refresh,
+            date_from=period_start,
+            date_to=period_end,
         )
         return distribution
     except ValueError as e:
@@ -135,34 +205,43 @@ async def get_status_distribution(
 
 @router.get("/overdue-cases", response_model=schemas.OverdueCasesResponse)
 async def get_overdue_cases(
+    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    limit: int = Query(50, ge=1, le=100, description="Maximum number of records to return"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(require_admin)
 ):
     """
-    Отримати список прострочених звернень.
+    Отримати список прострочених звернень (з пагінацією).
     
     **Доступ:** Тільки ADMIN
     
     **Критерій прострочення:**
-    Звернення в статусі NEW більше 3 календарних днів.
+    SLA дедлайн звернення (due_at) минув. Дедлайн встановлюється при
+    створенні та кожній зміні статусу (NEW - 72 год, IN_PROGRESS - 168 год;
+    NEEDS_INFO, DONE, REJECTED - без дедлайну). Той самий критерій
+    використовує фільтр `overdue` у списках звернень.
+    
+    **Параметри:**
+    - skip: Кількість записів для пропуску
+    - limit: Розмір сторінки (1-100)
     
     **Повертає:**
     - Загальну кількість прострочених звернень
-    - Детальний список з інформацією:
+    - Сторінку списку з інформацією:
       - ID та public_id звернення
       - Категорія
       - Ім'я заявника
-      - Дата створення
-      - Кількість днів прострочення
+      - Дата створення та SLA дедлайн
+      - Кількість повних днів після дедлайну
       - Відповідальний виконавець (якщо призначений)
     
-    **Сортування:** За датою створення (від найстаріших до найновіших)
+    **Сортування:** За дедлайном (найстаріші першими)
     
     **Використання:**
     Для виджету "Прострочені звернення" на дашборді адміністратора.
     """
     try:
-        overdue = crud.get_overdue_cases(db=db)
+        overdue = crud.get_overdue_cases(db=db, skip=skip, limit=limit)
         return overdue
     except Exception as e:
         raise HTTPException(
@@ -181,6 +260,10 @@ async def get_executors_efficiency(
         None,
         description="End date for filtering (ISO format)"
     ),
+    refresh: bool = Query(
+        False,
+        description="Ignore cached value and recompute"
+    ),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(require_admin)
 ):
@@ -209,10 +292,13 @@ async def get_executors_efficiency(
     
     try:
         logger.info(f"[EXECUTORS-EFFICIENCY] Start with date_from={date_from}, date_to={date_to}")
-        efficiency = crud.get_executors_efficiency(
-            db=db,
-            date_from=date_from,
-            date_to=date_to
+        period_start, period_end = normalize_period(date_from, date_to)
+        efficiency = await cached_aggregate(
+            "executors-efficiency",
+            lambda: crud.get_executors_efficiency(db=db, date_from=date_from, date_to=date_to),
+            refresh,
+            date_from=period_start,
+            date_to=period_end,
         )
         logger.info(f"[EXECUTORS-EFFICIENCY] Success! Executors count: {len(efficiency.get('executors', []))}")
         return efficiency
@@ -246,6 +332,10 @@ async def get_top_categories(
         le=20,
         description="Number of top categories to return (1-20, default 5)"
     ),
+    refresh: bool = Query(
+        False,
+        description="Ignore cached value and recompute"
+    ),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(require_admin)
 ):
@@ -272,11 +362,19 @@ async def get_top_categories(
     Для віджету "Розподіл звернень за категоріями" (bar chart).
     """
     try:
-        top_categories = crud.get_top_categories(
-            db=db,
-            date_from=date_from,
-            date_to=date_to,
-            limit=limit
+        period_start, period_end = normalize_period(date_from, date_to)
+        top_categories = await cached_aggregate(
+            "categories-top",
+            lambda: crud.get_top_categories(
+                db=db,
+                date_from=date_from,
+                date_to=date_to,
+                limit=limit
+            ),
+            refresh,
+            date_from=period_start,
+            date_to=period_end,
+            limit=limit,
         )
         return top_categories
     except ValueError as e:
@@ -289,3 +387,66 @@ async def get_top_categories(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get top categories: {str(e)}"
         )
+
+
+@router.get("/resolution-times", response_model=schemas.ResolutionTimeStatsResponse)
+async def get_resolution_times(
+    group_by: str = Query(
+        "category",
+        pattern="^(category|channel|executor)$",
+        description="Group by: category, channel or executor"
+    ),
+    date_from: Optional[str] = Query(
+        None,
+        description="Start date for filtering by case creation (ISO format)"
+    ),
+    date_to: Optional[str] = Query(
+        None,
+        description="End date for filtering by case creation (ISO format)"
+    ),
+    refresh: bool = Query(
+        False,
+        description="Ignore cached value and recompute"
+    ),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_admin)
+):
+    """
+    Отримати перцентилі часу реакції та виконання звернень.
+    
+    **Доступ:** Тільки ADMIN
+    
+    **Повертає для кожної групи (категорія / канал / виконавець):**
+    - Кількість звернень, створених в періоді, та скільки з них виконано
+    - p50/p90/p99 часу від створення до взяття в роботу (години)
+    - p50/p90/p99 часу від створення до DONE (години)
+    
+    На відміну від середнього значення, перцентилі не спотворюються
+    кількома "застарілими" зверненнями. Рахується повністю в SQL.
+    """
+    try:
+        period_start, period_end = normalize_period(date_from, date_to)
+        stats = await cached_aggregate(
+            "resolution-times",
+            lambda: crud.get_resolution_time_stats(
+                db=db,
+                group_by=group_by,
+                date_from=date_from,
+                date_to=date_to
+            ),
+            refresh,
+            group_by=group_by,
+            date_from=period_start,
+            date_to=period_end,
+        )
+        return stats
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid parameters: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get resolution times: {str(e)}"
+        )
@@ -0,0 +1,109 @@
+"""
+SLA policies API endpoints (ADMIN)
+
+SLA target = hours a case may stay in a status before it is overdue.
+Policies are set per category and status; a policy without category is
+the default for all categories. Changing a policy recalculates due_at of
+the affected open cases.
+"""
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app import schemas, crud, models
+from app.database import get_db
+from app.dependencies import require_admin
+from app.models import User
+
+router = APIRouter(prefix="/api/sla-policies", tags=["SLA Policies"])
+
+
+def build_sla_policy_response(policy: models.SLAPolicy) -> schemas.SLAPolicyResponse:
+    """Convert SLA policy model to response schema"""
+    return schemas.SLAPolicyResponse(
+        id=str(policy.id),
+        category_id=str(policy.category_id) if policy.category_id else None,
+        category_name=policy.category.name if policy.category else None,
+        status=policy.status,
+        target_hours=policy.target_hours,
+        created_at=policy.created_at,
+        updated_at=policy.updated_at
+    )
+
+
+@router.get("", response_model=schemas.SLAPolicyListResponse)
+async def list_sla_policies(
+    category_id: Optional[UUID] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Get list of SLA policies.
+
+    Requires: Admin privileges
+
+    Query params:
+    - category_id: Only policies of this category (default policies are always included)
+
+    Statuses without a policy use the built-in defaults
+    (CASE_SLA_NEW_HOURS / CASE_SLA_IN_PROGRESS_HOURS).
+    """
+    policies = [
+        build_sla_policy_response(policy)
+        for policy in crud.get_sla_policies(db, category_id=category_id)
+    ]
+
+    return {
+        "policies": policies,
+        "total": len(policies)
+    }
+
+
+@router.put("", response_model=schemas.SLAPolicyResponse)
+async def upsert_sla_policy(
+    policy: schemas.SLAPolicyUpsert,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Create or update SLA policy for (category, status).
+
+    Requires: Admin privileges
+
+    Request:
+    - category_id: Category UUID (null - default policy for all categories)
+    - status: NEW, IN_PROGRESS or NEEDS_INFO (closed statuses have no SLA)
+    - target_hours: Hours allowed in the status
+
+    Deadlines (due_at) of open cases in the affected status are recalculated.
+    """
+    try:
+        db_policy = crud.upsert_sla_policy(db, policy)
+        return build_sla_policy_response(db_policy)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.delete("/{policy_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_sla_policy(
+    policy_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Delete SLA policy.
+
+    Requires: Admin privileges
+
+    Affected open cases fall back to the default policy (or built-in defaults).
+    """
+    if not crud.delete_sla_policy(db, policy_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="SLA policy not found"
+        )
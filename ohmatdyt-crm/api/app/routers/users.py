@@ -214,6 +214,54 @@ async def get_my_category_access(
     }
 
 
+def build_notification_settings_response(user: models.User) -> schemas.NotificationSettingsResponse:
+    """Convert user notification settings to response schema"""
+    from app.celery_app import NOTIFICATION_DIGEST_WINDOW_MINUTES
+    
+    return schemas.NotificationSettingsResponse(
+        email_digest_enabled=user.email_digest_enabled,
+        digest_window_minutes=NOTIFICATION_DIGEST_WINDOW_MINUTES
+    )
+
+
+@router.get("/me/notification-settings", response_model=schemas.NotificationSettingsResponse)
+async def get_my_notification_settings(
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Отримати налаштування сповіщень поточного користувача.
+    
+    **Response:**
+    - email_digest_enabled: Чи увімкнено режим дайджесту
+    - digest_window_minutes: Період формування дайджесту (хвилини)
+    
+    **Errors:**
+    - 401: Не авторизований
+    """
+    return build_notification_settings_response(current_user)
+
+
+@router.put("/me/notification-settings", response_model=schemas.NotificationSettingsResponse)
+async def update_my_notification_settings(
+    settings: schemas.NotificationSettingsUpdate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Оновити налаштування сповіщень поточного користувача.
+    
+    **Request Body:**
+    - email_digest_enabled: true - замість окремих листів про нові звернення
+      та коментарі надсилати один зведений лист за період
+    
+    **Errors:**
+    - 401: Не авторизований
+    - 422: Помилка валідації
+    """
+    user = crud.update_user_notification_settings(db=db, user=current_user, settings=settings)
+    return build_notification_settings_response(user)
+
+
 @router.get("/{user_id}", response_model=schemas.UserResponse)
 async def get_user(
     user_id: str,
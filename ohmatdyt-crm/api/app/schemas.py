@@ -5,7 +5,7 @@ from pydantic import BaseModel, EmailStr, Field, field_validator, model_validato
 from typing import Optional, Any
 from datetime import datetime
 from uuid import UUID
-from app.models import UserRole, CaseStatus
+from app.models import UserRole, CaseStatus, CaseSubmissionStatus
 
 
 class UserBase(BaseModel):
@@ -332,6 +332,7 @@ class CaseResponse(CaseBase):
     responsible_id: Optional[str]
     created_at: datetime
     updated_at: datetime
+    due_at: Optional[datetime] = None  # SLA дедлайн (NULL - SLA не діє)
     last_status_change_at: Optional[datetime] = None  # Час останньої зміни статусу
     
     # Optional nested objects (can be populated with joins)
@@ -352,6 +353,18 @@ class CaseListResponse(BaseModel):
     page_size: Optional[int] = 50
 
 
+class CaseSubmissionResponse(BaseModel):
+    """Schema for asynchronous case submission status"""
+    id: str
+    status: CaseSubmissionStatus
+    files_count: int
+    case_id: Optional[str] = None  # Після COMPLETED
+    case_public_id: Optional[int] = None
+    error: Optional[str] = None  # Причина FAILED
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+
+
 # ==================== Attachment Schemas ====================
 
 class AttachmentBase(BaseModel):
@@ -366,6 +379,7 @@ class AttachmentResponse(AttachmentBase):
     id: str
     case_id: str
     file_path: str
+    sha256: Optional[str] = Field(None, description="SHA-256 of file content (hex)")
     uploaded_by_id: str
     created_at: datetime
     
@@ -595,7 +609,8 @@ class OverdueCaseItem(BaseModel):
     category_name: str = Field(..., description="Category name")
     applicant_name: str = Field(..., description="Applicant name")
     created_at: datetime = Field(..., description="Creation date")
-    days_overdue: int = Field(..., description="Number of days in NEW status (>3 = overdue)")
+    due_at: datetime = Field(..., description="SLA deadline that has passed")
+    days_overdue: int = Field(..., description="Full days past the SLA deadline")
     responsible_id: Optional[str] = Field(None, description="Responsible executor UUID if assigned")
     responsible_name: Optional[str] = Field(None, description="Responsible executor full name")
 
@@ -604,9 +619,12 @@ class OverdueCasesResponse(BaseModel):
     """
     Schema for overdue cases list.
     
-    Returns cases that are in NEW status for more than 3 days.
+    Returns a page of open cases whose SLA deadline (due_at) has passed,
+    oldest deadline first.
     """
     total_overdue: int = Field(..., description="Total number of overdue cases")
+    skip: int = Field(0, description="Number of skipped records")
+    limit: int = Field(50, description="Page size")
     cases: list[OverdueCaseItem] = Field(..., description="List of overdue cases")
 
 
@@ -619,7 +637,7 @@ class ExecutorEfficiencyItem(BaseModel):
     current_in_progress: int = Field(..., description="Currently in progress cases")
     completed_in_period: int = Field(..., description="Completed cases in selected period")
     avg_completion_days: Optional[float] = Field(None, description="Average days to complete case")
-    overdue_count: int = Field(..., description="Number of overdue cases (>3 days in NEW)")
+    overdue_count: int = Field(..., description="Number of overdue cases (SLA deadline passed)")
 
 
 class ExecutorEfficiencyResponse(BaseModel):
@@ -657,6 +675,35 @@ class CategoriesTopResponse(BaseModel):
     limit: int = Field(..., description="Number of top categories returned")
 
 
+class PercentilesItem(BaseModel):
+    """Percentiles of a duration distribution (hours)"""
+    p50: Optional[float] = Field(None, description="Median (hours)")
+    p90: Optional[float] = Field(None, description="90th percentile (hours)")
+    p99: Optional[float] = Field(None, description="99th percentile (hours)")
+
+
+class ResolutionTimeGroupItem(BaseModel):
+    """Resolution-time statistics for one category, channel or executor"""
+    group_id: Optional[str] = Field(None, description="Category/channel/executor UUID (null = not assigned)")
+    group_name: str = Field(..., description="Category/channel name or executor full name")
+    total_cases: int = Field(..., description="Cases created in period")
+    resolved_cases: int = Field(..., description="Cases that reached DONE")
+    time_to_take_hours: PercentilesItem = Field(..., description="From creation to first IN_PROGRESS")
+    time_to_resolve_hours: PercentilesItem = Field(..., description="From creation to DONE")
+
+
+class ResolutionTimeStatsResponse(BaseModel):
+    """
+    Schema for resolution-time percentiles.
+    
+    Computed in SQL from status_history with percentile_cont.
+    """
+    group_by: str = Field(..., description="Grouping: category, channel or executor")
+    period_start: Optional[datetime] = Field(None, description="Start of the period")
+    period_end: Optional[datetime] = Field(None, description="End of the period")
+    groups: list[ResolutionTimeGroupItem] = Field(..., description="Statistics per group")
+
+
 # ============================================================================
 # BE-018: Executor Category Access Schemas
 # ============================================================================
@@ -758,3 +805,61 @@ class CategoryAccessBulkDeleteResponse(BaseModel):
     deleted_count: int
     category_ids: list[str] = Field(..., description="List of category UUIDs that were removed")
 
+
+
+# ============================================================================
+# SLA Policy Schemas
+# ============================================================================
+
+class SLAPolicyUpsert(BaseModel):
+    """
+    Schema for creating or updating SLA policy
+    
+    Used for PUT /api/sla-policies endpoint.
+    category_id = None sets the default policy for all categories.
+    """
+    category_id: Optional[str] = Field(None, description="Category UUID (None - default policy)")
+    status: CaseStatus = Field(..., description="Case status the target applies to")
+    target_hours: int = Field(..., ge=1, le=24 * 365, description="Hours allowed in the status")
+    
+    @field_validator('category_id')
+    @classmethod
+    def validate_category_id(cls, v: Optional[str]) -> Optional[str]:
+        """Validate that category_id is a valid UUID"""
+        if v is None:
+            return v
+        try:
+            UUID(v)
+            return v
+        except ValueError:
+            raise ValueError("category_id must be a valid UUID")
+
+
+class SLAPolicyResponse(BaseModel):
+    """Schema for SLA policy response"""
+    id: str  # UUID as string
+    category_id: Optional[str] = None  # UUID as string, None - default policy
+    category_name: Optional[str] = None  # Populated from join
+    status: CaseStatus
+    target_hours: int
+    created_at: datetime
+    updated_at: datetime
+
+
+class SLAPolicyListResponse(BaseModel):
+    """Schema for SLA policy list"""
+    policies: list[SLAPolicyResponse]
+    total: int
+
+
+# ==================== Notification Settings ====================
+
+class NotificationSettingsUpdate(BaseModel):
+    """Schema for updating own notification settings"""
+    email_digest_enabled: bool = Field(..., description="Receive one digest email per window instead of separate emails")
+
+
+class NotificationSettingsResponse(BaseModel):
+    """Schema for notification settings response"""
+    email_digest_enabled: bool
+    digest_window_minutes: int
@@ -0,0 +1,354 @@
+"""
+Attachment integrity scrubber.
+
+Звіряє рядки attachments / attachment_blobs з файлами у сховищі
+(app/storage.py) у дві фази, кожна - потоковими партіями з курсором у
+scrub_cursors, тож періодичний запуск (beat) дешевий і продовжує з місця
+зупинки:
+
+- attachments: кожне вкладення має файл потрібного розміру (опційно -
+  з правильним SHA-256). Вкладення без файлу можна видалити (--fix).
+- storage: кожен файл сховища (blob, файл звернення, прев'ю) має рядок.
+  Файли-сироти старші за SCRUB_ORPHAN_GRACE_SECONDS можна видалити
+  (--fix); молодші пропускаються - це можуть бути upload'и, чия
+  транзакція ще не завершилась.
+
+Запуск вручну:
+    python -m app.scrubber [--verify-checksums] [--fix] [--full] [--reset]
+"""
+import argparse
+import hashlib
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.previews import PREVIEW_SIZES
+from app.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+SCRUB_BATCH_SIZE = int(os.getenv("SCRUB_BATCH_SIZE", "500"))
+# Партій на фазу за один запуск beat (None у CLI з --full - до кінця)
+SCRUB_BATCHES_PER_RUN = int(os.getenv("SCRUB_BATCHES_PER_RUN", "20"))
+SCRUB_ORPHAN_GRACE_SECONDS = int(os.getenv("SCRUB_ORPHAN_GRACE_SECONDS", str(24 * 3600)))
+SCRUB_VERIFY_CHECKSUMS = os.getenv("SCRUB_VERIFY_CHECKSUMS", "false").lower() == "true"
+# false - лише звіт у логах, true - видаляти сиріт і вкладення без файлів
+SCRUB_FIX = os.getenv("SCRUB_FIX", "false").lower() == "true"
+# Більша частка відсутніх файлів у партії - схоже на збій сховища
+# (не той bucket / prefix), рядки такої партії не видаляються
+SCRUB_MAX_MISSING_RATIO = float(os.getenv("SCRUB_MAX_MISSING_RATIO", "0.2"))
+# Файли, що перевіряються у фазі storage
+SCRUB_PREFIXES = ("blobs/", "cases/")
+
+_PREVIEW_SUFFIXES = tuple(f".{variant}.jpg" for variant in PREVIEW_SIZES)
+_SHARDED_CASE_PATH_RE = re.compile(r"^cases/[0-9a-f]{2}/[0-9a-f]{2}/([0-9]+)/(.+)$")
+
+
+def _hash_object(storage, key: str) -> str:
+    digest = hashlib.sha256()
+    for chunk in storage.open_read(key):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scrub_attachments(
+    db: Session,
+    batch_size: int = SCRUB_BATCH_SIZE,
+    max_batches: Optional[int] = SCRUB_BATCHES_PER_RUN,
+    verify_checksums: bool = SCRUB_VERIFY_CHECKSUMS,
+    fix: bool = SCRUB_FIX,
+    max_missing_ratio: float = SCRUB_MAX_MISSING_RATIO
+) -> dict:
+    """
+    Check that every attachment row has its file (rows -> storage).
+
+    Attachments are read in keyset batches by id starting from the saved
+    cursor. Files shared by several attachments (blobs) are checked once
+    per batch. Size / checksum mismatches are only reported: the file is
+    corrupt, but deleting the row would lose the metadata as well.
+
+    Missing files are deleted (fix) only if the storage is reachable and
+    at most max_missing_ratio of the batch is missing: an unmounted volume
+    or a wrong bucket must not wipe the attachments table.
+
+    Args:
+        db: Database session
+        batch_size: Attachments per batch
+        max_batches: Stop after this many batches (None - until the end)
+        verify_checksums: Re-hash files and compare with sha256
+        fix: Delete attachment rows whose file is missing
+        max_missing_ratio: Keep rows of batches with more missing files
+
+    Returns:
+        Dictionary with checked / missing / size_mismatch /
+        checksum_mismatch / deleted / not_deleted counts and completed flag
+    """
+    storage = get_storage()
+    stats = {
+        "checked": 0, "missing": 0, "size_mismatch": 0,
+        "checksum_mismatch": 0, "deleted": 0, "not_deleted": 0, "completed": False,
+    }
+    if not storage.is_available():
+        # Кожен файл виглядав би відсутнім - курсор не рухаємо
+        logger.error(f"Scrubber: {storage.name} storage is not available, attachments phase skipped")
+        return stats
+    position = crud.get_scrub_cursor(db, "attachments")
+    last_id = UUID(position) if position else None
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        query = (
+            select(
+                models.Attachment.id,
+                models.Attachment.file_path,
+                models.Attachment.size_bytes,
+                models.Attachment.sha256,
+            )
+            .order_by(models.Attachment.id)
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            query = query.where(models.Attachment.id > last_id)
+
+        rows = db.execute(query).all()
+        # Знімок прочитано - не тримати транзакцію на час I/O
+        db.commit()
+        if not rows:
+            stats["completed"] = True
+            break
+        batches += 1
+
+        checked_files = {}
+        missing_ids = []
+        for attachment_id, file_path, size_bytes, sha256 in rows:
+            stats["checked"] += 1
+            if file_path not in checked_files:
+                key, size = storage.locate(file_path)
+                problem = None
+                if size is None:
+                    problem = "missing"
+                elif size != size_bytes:
+                    problem = "size_mismatch"
+                elif verify_checksums and sha256 and _hash_object(storage, key) != sha256:
+                    problem = "checksum_mismatch"
+                checked_files[file_path] = problem
+
+            problem = checked_files[file_path]
+            if problem:
+                stats[problem] += 1
+                logger.warning(f"Scrubber: attachment {attachment_id} {problem}: {file_path}")
+                if problem == "missing":
+                    missing_ids.append(attachment_id)
+
+        if fix and len(missing_ids) > max_missing_ratio * len(rows):
+            stats["not_deleted"] += len(missing_ids)
+            logger.error(
+                f"Scrubber: {len(missing_ids)} of {len(rows)} attachments in batch have no file, "
+                f"not deleting (storage outage?)"
+            )
+        elif fix:
+            for attachment_id in missing_ids:
+                if crud.delete_attachment(db, attachment_id):
+                    stats["deleted"] += 1
+
+        last_id = rows[-1].id
+        crud.save_scrub_cursor(db, "attachments", str(last_id))
+
+    if stats["completed"]:
+        crud.save_scrub_cursor(db, "attachments", None, completed=True)
+
+    return stats
+
+
+def _legacy_case_path(key: str) -> Optional[str]:
+    """cases/ab/cd/{public_id}/... -> cases/{public_id}/... (row not moved yet)"""
+    match = _SHARDED_CASE_PATH_RE.match(key)
+    return f"cases/{match.group(1)}/{match.group(2)}" if match else None
+
+
+def _owned_keys(db: Session, keys: list[str]) -> set[str]:
+    """Keys from the batch that are referenced by a blob or attachment row"""
+    base_keys = {}
+    for key in keys:
+        base = key
+        for suffix in _PREVIEW_SUFFIXES:
+            if key.endswith(suffix):
+                base = key[:-len(suffix)]
+                break
+        base_keys[key] = base
+
+    blob_ids = {os.path.basename(base) for base in base_keys.values() if base.startswith("blobs/")}
+    case_paths = {base for base in base_keys.values() if base.startswith("cases/")}
+    case_paths |= {_legacy_case_path(path) for path in case_paths} - {None}
+
+    known_blobs = set()
+    if blob_ids:
+        known_blobs = set(db.execute(
+            select(models.AttachmentBlob.id).where(models.AttachmentBlob.id.in_(blob_ids))
+        ).scalars())
+    known_paths = set()
+    if case_paths:
+        known_paths = set(db.execute(
+            select(models.Attachment.file_path).where(models.Attachment.file_path.in_(case_paths))
+        ).scalars())
+
+    return {
+        key for key, base in base_keys.items()
+        if os.path.basename(base) in known_blobs and base.startswith("blobs/")
+        or base in known_paths
+        or _legacy_case_path(base) in known_paths
+    }
+
+
+def scrub_storage(
+    db: Session,
+    batch_size: int = SCRUB_BATCH_SIZE,
+    max_batches: Optional[int] = SCRUB_BATCHES_PER_RUN,
+    fix: bool = SCRUB_FIX,
+    grace_seconds: int = SCRUB_ORPHAN_GRACE_SECONDS
+) -> dict:
+    """
+    Find files without a database row (storage -> rows).
+
+    Storage keys under SCRUB_PREFIXES are listed in order starting after
+    the saved cursor and checked against attachment_blobs / attachments
+    one batch at a time. Previews belong to their original file.
+
+    Args:
+        db: Database session
+        batch_size: Keys per batch
+        max_batches: Stop after this many batches (None - until the end)
+        fix: Delete orphans older than grace_seconds
+        grace_seconds: Minimal orphan age (in-flight uploads are younger)
+
+    Returns:
+        Dictionary with checked / orphans / deleted counts, deleted_bytes
+        and completed flag
+    """
+    storage = get_storage()
+    stats = {"checked": 0, "orphans": 0, "deleted": 0, "deleted_bytes": 0, "completed": False}
+    position = crud.get_scrub_cursor(db, "storage")
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    batches = 0
+
+    def iter_all():
+        for prefix in SCRUB_PREFIXES:
+            # Курсор з іншого префікса: він або вже пройдений, або ще попереду
+            if position and position >= prefix and not position.startswith(prefix):
+                continue
+            yield from storage.iter_objects(prefix, start_after=position)
+
+    objects = iter_all()
+    while max_batches is None or batches < max_batches:
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                break
+        if not batch:
+            stats["completed"] = True
+            break
+        batches += 1
+
+        owned = _owned_keys(db, [key for key, _, _ in batch])
+        db.commit()
+
+        for key, size, modified in batch:
+            stats["checked"] += 1
+            if key in owned:
+                continue
+            if modified > cutoff:
+                continue
+            stats["orphans"] += 1
+            logger.warning(f"Scrubber: orphan file {key} ({size} bytes, modified {modified:%Y-%m-%d %H:%M})")
+            if fix:
+                storage.delete(key)
+                stats["deleted"] += 1
+                stats["deleted_bytes"] += size
+
+        crud.save_scrub_cursor(db, "storage", batch[-1][0])
+
+    if stats["completed"]:
+        crud.save_scrub_cursor(db, "storage", None, completed=True)
+
+    return stats
+
+
+def run_scrub(
+    db: Session,
+    max_batches: Optional[int] = SCRUB_BATCHES_PER_RUN,
+    verify_checksums: bool = SCRUB_VERIFY_CHECKSUMS,
+    fix: bool = SCRUB_FIX,
+    batch_size: int = SCRUB_BATCH_SIZE,
+    max_missing_ratio: float = SCRUB_MAX_MISSING_RATIO
+) -> dict:
+    """
+    Run both scrub phases from their saved cursors.
+
+    Args:
+        db: Database session
+        max_batches: Batches per phase (None - full pass)
+        verify_checksums: Re-hash attachment files
+        fix: Delete orphans and rows of missing files
+        batch_size: Rows / keys per batch
+        max_missing_ratio: Keep rows of batches with more missing files
+
+    Returns:
+        Dictionary with "attachments" and "storage" stats
+    """
+    result = {
+        "attachments": scrub_attachments(
+            db, batch_size=batch_size, max_batches=max_batches,
+            verify_checksums=verify_checksums, fix=fix, max_missing_ratio=max_missing_ratio,
+        ),
+        "storage": scrub_storage(db, batch_size=batch_size, max_batches=max_batches, fix=fix),
+    }
+    logger.info(f"Scrubber: {result}")
+    return result
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Attachment integrity scrubber")
+    parser.add_argument("--verify-checksums", action="store_true", help="re-hash files and compare with sha256")
+    parser.add_argument("--fix", action="store_true", help="delete orphan files and rows of missing files")
+    parser.add_argument("--full", action="store_true", help="run until the end instead of SCRUB_BATCHES_PER_RUN batches")
+    parser.add_argument("--reset", action="store_true", help="start from the beginning (drop saved cursors)")
+    parser.add_argument("--batch-size", type=int, default=SCRUB_BATCH_SIZE)
+    parser.add_argument(
+        "--max-missing-ratio", type=float, default=SCRUB_MAX_MISSING_RATIO,
+        help="do not delete rows of batches with a larger share of missing files",
+    )
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.reset:
+            crud.save_scrub_cursor(db, "attachments", None)
+            crud.save_scrub_cursor(db, "storage", None)
+        result = run_scrub(
+            db,
+            max_batches=None if args.full else SCRUB_BATCHES_PER_RUN,
+            verify_checksums=args.verify_checksums,
+            fix=args.fix,
+            batch_size=args.batch_size,
+            max_missing_ratio=args.max_missing_ratio,
+        )
+    finally:
+        db.close()
+
+    for phase, stats in result.items():
+        print(phase + ": " + " ".join(f"{name}={value}" for name, value in stats.items()))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    main()
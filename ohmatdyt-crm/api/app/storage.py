@@ -0,0 +1,687 @@
+"""
+Attachment storage backends.
+
+Файли вкладень (blob'и, прев'ю, старі cases/...) адресуються ключем -
+шляхом відносно кореня сховища (Attachment.file_path,
+AttachmentBlob.file_path). Бекенд вибирається змінною STORAGE_BACKEND:
+
+- local (default): файли в MEDIA_ROOT (спільний volume, nginx
+  X-Accel-Redirect для завантажень);
+- s3: S3-сумісне сховище (AWS S3, MinIO); API може працювати на
+  кількох вузлах без спільного volume, завантаження - через presigned URL.
+
+Перенесення існуючих файлів між бекендами (ідемпотентно, можна
+перезапускати):
+    python -m app.storage migrate --from local --to s3 [--delete-source]
+Перенесення старих файлів cases/{public_id}/ у шардовану структуру
+cases/ab/cd/{public_id}/ (партіями, API продовжує працювати):
+    python -m app.storage shard-cases [--batch-size 200] [--pause 0.5]
+"""
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Optional
+
+from app import utils
+
+logger = logging.getLogger(__name__)
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+STORAGE_CHUNK_SIZE = int(os.getenv("STORAGE_CHUNK_SIZE", str(1024 * 1024)))
+
+S3_BUCKET = os.getenv("S3_BUCKET", "")
+S3_PREFIX = os.getenv("S3_PREFIX", "")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None  # MinIO: http://minio:9000
+S3_PUBLIC_ENDPOINT_URL = os.getenv("S3_PUBLIC_ENDPOINT_URL") or None  # Адреса для браузера (presigned URL)
+S3_REGION = os.getenv("S3_REGION") or None
+S3_ACCESS_KEY_ID = os.getenv("S3_ACCESS_KEY_ID") or None
+S3_SECRET_ACCESS_KEY = os.getenv("S3_SECRET_ACCESS_KEY") or None
+S3_PRESIGN_EXPIRES_SECONDS = int(os.getenv("S3_PRESIGN_EXPIRES_SECONDS", "300"))
+S3_MULTIPART_CHUNK_SIZE = int(os.getenv("S3_MULTIPART_CHUNK_SIZE", str(8 * 1024 * 1024)))
+SHARD_BATCH_SIZE = int(os.getenv("SHARD_BATCH_SIZE", "200"))
+
+# Тимчасові файли upload'ів не мігруються
+_SKIP_PREFIXES = ("tmp/",)
+
+
+class StorageBackend(ABC):
+    """
+    Base class for attachment storage backends.
+
+    Keys are relative paths with "/" separators. Reads and writes are
+    streamed in chunks; missing keys raise FileNotFoundError on read.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def size(self, key: str) -> Optional[int]:
+        """Object size in bytes, None if it does not exist"""
+
+    def exists(self, key: str) -> bool:
+        return self.size(key) is not None
+
+    def locate(self, key: str) -> tuple[str, Optional[int]]:
+        """
+        Key and size of a stored file, following a moved legacy path.
+
+        A row may still hold an unsharded cases/{public_id}/ path read
+        before shard-cases moved the file; the sharded key is tried then.
+        Size is None if neither exists.
+        """
+        size = self.size(key)
+        if size is None:
+            sharded = utils.get_sharded_case_path(key)
+            if sharded:
+                sharded_size = self.size(sharded)
+                if sharded_size is not None:
+                    return sharded, sharded_size
+        return key, size
+
+    @abstractmethod
+    def open_read(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Yield object bytes start..end (inclusive, None - to the end)"""
+
+    @abstractmethod
+    def save_file(self, local_path: str, key: str) -> None:
+        """Move a finished local file (upload temp, rendered preview) into storage"""
+
+    @abstractmethod
+    def save_stream(self, key: str, chunks: Iterable[bytes]) -> None:
+        """Write an object from an iterable of chunks (atomic for readers)"""
+
+    def copy(self, src_key: str, dst_key: str) -> None:
+        """Copy an object inside the backend"""
+        self.save_stream(dst_key, self.open_read(src_key))
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Delete an object, missing keys are ignored"""
+
+    @abstractmethod
+    def iter_objects(
+        self, prefix: str = "", start_after: Optional[str] = None
+    ) -> Iterator[tuple[str, int, datetime]]:
+        """
+        (key, size, modified UTC) of all objects under prefix.
+
+        Keys come in lexicographic order, start_after resumes an
+        interrupted walk. Upload temp files are excluded.
+        """
+
+    def iter_keys(self, prefix: str = "") -> Iterator[str]:
+        """All keys under prefix (upload temp files excluded)"""
+        for key, _, _ in self.iter_objects(prefix):
+            yield key
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Path on the local filesystem (FileResponse, X-Accel-Redirect), None if not local"""
+        return None
+
+    def is_available(self) -> bool:
+        """Storage root is reachable (mounted volume, bucket with valid credentials)"""
+        return True
+
+    def presigned_url(self, key: str, filename: str, mime_type: str) -> Optional[str]:
+        """Time-limited direct download URL, None if not supported"""
+        return None
+
+    def get_upload_tmp_dir(self) -> str:
+        """Local directory for upload temp files"""
+        path = os.getenv("UPLOAD_TMP_DIR") or os.path.join(tempfile.gettempdir(), "ohmatdyt-uploads")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def fetch_to_temp(self, key: str, suffix: str = "") -> str:
+        """Copy an object to a local temp file (caller removes it)"""
+        fd, tmp_path = tempfile.mkstemp(suffix=suffix, dir=self.get_upload_tmp_dir())
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in self.open_read(key):
+                    f.write(chunk)
+        except BaseException:
+            utils.discard_upload(tmp_path)
+            raise
+        return tmp_path
+
+
+class LocalStorage(StorageBackend):
+    """Files under a local root directory (MEDIA_ROOT)"""
+
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def local_path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def is_available(self) -> bool:
+        # Не змонтований volume - порожній каталог або його відсутність
+        try:
+            with os.scandir(self.root) as entries:
+                return any(entries)
+        except OSError:
+            return False
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self.local_path(key))
+        except FileNotFoundError:
+            return None
+
+    def open_read(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        path = self.local_path(key)
+        if end is None:
+            end = os.path.getsize(path) - 1
+        yield from utils.iter_file_range(path, start, end, chunk_size=STORAGE_CHUNK_SIZE)
+
+    def save_file(self, local_path: str, key: str) -> None:
+        full_path = self.local_path(key)
+        try:
+            # Та сама файлова система - атомарний rename
+            utils.commit_upload(local_path, full_path)
+        except OSError:
+            self.save_stream(key, utils.iter_file_range(local_path, 0, os.path.getsize(local_path) - 1))
+            utils.discard_upload(local_path)
+
+    def save_stream(self, key: str, chunks: Iterable[bytes]) -> None:
+        full_path = self.local_path(key)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        tmp_path = f"{full_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, full_path)
+        finally:
+            utils.discard_upload(tmp_path)
+
+    def copy(self, src_key: str, dst_key: str) -> None:
+        # Hard link: без копіювання даних (fallback - копія)
+        dst_path = self.local_path(dst_key)
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        try:
+            os.link(self.local_path(src_key), dst_path)
+        except FileExistsError:
+            pass
+        except OSError:
+            tmp_path = f"{dst_path}.{uuid.uuid4().hex}.tmp"
+            try:
+                shutil.copyfile(self.local_path(src_key), tmp_path)
+                os.replace(tmp_path, dst_path)
+            finally:
+                utils.discard_upload(tmp_path)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+    def iter_objects(
+        self, prefix: str = "", start_after: Optional[str] = None
+    ) -> Iterator[tuple[str, int, datetime]]:
+        yield from self._walk(os.path.join(self.root, prefix), prefix, start_after)
+
+    def _walk(self, dir_path: str, rel: str, start_after: Optional[str]):
+        # Каталог як "name/": порядок обходу збігається з порядком ключів
+        try:
+            entries = sorted(
+                os.scandir(dir_path),
+                key=lambda entry: entry.name + "/" if entry.is_dir(follow_symlinks=False) else entry.name,
+            )
+        except (FileNotFoundError, NotADirectoryError):
+            return
+
+        for entry in entries:
+            key = f"{rel.rstrip('/')}/{entry.name}" if rel else entry.name
+            if key.startswith(_SKIP_PREFIXES) or (key + "/").startswith(_SKIP_PREFIXES):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                sub_prefix = key + "/"
+                # Весь каталог уже пройдено
+                if start_after and start_after > sub_prefix and not start_after.startswith(sub_prefix):
+                    continue
+                yield from self._walk(entry.path, sub_prefix, start_after)
+            elif not entry.name.endswith(".tmp") and not (start_after and key <= start_after):
+                stat = entry.stat()
+                # Hard link / rename (copy, save_file) лишають старий mtime, але
+                # оновлюють ctime: новий ключ не має виглядати старим (scrubber)
+                modified = max(stat.st_mtime, stat.st_ctime)
+                yield key, stat.st_size, datetime.utcfromtimestamp(modified)
+
+    def get_upload_tmp_dir(self) -> str:
+        # Поруч з файлами: rename у сховище без копіювання
+        path = utils.get_upload_tmp_dir(self.root)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def fetch_to_temp(self, key: str, suffix: str = "") -> str:
+        # Той самий том: hard link замість копії, оригінал лишається на місці.
+        # Старий mtime переходить на blob, але iter_objects бачить новий ctime
+        tmp_path = os.path.join(self.get_upload_tmp_dir(), f"{uuid.uuid4().hex}{suffix}")
+        try:
+            os.link(self.local_path(key), tmp_path)
+        except OSError:
+            # Інша файлова система / без підтримки hard link - копія
+            # (відсутній ключ - FileNotFoundError з open_read)
+            return super().fetch_to_temp(key, suffix)
+        return tmp_path
+
+
+class _ChunkReader:
+    """Minimal file-like wrapper over an iterable of chunks (upload_fileobj)"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer.extend(chunk)
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+class S3Storage(StorageBackend):
+    """S3-compatible object storage (AWS S3, MinIO)"""
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        public_endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        presign_expires: int = S3_PRESIGN_EXPIRES_SECONDS,
+    ):
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.config import Config
+
+        if not bucket:
+            raise ValueError("S3_BUCKET is not configured")
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.presign_expires = presign_expires
+
+        # MinIO та інші S3-сумісні сервери - path-style адресація
+        config = Config(
+            signature_version="s3v4",
+            s3={"addressing_style": "path" if endpoint_url else "auto"},
+            retries={"max_attempts": 3, "mode": "standard"},
+        )
+        session = boto3.session.Session(
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            region_name=region,
+        )
+        self._client = session.client("s3", endpoint_url=endpoint_url, config=config)
+        # Presigned URL підписується з хостом, який бачить браузер
+        self._presign_client = (
+            session.client("s3", endpoint_url=public_endpoint_url, config=config)
+            if public_endpoint_url else self._client
+        )
+        self._transfer_config = TransferConfig(
+            multipart_threshold=S3_MULTIPART_CHUNK_SIZE,
+            multipart_chunksize=S3_MULTIPART_CHUNK_SIZE,
+        )
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def is_available(self) -> bool:
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        try:
+            self._client.head_bucket(Bucket=self.bucket)
+        except (BotoCoreError, ClientError) as error:
+            logger.error(f"S3 bucket {self.bucket} is not available: {error}")
+            return False
+        return True
+
+    @staticmethod
+    def _is_not_found(error) -> bool:
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def size(self, key: str) -> Optional[int]:
+        from botocore.exceptions import ClientError
+
+        try:
+            response = self._client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except ClientError as e:
+            if self._is_not_found(e):
+                return None
+            raise
+        return response["ContentLength"]
+
+    def open_read(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        from botocore.exceptions import ClientError
+
+        params = {"Bucket": self.bucket, "Key": self._object_key(key)}
+        if start or end is not None:
+            params["Range"] = f"bytes={start}-{'' if end is None else end}"
+        try:
+            body = self._client.get_object(**params)["Body"]
+        except ClientError as e:
+            if self._is_not_found(e):
+                raise FileNotFoundError(key) from e
+            raise
+        try:
+            yield from body.iter_chunks(STORAGE_CHUNK_SIZE)
+        finally:
+            body.close()
+
+    def save_file(self, local_path: str, key: str) -> None:
+        # Multipart upload частинами з диска, без читання файлу в пам'ять
+        self._client.upload_file(
+            local_path, self.bucket, self._object_key(key), Config=self._transfer_config
+        )
+        utils.discard_upload(local_path)
+
+    def save_stream(self, key: str, chunks: Iterable[bytes]) -> None:
+        self._client.upload_fileobj(
+            _ChunkReader(chunks), self.bucket, self._object_key(key), Config=self._transfer_config
+        )
+
+    def copy(self, src_key: str, dst_key: str) -> None:
+        self._client.copy(
+            {"Bucket": self.bucket, "Key": self._object_key(src_key)},
+            self.bucket,
+            self._object_key(dst_key),
+            Config=self._transfer_config,
+        )
+
+    def delete(self, key: str) -> None:
+        self._client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+    def iter_objects(
+        self, prefix: str = "", start_after: Optional[str] = None
+    ) -> Iterator[tuple[str, int, datetime]]:
+        params = {"Bucket": self.bucket, "Prefix": self._object_key(prefix)}
+        if start_after:
+            params["StartAfter"] = self._object_key(start_after)
+        paginator = self._client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(**params):
+            for obj in page.get("Contents", []):
+                key = obj["Key"][len(self.prefix):]
+                if not key.startswith(_SKIP_PREFIXES):
+                    modified = obj["LastModified"].astimezone(timezone.utc).replace(tzinfo=None)
+                    yield key, obj["Size"], modified
+
+    def presigned_url(self, key: str, filename: str, mime_type: str) -> str:
+        from urllib.parse import quote
+
+        quoted = quote(filename)
+        disposition = (
+            f"attachment; filename*=utf-8''{quoted}" if quoted != filename
+            else f'attachment; filename="{filename}"'
+        )
+        return self._presign_client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self._object_key(key),
+                "ResponseContentDisposition": disposition,
+                "ResponseContentType": mime_type,
+            },
+            ExpiresIn=self.presign_expires,
+        )
+
+
+def create_storage(backend: str = STORAGE_BACKEND) -> StorageBackend:
+    """
+    Build a storage backend from environment settings.
+
+    Args:
+        backend: local or s3
+
+    Returns:
+        StorageBackend
+
+    Raises:
+        ValueError: Unknown backend or missing S3 settings
+    """
+    if backend == "local":
+        return LocalStorage(os.getenv("MEDIA_ROOT", "/var/app/media"))
+    if backend == "s3":
+        return S3Storage(
+            bucket=S3_BUCKET,
+            prefix=S3_PREFIX,
+            endpoint_url=S3_ENDPOINT_URL,
+            public_endpoint_url=S3_PUBLIC_ENDPOINT_URL,
+            region=S3_REGION,
+            access_key_id=S3_ACCESS_KEY_ID,
+            secret_access_key=S3_SECRET_ACCESS_KEY,
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND '{backend}'")
+
+
+_storage: Optional[StorageBackend] = None
+_storage_pid: Optional[int] = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> StorageBackend:
+    """
+    Configured storage backend of this process.
+
+    Bound to the PID: HTTP connection pools of the S3 client are not
+    shared with forked Celery workers.
+    """
+    global _storage, _storage_pid
+
+    with _storage_lock:
+        if _storage is None or _storage_pid != os.getpid():
+            _storage = create_storage()
+            _storage_pid = os.getpid()
+        return _storage
+
+
+def migrate_storage(
+    source: StorageBackend,
+    target: StorageBackend,
+    delete_source: bool = False,
+    prefix: str = ""
+) -> dict:
+    """
+    Copy all objects from one backend to another.
+
+    Objects that already exist in the target with the same size are
+    skipped, so an interrupted migration is simply started again. Data is
+    streamed chunk by chunk. With delete_source the source object is
+    removed after its copy has been verified by size.
+
+    Args:
+        source: Backend to read from
+        target: Backend to write to
+        delete_source: Remove source objects after copying
+        prefix: Only migrate keys under this prefix
+
+    Returns:
+        Dictionary with copied / skipped / failed counts and copied bytes
+    """
+    stats = {"copied": 0, "skipped": 0, "failed": 0, "bytes": 0}
+
+    for key in source.iter_keys(prefix):
+        try:
+            size = source.size(key)
+            if size is None:
+                continue
+            if target.size(key) == size:
+                stats["skipped"] += 1
+            else:
+                target.save_stream(key, source.open_read(key))
+                if target.size(key) != size:
+                    raise IOError(f"size mismatch after copy of {key}")
+                stats["copied"] += 1
+                stats["bytes"] += size
+            if delete_source:
+                source.delete(key)
+        except Exception as e:
+            stats["failed"] += 1
+            logger.error(f"Storage: failed to migrate {key}: {e}")
+
+        done = stats["copied"] + stats["skipped"] + stats["failed"]
+        if done % 1000 == 0:
+            logger.info(f"Storage: migration progress {stats}")
+
+    return stats
+
+
+def shard_case_files(
+    db,
+    batch_size: int = SHARD_BATCH_SIZE,
+    pause: float = 0.0
+) -> dict:
+    """
+    Move legacy case files from cases/{public_id}/ to the sharded layout.
+
+    Online: attachments are processed in keyset batches, rows are locked
+    with FOR UPDATE SKIP LOCKED (rows busy in other transactions are left
+    for the next run). Each file and its previews are copied to the
+    sharded key (hard link on local storage), the rows are repointed and
+    committed, only then the old files are removed. Readers holding the
+    old path resolve it through StorageBackend.locate. Restartable: a file
+    already at the sharded key only gets its row updated.
+
+    Args:
+        db: Database session
+        batch_size: Attachments per transaction
+        pause: Seconds to sleep between batches (I/O throttling)
+
+    Returns:
+        Dictionary with moved / missing counts
+    """
+    from sqlalchemy import select
+    from app import models
+    from app.previews import PREVIEW_SIZES
+
+    storage = get_storage()
+    stats = {"moved": 0, "missing": 0}
+    last_id = None
+
+    while True:
+        query = (
+            select(models.Attachment)
+            .where(models.Attachment.blob_id.is_(None))
+            .where(models.Attachment.file_path.regexp_match(r"^cases/[0-9]{6,}/"))
+            .order_by(models.Attachment.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        if last_id is not None:
+            query = query.where(models.Attachment.id > last_id)
+
+        attachments = list(db.execute(query).scalars().all())
+        if not attachments:
+            db.commit()
+            break
+        last_id = attachments[-1].id
+
+        old_keys = []
+        for attachment in attachments:
+            old_path = attachment.file_path
+            new_path = utils.get_sharded_case_path(old_path)
+            pairs = [(old_path, new_path)] + [
+                (utils.get_preview_path(old_path, variant), utils.get_preview_path(new_path, variant))
+                for variant in PREVIEW_SIZES
+            ]
+
+            if storage.exists(old_path):
+                for src_key, dst_key in pairs:
+                    if storage.exists(src_key):
+                        storage.copy(src_key, dst_key)
+                old_keys.extend(src_key for src_key, _ in pairs)
+            elif not storage.exists(new_path):
+                stats["missing"] += 1
+                logger.warning(f"Storage: file missing for attachment {attachment.id}: {old_path}")
+                continue
+
+            attachment.file_path = new_path
+            stats["moved"] += 1
+
+        db.commit()
+
+        for key in old_keys:
+            storage.delete(key)
+        # Порожні каталоги cases/{public_id} (лише локальне сховище)
+        for key in old_keys:
+            case_dir = os.path.dirname(storage.local_path(key) or "")
+            if case_dir:
+                try:
+                    os.rmdir(case_dir)
+                except OSError:
+                    pass
+
+        logger.info(f"Storage: shard progress {stats}")
+        if pause:
+            time.sleep(pause)
+
+    return stats
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Attachment storage maintenance")
+    parser.add_argument(
+        "command", choices=["migrate", "shard-cases"],
+        help="migrate: copy all files between backends; shard-cases: move cases/{public_id}/ files to cases/ab/cd/{public_id}/"
+    )
+    parser.add_argument("--from", dest="source", choices=["local", "s3"])
+    parser.add_argument("--to", dest="target", choices=["local", "s3"])
+    parser.add_argument("--prefix", default="", help="only keys under this prefix (e.g. blobs/)")
+    parser.add_argument("--delete-source", action="store_true", help="remove source files after copying")
+    parser.add_argument("--batch-size", type=int, default=SHARD_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds between batches")
+    args = parser.parse_args(argv)
+
+    if args.command == "shard-cases":
+        from app.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            stats = shard_case_files(db, batch_size=args.batch_size, pause=args.pause)
+        finally:
+            db.close()
+        print(f"moved={stats['moved']} missing={stats['missing']}")
+        return
+
+    if not args.source or not args.target:
+        parser.error("migrate requires --from and --to")
+    if args.source == args.target:
+        parser.error("--from and --to must differ")
+
+    stats = migrate_storage(
+        create_storage(args.source), create_storage(args.target),
+        delete_source=args.delete_source, prefix=args.prefix,
+    )
+    print(
+        f"copied={stats['copied']} skipped={stats['skipped']} failed={stats['failed']} "
+        f"bytes={stats['bytes'] / 1024 / 1024:.1f}MB"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    main()
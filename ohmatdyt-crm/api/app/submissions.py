@@ -0,0 +1,261 @@
+"""
+Asynchronous case submission.
+
+POST /api/cases/submissions приймає ту саму форму, що й POST /api/cases,
+але лише перевіряє файли (тип, розмір, SHA-256), кладе їх у staging
+сховища (tmp/submissions/{id}/{n}) і відповідає 202 з id подання.
+Звернення з вкладеннями створює Celery-таска
+celery_app.process_case_submission через crud.create_case_with_attachments,
+стан подання - GET /api/cases/submissions/{id}.
+
+Staging лежить у сховищі (спільний том MEDIA_ROOT або S3), тож worker може
+працювати на іншій машині; на локальному сховищі файли не копіюються
+(rename / hard link). Staged-файли видаляються, щойно звернення створено
+або подання остаточно відхилене.
+"""
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app import utils
+from app.blobs import BLOB_STORE_WORKERS
+from app.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+SUBMISSION_STAGING_PREFIX = "tmp/submissions"
+# Повтори таски при помилках сховища / БД, після них подання - FAILED
+CASE_SUBMISSION_MAX_RETRIES = int(os.getenv("CASE_SUBMISSION_MAX_RETRIES", "3"))
+# Подання без змін стільки часу - таска загублена (beat recover_case_submissions)
+CASE_SUBMISSION_STUCK_SECONDS = int(os.getenv("CASE_SUBMISSION_STUCK_SECONDS", "3600"))
+
+
+def get_staging_key(submission_id: UUID, index: int) -> str:
+    """Storage key of a staged submission file"""
+    return f"{SUBMISSION_STAGING_PREFIX}/{submission_id}/{index}"
+
+
+def _discard_staged_files(storage, submission_id: UUID, keys: list[str]) -> None:
+    for key in keys:
+        storage.delete(key)
+    # Порожній каталог подання на локальному сховищі
+    submission_dir = storage.local_path(f"{SUBMISSION_STAGING_PREFIX}/{submission_id}")
+    if submission_dir:
+        try:
+            os.rmdir(submission_dir)
+        except OSError:
+            pass
+
+
+def submit_case(
+    db: Session,
+    case: schemas.CaseCreate,
+    author_id: UUID,
+    files: list[dict]
+) -> models.CaseSubmission:
+    """
+    Stage uploaded files and queue case creation.
+
+    Upload temp files are moved into the staging area (in parallel, like
+    blobs.store_blobs), then the submission row and its outbox event are
+    committed. On any error temp and staged files are removed.
+
+    Args:
+        db: Database session
+        case: Case creation schema (validated by the caller)
+        author_id: UUID of the submitting user
+        files: Dicts with temp_path, sha256, size, original_name, mime_type
+            (temp files from utils.stream_upload_to_temp)
+
+    Returns:
+        Created submission (PENDING)
+
+    Raises:
+        Exception: Storage or database errors
+    """
+    storage = get_storage()
+    submission_id = uuid.uuid4()
+    keys = [get_staging_key(submission_id, index) for index in range(len(files))]
+
+    try:
+        if len(files) > 1:
+            with ThreadPoolExecutor(max_workers=min(BLOB_STORE_WORKERS, len(files))) as pool:
+                list(pool.map(storage.save_file, [f['temp_path'] for f in files], keys))
+        elif files:
+            storage.save_file(files[0]['temp_path'], keys[0])
+
+        payload = {
+            "case": case.model_dump(mode="json"),
+            "files": [
+                {
+                    "key": key,
+                    "sha256": f['sha256'],
+                    "size": f['size'],
+                    "original_name": f['original_name'],
+                    "mime_type": f['mime_type'],
+                }
+                for f, key in zip(files, keys)
+            ],
+        }
+        return crud.create_case_submission(db, submission_id, author_id, payload)
+    except Exception:
+        db.rollback()
+        for f in files:
+            utils.discard_upload(f['temp_path'])
+        _discard_staged_files(storage, submission_id, keys)
+        raise
+
+
+def process_case_submission(db: Session, submission_id: UUID) -> dict:
+    """
+    Create the case of a submission from its staged files.
+
+    The submission is marked PROCESSING (attempts + 1) and locked first.
+    Staged files are fetched to temp files (hard links on local storage),
+    so they survive a failed attempt and the task can be retried. The case
+    and the COMPLETED status are committed together; a duplicate or late
+    delivery of the task finds the submission finished and does nothing.
+    Validation errors (inactive category, missing staged file, ...) fail
+    the submission right away, other errors are raised for a retry.
+
+    Args:
+        db: Database session
+        submission_id: Submission UUID
+
+    Returns:
+        Dictionary with status (completed / failed / skipped) and case ids
+
+    Raises:
+        Exception: Storage or database errors (retryable)
+    """
+    storage = get_storage()
+    submission = crud.start_case_submission(db, submission_id)
+    if submission is None:
+        return {"status": "skipped", "submission_id": str(submission_id)}
+
+    data = submission.data
+    keys = [f["key"] for f in data["files"]]
+
+    files = []
+    try:
+        for staged in data["files"]:
+            temp_path = storage.fetch_to_temp(staged["key"])
+            files.append(dict(staged, temp_path=temp_path))
+
+        db_case, attachments = crud.create_case_with_attachments(
+            db,
+            schemas.CaseCreate(**data["case"]),
+            submission.author_id,
+            files,
+            submission=submission,
+        )
+    except (ValueError, FileNotFoundError) as e:
+        error = str(e) if isinstance(e, ValueError) else "Staged file is missing"
+        fail_submission(db, submission_id, error)
+        return {"status": "failed", "submission_id": str(submission_id), "error": error}
+    finally:
+        # Після успіху temp-файли вже перенесені у blob'и
+        for f in files:
+            utils.discard_upload(f["temp_path"])
+
+    _discard_staged_files(storage, submission_id, keys)
+    logger.info(f"Submissions: {submission_id} -> case #{db_case.public_id} ({len(attachments)} files)")
+
+    return {
+        "status": "completed",
+        "submission_id": str(submission_id),
+        "case_id": str(db_case.id),
+        "public_id": db_case.public_id,
+        "attachments": len(attachments),
+    }
+
+
+def attempts_exhausted(db: Session, submission_id: UUID) -> bool:
+    """Whether a failed attempt should fail the submission instead of a retry"""
+    db.rollback()
+    submission = crud.get_case_submission(db, submission_id)
+    return submission is None or submission.attempts > CASE_SUBMISSION_MAX_RETRIES
+
+
+def fail_submission(db: Session, submission_id: UUID, error: str) -> bool:
+    """
+    Mark a submission FAILED and remove its staged files.
+
+    Args:
+        db: Database session
+        submission_id: Submission UUID
+        error: Reason shown by the status endpoint
+
+    Returns:
+        True if the submission was marked, False if it was already finished
+    """
+    db.rollback()
+    submission = crud.get_case_submission(db, submission_id)
+    if submission is None:
+        return False
+    keys = [f["key"] for f in submission.data["files"]]
+
+    failed = crud.fail_case_submission(db, submission_id, error)
+    if failed:
+        _discard_staged_files(get_storage(), submission_id, keys)
+        logger.warning(f"Submissions: {submission_id} failed: {error}")
+    return failed
+
+
+def recover_stuck_submissions(
+    db: Session,
+    stuck_seconds: int = CASE_SUBMISSION_STUCK_SECONDS,
+    limit: int = 100
+) -> dict:
+    """
+    Re-queue or fail submissions whose task was lost.
+
+    A submission left PENDING / PROCESSING for stuck_seconds (worker killed,
+    message dropped by the broker) is queued again through the outbox, or
+    marked FAILED with its staged files removed once it has used all
+    attempts. Submissions being processed right now are locked by their
+    worker and skipped.
+
+    Args:
+        db: Database session
+        stuck_seconds: Minimal time since the last status change
+        limit: Batch size
+
+    Returns:
+        Dictionary with requeued / failed counts
+    """
+    from datetime import datetime, timedelta
+
+    now = datetime.utcnow()
+    stats = {"requeued": 0, "failed": 0}
+    failed = []
+
+    for submission in crud.lock_stale_case_submissions(db, now - timedelta(seconds=stuck_seconds), limit=limit):
+        if submission.attempts > CASE_SUBMISSION_MAX_RETRIES:
+            submission.status = models.CaseSubmissionStatus.FAILED
+            submission.error = "Case creation did not finish in time"
+            submission.completed_at = now
+            failed.append((submission.id, [f["key"] for f in submission.data["files"]]))
+            stats["failed"] += 1
+        else:
+            crud.add_outbox_event(
+                db,
+                "app.celery_app.process_case_submission",
+                submission_id=str(submission.id),
+            )
+            stats["requeued"] += 1
+        submission.updated_at = now
+
+    db.commit()
+
+    storage = get_storage()
+    for submission_id, keys in failed:
+        _discard_staged_files(storage, submission_id, keys)
+        logger.warning(f"Submissions: {submission_id} failed: did not finish in time")
+
+    return stats
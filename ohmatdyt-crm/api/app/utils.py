@@ -1,8 +1,12 @@
 """
 Utility functions for Ohmatdyt CRM
 """
+import io
 import random
+import re
 import os
+import hashlib
+import tempfile
 import mimetypes
 from typing import Tuple, Optional
 from datetime import datetime
@@ -135,11 +139,32 @@ def validate_file_size(file_size: int) -> Tuple[bool, str]:
     return True, ""
 
 
+def get_case_storage_dir(case_public_id: int) -> str:
+    """
+    Storage directory of a case, sharded by hash of public_id.
+    
+    Path structure: /cases/{h[0:2]}/{h[2:4]}/{public_id}
+    (h - SHA-256 від public_id; до 65536 каталогів замість одного
+    каталогу з сотнями тисяч звернень)
+    
+    Args:
+        case_public_id: 6-digit case public ID
+        
+    Returns:
+        Relative path from MEDIA_ROOT
+    """
+    shard = hashlib.sha256(str(case_public_id).encode()).hexdigest()
+    return f"cases/{shard[:2]}/{shard[2:4]}/{case_public_id}"
+
+
 def get_file_storage_path(case_public_id: int, filename: str) -> str:
     """
     Generate storage path for attachment file.
     
-    Path structure: /cases/{public_id}/{filename}
+    Path structure: /cases/{h[0:2]}/{h[2:4]}/{public_id}/{filename}
+    (see get_case_storage_dir). Files stored before sharding keep their
+    cases/{public_id}/{filename} paths until they are moved, see
+    get_sharded_case_path.
     
     Args:
         case_public_id: 6-digit case public ID
@@ -148,7 +173,63 @@ def get_file_storage_path(case_public_id: int, filename: str) -> str:
     Returns:
         Relative path from MEDIA_ROOT
     """
-    return f"cases/{case_public_id}/{filename}"
+    return f"{get_case_storage_dir(case_public_id)}/{filename}"
+
+
+# Старий формат без шардування: cases/{public_id}/...
+_UNSHARDED_CASE_PATH_RE = re.compile(r"^cases/(\d{6,})/(.+)$")
+
+
+def get_sharded_case_path(file_path: str) -> Optional[str]:
+    """
+    Sharded equivalent of an unsharded legacy case file path.
+    
+    Used to resolve rows that still hold the old path after the file was
+    moved (python -m app.storage shard-cases), previews included.
+    
+    Args:
+        file_path: Path relative to MEDIA_ROOT
+        
+    Returns:
+        cases/ab/cd/{public_id}/... or None if the path is not a legacy
+        unsharded case path
+    """
+    match = _UNSHARDED_CASE_PATH_RE.match(file_path)
+    if not match:
+        return None
+    return f"{get_case_storage_dir(int(match.group(1)))}/{match.group(2)}"
+
+
+def get_blob_storage_path(sha256: str) -> str:
+    """
+    Generate storage path for content-addressed attachment blob.
+    
+    Path structure: /blobs/{sha[0:2]}/{sha[2:4]}/{sha256}
+    (два рівні підкаталогів, щоб не тримати все в одному каталозі)
+    
+    Args:
+        sha256: SHA-256 of file content (hex)
+        
+    Returns:
+        Relative path from MEDIA_ROOT
+    """
+    return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def get_preview_path(file_path: str, variant: str) -> str:
+    """
+    Generate storage path for a preview of an attachment file.
+    
+    Previews are stored next to the original: {file_path}.{variant}.jpg
+    
+    Args:
+        file_path: Attachment file path relative to MEDIA_ROOT
+        variant: Preview variant (thumb, preview)
+        
+    Returns:
+        Relative path from MEDIA_ROOT
+    """
+    return f"{file_path}.{variant}.jpg"
 
 
 def sanitize_filename(filename: str) -> str:
@@ -185,6 +266,254 @@ def sanitize_filename(filename: str) -> str:
     return filename
 
 
+# ==================== Streaming Upload Utilities ====================
+
+# Розмір блоку при потоковому записі upload'у: пам'ять на файл не залежить від його розміру
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(256 * 1024)))
+
+
+def get_upload_tmp_dir(media_root: str) -> str:
+    """
+    Directory for partially uploaded files.
+    
+    Lives inside MEDIA_ROOT (same filesystem), so a finished upload is moved
+    into place with an atomic rename.
+    """
+    return os.path.join(media_root, "tmp")
+
+
+def _write_upload_chunk(out, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    out.write(chunk)
+
+
+def _sync_upload_file(out) -> None:
+    out.flush()
+    os.fsync(out.fileno())
+
+
+async def stream_upload_to_temp(
+    upload,
+    tmp_dir: str,
+    max_size: int = MAX_FILE_SIZE_BYTES,
+) -> Tuple[str, int, str]:
+    """
+    Stream an uploaded file to a temp file in chunks.
+    
+    The size limit is checked as chunks arrive (nothing beyond the limit
+    is copied), SHA-256 is computed in the same pass. Hashing and disk
+    writes run in the threadpool, so the event loop is never blocked.
+    
+    Args:
+        upload: FastAPI UploadFile
+        tmp_dir: Directory for the temp file (see get_upload_tmp_dir)
+        max_size: Maximum file size in bytes
+        
+    Returns:
+        Tuple of (temp_path, size_bytes, sha256 hex digest)
+        
+    Raises:
+        ValueError: If the file is empty or exceeds max_size
+    """
+    from starlette.concurrency import run_in_threadpool
+    
+    os.makedirs(tmp_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=tmp_dir, prefix="upload-", suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+    
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    max_mb = max_size / (1024 * 1024)
+                    raise ValueError(f"File size exceeds maximum allowed size ({max_mb:.0f}MB)")
+                await run_in_threadpool(_write_upload_chunk, out, digest, chunk)
+            await run_in_threadpool(_sync_upload_file, out)
+        
+        is_valid_size, size_error = validate_file_size(size)
+        if not is_valid_size:
+            raise ValueError(size_error)
+    except BaseException:
+        discard_upload(temp_path)
+        raise
+    
+    return temp_path, size, digest.hexdigest()
+
+
+def commit_upload(temp_path: str, full_path: str) -> None:
+    """Move a finished upload into place (atomic rename on the same filesystem)"""
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    os.replace(temp_path, full_path)
+
+
+def discard_upload(temp_path: Optional[str]) -> None:
+    """Remove a temp upload file if it still exists"""
+    if temp_path:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+
+
+def parse_range_header(range_header: Optional[str], file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range HTTP Range header (RFC 7233).
+    
+    Supported forms: bytes=start-end, bytes=start-, bytes=-suffix.
+    Missing, malformed or multi-range headers are ignored (the whole file
+    is served, which the RFC allows).
+    
+    Args:
+        range_header: Value of the Range header
+        file_size: File size in bytes
+        
+    Returns:
+        (start, end) inclusive byte positions, or None for the whole file
+        
+    Raises:
+        ValueError: If the range cannot be satisfied (416)
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec or "-" not in spec:
+        return None
+    
+    start_str, end_str = (part.strip() for part in spec.split("-", 1))
+    if not (start_str.isdigit() or start_str == "") or not (end_str.isdigit() or end_str == ""):
+        return None
+    
+    if start_str == "":
+        # Suffix range: останні N байтів
+        if end_str == "":
+            return None
+        suffix = int(end_str)
+        if suffix == 0 or file_size == 0:
+            raise ValueError("Requested range not satisfiable")
+        return max(file_size - suffix, 0), file_size - 1
+    
+    start = int(start_str)
+    if start >= file_size:
+        raise ValueError("Requested range not satisfiable")
+    end = int(end_str) if end_str else file_size - 1
+    if end < start:
+        return None
+    
+    return start, min(end, file_size - 1)
+
+
+def iter_file_range(path: str, start: int, end: int, chunk_size: int = UPLOAD_CHUNK_SIZE):
+    """Yield bytes start..end (inclusive) of a file in chunks"""
+    remaining = end - start + 1
+    with open(path, "rb") as f:
+        f.seek(start)
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+# ==================== Streaming ZIP Utilities ====================
+
+# Вже стиснуті формати зберігаються без повторного стиснення (ZIP_STORED)
+ZIP_STORED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".pdf", ".docx", ".xlsx"}
+
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """Non-seekable sink for zipfile: collects written bytes until drained"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _archive_entry_name(name: str, used: set) -> str:
+    """File name inside the archive: no directories, unique (name (2).pdf)"""
+    name = name.replace("/", "_").replace("\\", "_").strip() or "file"
+    if name in (".", ".."):
+        name = "file"
+    stem, ext = os.path.splitext(name)
+    candidate, n = name, 1
+    while candidate.lower() in used:
+        n += 1
+        candidate = f"{stem} ({n}){ext}"
+    used.add(candidate.lower())
+    return candidate
+
+
+def iter_zip_stream(entries):
+    """
+    Build a ZIP archive on the fly and yield it in chunks.
+    
+    Memory use is bounded by the source chunk size (one chunk of one file
+    at a time), nothing is written to disk. Entries use data descriptors
+    (the sink is not seekable); already-compressed formats are stored, the
+    rest is deflated. Entries whose source raises FileNotFoundError before
+    the first chunk are skipped.
+    
+    Args:
+        entries: Iterable of (name, size_bytes, modified datetime, chunks),
+            chunks - iterable of file bytes (e.g. storage.open_read)
+        
+    Yields:
+        Archive bytes
+    """
+    import itertools
+    import zipfile
+    
+    buffer = _ZipStreamBuffer()
+    used_names = set()
+    
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as archive:
+        for name, size_bytes, modified, chunks in entries:
+            chunks = iter(chunks)
+            try:
+                first = next(chunks, b"")
+            except FileNotFoundError:
+                continue
+            
+            info = zipfile.ZipInfo(
+                _archive_entry_name(name, used_names),
+                date_time=max(modified, datetime(1980, 1, 1)).timetuple()[:6],
+            )
+            extension = os.path.splitext(info.filename)[1].lower()
+            info.compress_type = zipfile.ZIP_STORED if extension in ZIP_STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+            info.file_size = size_bytes
+            
+            with archive.open(info, mode="w") as target:
+                for chunk in itertools.chain((first,), chunks):
+                    target.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            
+            data = buffer.drain()
+            if data:
+                yield data
+    
+    # Central directory
+    yield buffer.drain()
+
+
 def get_last_status_change_date(db: Session, case_id) -> Optional[datetime]:
     """
     Get the date of the last status change for a case.
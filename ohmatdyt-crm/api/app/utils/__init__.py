@@ -36,8 +36,20 @@ try:
             generate_unique_public_id = _utils_module.generate_unique_public_id
             validate_file_type = _utils_module.validate_file_type
             validate_file_size = _utils_module.validate_file_size
+            get_case_storage_dir = _utils_module.get_case_storage_dir
             get_file_storage_path = _utils_module.get_file_storage_path
+            get_sharded_case_path = _utils_module.get_sharded_case_path
+            get_blob_storage_path = _utils_module.get_blob_storage_path
+            get_preview_path = _utils_module.get_preview_path
             sanitize_filename = _utils_module.sanitize_filename
+            get_upload_tmp_dir = _utils_module.get_upload_tmp_dir
+            parse_range_header = _utils_module.parse_range_header
+            iter_file_range = _utils_module.iter_file_range
+            iter_zip_stream = _utils_module.iter_zip_stream
+            stream_upload_to_temp = _utils_module.stream_upload_to_temp
+            commit_upload = _utils_module.commit_upload
+            discard_upload = _utils_module.discard_upload
+            UPLOAD_CHUNK_SIZE = _utils_module.UPLOAD_CHUNK_SIZE
             MAX_FILE_SIZE_BYTES = _utils_module.MAX_FILE_SIZE_BYTES
             ALLOWED_MIME_TYPES = _utils_module.ALLOWED_MIME_TYPES
             ALLOWED_EXTENSIONS = _utils_module.ALLOWED_EXTENSIONS
@@ -48,8 +60,19 @@ except Exception as e:
     generate_unique_public_id = None
     validate_file_type = None
     validate_file_size = None
+    get_case_storage_dir = None
     get_file_storage_path = None
+    get_sharded_case_path = None
+    get_blob_storage_path = None
+    get_preview_path = None
     sanitize_filename = None
+    get_upload_tmp_dir = None
+    parse_range_header = None
+    iter_file_range = None
+    iter_zip_stream = None
+    stream_upload_to_temp = None
+    commit_upload = None
+    discard_upload = None
 
 __all__ = [
     # Logging utilities (BE-015)
@@ -62,8 +85,20 @@ __all__ = [
     'generate_unique_public_id',
     'validate_file_type',
     'validate_file_size',
+    'get_case_storage_dir',
     'get_file_storage_path',
+    'get_sharded_case_path',
+    'get_blob_storage_path',
+    'get_preview_path',
     'sanitize_filename',
+    'get_upload_tmp_dir',
+    'parse_range_header',
+    'iter_file_range',
+    'iter_zip_stream',
+    'stream_upload_to_temp',
+    'commit_upload',
+    'discard_upload',
+    'UPLOAD_CHUNK_SIZE',
     'MAX_FILE_SIZE_BYTES',
     'ALLOWED_MIME_TYPES',
     'ALLOWED_EXTENSIONS',
@@ -0,0 +1,258 @@
+"""
+Benchmark: attachment downloads served by the API vs offloaded to nginx.
+
+Seeds one case with an attachment of --size-mb, starts the API under
+uvicorn (one worker) twice and downloads the file with --concurrency
+parallel clients:
+
+- direct: ATTACHMENT_DOWNLOAD_OFFLOAD=false, the API streams the file
+- offload: ATTACHMENT_DOWNLOAD_OFFLOAD=true, the API only authorizes and
+  answers with X-Accel-Redirect (the body is sent by nginx)
+
+While downloads run, /healthz is probed to show how long other requests
+wait for the API worker. Without nginx the offload run measures the API
+side only; pass --nginx-url (nginx in front of an API started with
+ATTACHMENT_DOWNLOAD_OFFLOAD=true, same DATABASE_URL and MEDIA_ROOT) to
+download through nginx end to end. A Range request is checked in the
+direct run.
+
+Needs a migrated scratch database in DATABASE_URL and the local storage
+backend with a writable MEDIA_ROOT (seeded rows and the file are deleted
+afterwards unless --keep).
+
+Usage (from api/):
+    MEDIA_ROOT=/tmp/media python -m benchmarks.attachment_download_benchmark \\
+        --size-mb 20 --concurrency 16 --requests 64
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def seed(db, size_bytes: int) -> dict:
+    """Operator, case and one content-addressed attachment of size_bytes"""
+    import hashlib
+    from app import crud, models
+    from app.auth import hash_password, create_access_token
+    from app.storage import get_storage
+    from app.utils import generate_unique_public_id, get_blob_storage_path
+
+    tag = uuid.uuid4().hex[:8]
+    category = models.Category(name=f"Benchmark {tag}")
+    channel = models.Channel(name=f"Benchmark {tag}")
+    operator = models.User(
+        username=f"bench_op_{tag}",
+        email=f"bench-op-{tag}@example.com",
+        full_name="Benchmark Operator",
+        password_hash=hash_password(uuid.uuid4().hex),
+        role=models.UserRole.OPERATOR,
+    )
+    db.add_all([category, channel, operator])
+    db.flush()
+    case = models.Case(
+        public_id=generate_unique_public_id(db),
+        category_id=category.id,
+        channel_id=channel.id,
+        author_id=operator.id,
+        applicant_name="Benchmark Applicant",
+        summary="Benchmark case summary",
+    )
+    db.add(case)
+    db.commit()
+
+    content = b"%PDF" + os.urandom(size_bytes - 4)
+    sha256 = hashlib.sha256(content).hexdigest()
+    blob = crud.acquire_attachment_blob(db, sha256, size_bytes, get_blob_storage_path(sha256))
+    get_storage().save_stream(blob.file_path, [content])
+    attachment = crud.create_attachment(
+        db, case.id, blob.file_path, "scan.pdf", size_bytes, "application/pdf",
+        operator.id, sha256=sha256, blob_id=blob.id,
+    )
+
+    token = create_access_token(data={
+        "sub": str(operator.id),
+        "username": operator.username,
+        "role": operator.role.value,
+    })
+    return {
+        "category": category,
+        "channel": channel,
+        "operator": operator,
+        "case": case,
+        "attachment": attachment,
+        "content": content,
+        "token": token,
+    }
+
+
+def cleanup(db, data: dict) -> None:
+    """Delete seeded rows and collect the blob file"""
+    from sqlalchemy import delete
+    from app import crud, models
+    from app.blobs import collect_unreferenced_blobs
+
+    crud.delete_case(db, data["case"].id)
+    collect_unreferenced_blobs(db)
+    db.execute(delete(models.User).where(models.User.id == data["operator"].id))
+    db.execute(delete(models.Category).where(models.Category.id == data["category"].id))
+    db.execute(delete(models.Channel).where(models.Channel.id == data["channel"].id))
+    db.commit()
+
+
+def start_api(port: int, offload: bool) -> subprocess.Popen:
+    env = {**os.environ, "ATTACHMENT_DOWNLOAD_OFFLOAD": "true" if offload else "false"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", "1", "--log-level", "warning"],
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/healthz", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("API did not start")
+
+
+async def run_downloads(base_url: str, url: str, token: str, requests: int, concurrency: int) -> dict:
+    """Download `requests` times with `concurrency` clients, probe /healthz meanwhile"""
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies = []
+    probes = []
+    received = 0
+    accel = 0
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        async def worker():
+            nonlocal received, accel
+            while not queue.empty():
+                queue.get_nowait()
+                started = time.perf_counter()
+                async with client.stream("GET", url, headers=headers) as response:
+                    response.raise_for_status()
+                    async for chunk in response.aiter_raw():
+                        received += len(chunk)
+                    if "x-accel-redirect" in response.headers:
+                        accel += 1
+                latencies.append(time.perf_counter() - started)
+
+        async def probe(stop: asyncio.Event):
+            while not stop.is_set():
+                started = time.perf_counter()
+                await client.get("/healthz")
+                probes.append(time.perf_counter() - started)
+                await asyncio.sleep(0.05)
+
+        stop = asyncio.Event()
+        prober = asyncio.create_task(probe(stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await prober
+
+    return {
+        "elapsed": elapsed,
+        "received": received,
+        "accel": accel,
+        "latencies": latencies,
+        "probes": probes,
+    }
+
+
+def check_range(base_url: str, url: str, token: str, content: bytes) -> str:
+    response = httpx.get(
+        base_url + url,
+        headers={"Authorization": f"Bearer {token}", "Range": "bytes=1024-2047"},
+    )
+    ok = response.status_code == 206 and response.content == content[1024:2048]
+    return f"{response.status_code} {response.headers.get('content-range')} {'ok' if ok else 'MISMATCH'}"
+
+
+def report(name: str, result: dict, requests: int) -> None:
+    elapsed = result["elapsed"]
+    print(f"{name}:")
+    print(f"  downloads:       {requests} in {elapsed:.2f}s  {requests / elapsed:.1f} req/s  "
+          f"{result['received'] / elapsed / 1024 / 1024:.1f} MB/s received"
+          + (f"  (X-Accel-Redirect: {result['accel']})" if result["accel"] else ""))
+    print(f"  p95 download:    {percentile(result['latencies'], 95) * 1000:8.1f} ms  "
+          f"(p50 {percentile(result['latencies'], 50) * 1000:.1f} ms)")
+    print(f"  p95 /healthz:    {percentile(result['probes'], 95) * 1000:8.1f} ms  "
+          f"(p50 {percentile(result['probes'], 50) * 1000:.1f} ms, n={len(result['probes'])})  while downloading")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--nginx-url", default=None, help="nginx in front of an API with offload enabled")
+    parser.add_argument("--keep", action="store_true", help="keep seeded rows and file")
+    args = parser.parse_args()
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        data = seed(db, int(args.size_mb * 1024 * 1024))
+        url = f"/api/attachments/{data['attachment'].id}/download"
+        print(f"file: {args.size_mb} MB, concurrency {args.concurrency}, requests {args.requests}")
+
+        for name, offload in (("direct", False), ("offload (API side)", True)):
+            port = free_port()
+            process = start_api(port, offload)
+            base_url = f"http://127.0.0.1:{port}"
+            try:
+                if not offload:
+                    print(f"range check:       {check_range(base_url, url, data['token'], data['content'])}")
+                result = asyncio.run(
+                    run_downloads(base_url, url, data["token"], args.requests, args.concurrency)
+                )
+            finally:
+                process.terminate()
+                process.wait()
+            report(name, result, args.requests)
+
+        if args.nginx_url:
+            print(f"range check nginx: {check_range(args.nginx_url, url, data['token'], data['content'])}")
+            result = asyncio.run(
+                run_downloads(args.nginx_url, url, data["token"], args.requests, args.concurrency)
+            )
+            report("offload via nginx", result, args.requests)
+
+        if not args.keep:
+            cleanup(db, data)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: render CPU of a new-case fan-out vs recipient count.
+
+- per-recipient: render_template("new_case", ...) for every executor
+  (behaviour before render_shared_template)
+- shared: render_shared_template once + SharedEmailRender.personalize
+  per executor
+
+Usage (from api/):
+    python -m benchmarks.email_render_benchmark --recipients 1 10 100 1000
+"""
+import argparse
+import time
+
+from app.email_service import render_template, render_shared_template
+
+CONTEXT = {
+    "case_public_id": 123456,
+    "category_name": "Медична допомога",
+    "channel_name": "Email",
+    "applicant_name": "Іваненко Петро Васильович",
+    "applicant_phone": "+380501234567",
+    "applicant_email": "petro@example.com",
+    "description": "Опис звернення. " * 30,
+    "created_at": "19.10.2026 10:00",
+}
+
+
+def render_per_recipient(names: list[str]) -> None:
+    for name in names:
+        render_template("new_case", {**CONTEXT, "executor_name": name})
+
+
+def render_shared(names: list[str]) -> None:
+    shared = render_shared_template("new_case", CONTEXT, personal_fields=("executor_name",))
+    for name in names:
+        shared.personalize(executor_name=name)
+
+
+def measure(func, names: list[str], repeat: int) -> float:
+    """Best CPU time of `repeat` runs, seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.process_time()
+        func(names)
+        best = min(best, time.process_time() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recipients", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Прогрів: компіляція шаблонів відбувається один раз на процес
+    render_per_recipient(["warmup"])
+
+    print(f"{'recipients':>10}  {'per-recipient ms':>16}  {'shared ms':>10}  {'speedup':>7}")
+    for count in args.recipients:
+        names = [f"Виконавець {n}" for n in range(count)]
+        baseline = measure(render_per_recipient, names, args.repeat)
+        shared = measure(render_shared, names, args.repeat)
+        print(f"{count:>10}  {baseline * 1000:>16.2f}  {shared * 1000:>10.2f}  x{baseline / shared:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
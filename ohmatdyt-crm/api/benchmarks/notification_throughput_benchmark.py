@@ -0,0 +1,356 @@
+"""
+Benchmark: notification pipeline throughput against a local SMTP stand-in.
+
+Starts an aiosmtpd sink (no TLS, no AUTH), seeds N executors with access
+to one category and M cases, then drives for every case:
+
+- send_new_case_notification (fan-out to executors + admins of the category)
+- send_case_taken_notification
+- send_case_status_changed_notification
+- send_comment_notification (public comment of the responsible executor)
+
+Reports emails/sec, p95 latency, DB statements per email and SMTP
+connections opened.
+
+Modes:
+- eager (default): tasks run in this process (task_always_eager), the
+  app is pointed at the sink automatically. Latency is measured per task
+  (task_prerun -> task_postrun); the fan-out task includes its chunks.
+- worker: tasks are sent to the broker and executed by a running worker.
+  Start the worker with SMTP_HOST/SMTP_PORT of the sink, SMTP_AUTH=false,
+  SMTP_TLS=false. Latency is per case: dispatch -> last email sent_at.
+  DB statements are executed in the worker and are not counted.
+
+Needs a migrated scratch database in DATABASE_URL (seeded rows are
+deleted afterwards unless --keep).
+
+Usage (from api/):
+    pip install aiosmtpd
+    python -m benchmarks.notification_throughput_benchmark --executors 50 --cases 20
+    python -m benchmarks.notification_throughput_benchmark --mode worker \\
+        --smtp-host 0.0.0.0 --smtp-port 2525
+"""
+import argparse
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import SMTP
+
+# aiosmtpd та email_service логують кожен лист
+logging.getLogger("mail.log").setLevel(logging.ERROR)
+logging.getLogger("app.email_service").setLevel(logging.WARNING)
+
+
+class CountingHandler:
+    """aiosmtpd handler: counts delivered messages and remembers the last delivery time"""
+
+    def __init__(self):
+        self.count = 0
+        self.last_delivery = None
+        self._lock = threading.Lock()
+
+    async def handle_DATA(self, server, session, envelope):
+        with self._lock:
+            self.count += 1
+            self.last_delivery = time.perf_counter()
+        return "250 OK"
+
+
+class CountingController(Controller):
+    """Controller that counts SMTP connections (sessions) opened by clients"""
+
+    def __init__(self, handler, **kwargs):
+        super().__init__(handler, **kwargs)
+        self.connections = 0
+
+    def factory(self):
+        controller = self
+
+        class CountingSMTP(SMTP):
+            def connection_made(self, transport):
+                controller.connections += 1
+                super().connection_made(transport)
+
+        return CountingSMTP(self.handler, **self.SMTP_kwargs)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def seed(db, executors: int, cases: int) -> dict:
+    """Category, channel, operator, executors with category access and cases in progress"""
+    from app import models
+    from app.auth import hash_password
+    from app.utils import generate_unique_public_id
+
+    tag = uuid.uuid4().hex[:8]
+    password_hash = hash_password(uuid.uuid4().hex)  # Вхід під цими користувачами не передбачений
+    category = models.Category(name=f"Benchmark {tag}")
+    channel = models.Channel(name=f"Benchmark {tag}")
+    operator = models.User(
+        username=f"bench_op_{tag}",
+        email=f"bench-op-{tag}@example.com",
+        full_name="Benchmark Operator",
+        password_hash=password_hash,
+        role=models.UserRole.OPERATOR,
+    )
+    db.add_all([category, channel, operator])
+    db.flush()
+
+    executor_users = [
+        models.User(
+            username=f"bench_ex_{tag}_{n}",
+            email=f"bench-ex-{tag}-{n}@example.com",
+            full_name=f"Benchmark Executor {n}",
+            password_hash=password_hash,
+            role=models.UserRole.EXECUTOR,
+        )
+        for n in range(executors)
+    ]
+    db.add_all(executor_users)
+    db.flush()
+    db.add_all(
+        models.ExecutorCategoryAccess(executor_id=executor.id, category_id=category.id)
+        for executor in executor_users
+    )
+
+    case_rows = []
+    for n in range(cases):
+        responsible = executor_users[n % executors]
+        case = models.Case(
+            public_id=generate_unique_public_id(db),
+            category_id=category.id,
+            channel_id=channel.id,
+            author_id=operator.id,
+            responsible_id=responsible.id,
+            applicant_name=f"Benchmark Applicant {n}",
+            summary="Benchmark case summary",
+            status=models.CaseStatus.IN_PROGRESS,
+        )
+        db.add(case)
+        db.flush()
+        comment = models.Comment(
+            case_id=case.id,
+            author_id=responsible.id,
+            text="Benchmark public comment",
+            is_internal=False,
+        )
+        db.add(comment)
+        db.flush()
+        case_rows.append((case, responsible, comment))
+    db.commit()
+
+    return {
+        "category": category,
+        "channel": channel,
+        "operator": operator,
+        "executors": executor_users,
+        "cases": case_rows,
+    }
+
+
+def cleanup(db, data: dict) -> None:
+    """Delete seeded rows (cases cascade to comments, history and notification logs)"""
+    from sqlalchemy import delete
+    from app import models
+
+    case_ids = [case.id for case, _, _ in data["cases"]]
+    user_ids = [data["operator"].id] + [executor.id for executor in data["executors"]]
+    db.execute(delete(models.Case).where(models.Case.id.in_(case_ids)))
+    db.execute(delete(models.NotificationLog).where(models.NotificationLog.recipient_user_id.in_(user_ids)))
+    db.execute(delete(models.User).where(models.User.id.in_(user_ids)))
+    db.execute(delete(models.Category).where(models.Category.id == data["category"].id))
+    db.execute(delete(models.Channel).where(models.Channel.id == data["channel"].id))
+    db.commit()
+
+
+def case_tasks(data: dict) -> list[tuple[str, str, dict]]:
+    """(case_id, task name, kwargs) for every task of the scenario"""
+    operator = data["operator"]
+    category_id = str(data["category"].id)
+    tasks = []
+    for case, responsible, comment in data["cases"]:
+        common = {"case_id": str(case.id), "case_public_id": case.public_id}
+        tasks += [
+            (common["case_id"], "app.celery_app.send_new_case_notification",
+             {**common, "category_id": category_id}),
+            (common["case_id"], "app.celery_app.send_case_taken_notification",
+             {**common, "executor_id": str(responsible.id), "author_id": str(operator.id)}),
+            (common["case_id"], "app.celery_app.send_case_status_changed_notification",
+             {**common, "new_status": "IN_PROGRESS", "executor_id": str(responsible.id),
+              "author_id": str(operator.id), "comment": "Benchmark status change comment"}),
+            (common["case_id"], "app.celery_app.send_comment_notification",
+             {**common, "comment_id": str(comment.id), "comment_text": comment.text,
+              "is_internal": False, "author_id": str(responsible.id),
+              "author_name": responsible.full_name, "case_author_id": str(operator.id),
+              "responsible_id": str(responsible.id), "category_id": category_id}),
+        ]
+    return tasks
+
+
+def run_eager(tasks) -> dict:
+    """Run tasks in-process, count DB statements and task durations"""
+    from celery import signals
+    from sqlalchemy import event
+    from app.celery_app import celery
+    from app.database import engine
+
+    celery.conf.task_always_eager = True
+
+    statements = 0
+    started_at = {}
+    durations = defaultdict(list)
+
+    def count_statement(*args, **kwargs):
+        nonlocal statements
+        statements += 1
+
+    def on_prerun(task_id=None, task=None, **kwargs):
+        started_at[task_id] = time.perf_counter()
+
+    def on_postrun(task_id=None, task=None, **kwargs):
+        durations[task.name].append(time.perf_counter() - started_at.pop(task_id))
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    signals.task_prerun.connect(on_prerun, weak=False)
+    signals.task_postrun.connect(on_postrun, weak=False)
+    try:
+        started = time.perf_counter()
+        for _, name, kwargs in tasks:
+            celery.tasks[name].apply(kwargs=kwargs)
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+        signals.task_prerun.disconnect(on_prerun)
+        signals.task_postrun.disconnect(on_postrun)
+
+    return {"elapsed": elapsed, "statements": statements, "latencies": durations}
+
+
+def run_worker(db, tasks, handler: CountingHandler, settle: float, timeout: float) -> dict:
+    """Send tasks to the broker and wait until the sink has been idle for `settle` seconds"""
+    from datetime import datetime
+    from sqlalchemy import select, func
+    from app import models
+    from app.celery_app import celery
+
+    dispatched_at = {}
+    started = time.perf_counter()
+    for case_id, name, kwargs in tasks:
+        dispatched_at.setdefault(case_id, datetime.utcnow())
+        celery.send_task(name, kwargs=kwargs)
+
+    last_count = -1
+    last_change = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        time.sleep(0.5)
+        if handler.count != last_count:
+            last_count, last_change = handler.count, time.perf_counter()
+        elif handler.count and time.perf_counter() - last_change >= settle:
+            break
+    elapsed = (handler.last_delivery or time.perf_counter()) - started
+
+    rows = db.execute(
+        select(models.NotificationLog.related_case_id, func.max(models.NotificationLog.sent_at))
+        .where(
+            models.NotificationLog.related_case_id.in_([uuid.UUID(case_id) for case_id in dispatched_at]),
+            models.NotificationLog.sent_at.isnot(None),
+        )
+        .group_by(models.NotificationLog.related_case_id)
+    ).all()
+    latencies = {
+        "case end-to-end": [
+            (last_sent - dispatched_at[str(case_id)]).total_seconds() for case_id, last_sent in rows
+        ]
+    }
+    return {"elapsed": elapsed, "statements": None, "latencies": latencies}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--executors", type=int, default=50)
+    parser.add_argument("--cases", type=int, default=20)
+    parser.add_argument("--mode", choices=["eager", "worker"], default="eager")
+    parser.add_argument("--smtp-host", default="127.0.0.1")
+    parser.add_argument("--smtp-port", type=int, default=0, help="0 - any free port")
+    parser.add_argument("--settle", type=float, default=5.0, help="worker mode: idle seconds that end the run")
+    parser.add_argument("--timeout", type=float, default=600.0, help="worker mode: max seconds to wait")
+    parser.add_argument("--keep", action="store_true", help="keep seeded rows")
+    args = parser.parse_args()
+
+    handler = CountingHandler()
+    controller = CountingController(
+        handler, hostname=args.smtp_host, port=args.smtp_port or free_port()
+    )
+    controller.start()
+
+    # email_service читає налаштування при імпорті - до імпорту app.*
+    os.environ.update({
+        "SMTP_HOST": controller.hostname,
+        "SMTP_PORT": str(controller.port),
+        "SMTP_AUTH": "false",
+        "SMTP_TLS": "false",
+        "SMTP_SSL": "false",
+    })
+
+    from app.database import SessionLocal
+    from app.email_service import (
+        get_smtp_pool, close_smtp_pool, get_async_smtp_sender, close_async_smtp_sender,
+    )
+
+    db = SessionLocal()
+    try:
+        data = seed(db, args.executors, args.cases)
+        tasks = case_tasks(data)
+        if args.mode == "worker":
+            print(f"SMTP sink on {controller.hostname}:{controller.port} - "
+                  f"worker needs SMTP_HOST/SMTP_PORT pointing here, SMTP_AUTH=false, SMTP_TLS=false")
+            result = run_worker(db, tasks, handler, args.settle, args.timeout)
+            smtp_stats = None
+        else:
+            result = run_eager(tasks)
+            smtp_stats = {"pool": get_smtp_pool().stats(), "async": get_async_smtp_sender().stats()}
+            close_smtp_pool()
+            close_async_smtp_sender()
+        if not args.keep:
+            cleanup(db, data)
+    finally:
+        db.close()
+        controller.stop()
+
+    emails = handler.count
+    print(f"mode:              {args.mode}")
+    print(f"executors/cases:   {args.executors}/{args.cases}  tasks={len(tasks)}")
+    print(f"emails delivered:  {emails} in {result['elapsed']:.2f}s  "
+          f"{emails / result['elapsed'] if result['elapsed'] else 0:.1f} emails/s")
+    for name, values in sorted(result["latencies"].items()):
+        print(f"p95 latency:       {percentile(values, 95) * 1000:8.1f} ms  "
+              f"(p50 {percentile(values, 50) * 1000:.1f} ms, n={len(values)})  {name}")
+    if result["statements"] is not None:
+        print(f"DB statements:     {result['statements']}  "
+              f"{result['statements'] / emails if emails else 0:.1f} per email")
+    print(f"SMTP connections:  {controller.connections}")
+    if smtp_stats:
+        print(f"pool stats:        {smtp_stats['pool']}")
+        print(f"async stats:       {smtp_stats['async']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Benchmark: per-message SMTP connections vs SMTPConnectionPool.
+
+Starts a local aiosmtpd server with STARTTLS and AUTH (self-signed
+certificate) and sends the same fan-out both ways:
+
+- per-message: connect + STARTTLS + login + send + quit for every message
+  (behaviour of send_email before the pool)
+- pooled: email_service.SMTPConnectionPool
+
+Usage (from api/):
+    pip install aiosmtpd
+    python -m benchmarks.smtp_pool_benchmark --messages 200 --pool-size 2
+"""
+import argparse
+import datetime
+import smtplib
+import socket
+import ssl
+import tempfile
+import logging
+import time
+from email.mime.text import MIMEText
+from pathlib import Path
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+from app.email_service import SMTPConnectionPool
+
+# aiosmtpd logs a deprecation warning about its own attribute on every AUTH
+logging.getLogger("mail.log").setLevel(logging.ERROR)
+
+USER = "bench"
+PASSWORD = "bench-password"
+
+
+class CountingHandler:
+    def __init__(self):
+        self.count = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.count += 1
+        return "250 OK"
+
+
+def authenticator(server, session, envelope, mechanism, auth_data):
+    ok = auth_data.login == USER.encode() and auth_data.password == PASSWORD.encode()
+    return AuthResult(success=ok)
+
+
+def make_tls_context(workdir: Path) -> ssl.SSLContext:
+    """Self-signed certificate for 127.0.0.1"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.utcnow()
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    cert_file, key_file = workdir / "cert.pem", workdir / "key.pem"
+    cert_file.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_file.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.TraditionalOpenSSL,
+        serialization.NoEncryption(),
+    ))
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert_file, key_file)
+    return context
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_message(n: int) -> MIMEText:
+    msg = MIMEText(f"Нове звернення #{100000 + n}", "plain", "utf-8")
+    msg["Subject"] = f"Нове звернення #{100000 + n}"
+    msg["From"] = "Ohmatdyt CRM <noreply@ohmatdyt.com>"
+    msg["To"] = f"executor{n}@example.com"
+    return msg
+
+
+def send_per_message(host: str, port: int, messages: int) -> None:
+    for n in range(messages):
+        with smtplib.SMTP(host, port) as server:
+            server.starttls()
+            server.login(USER, PASSWORD)
+            server.send_message(make_message(n))
+
+
+def send_pooled(pool: SMTPConnectionPool, messages: int) -> None:
+    for n in range(messages):
+        pool.send_message(make_message(n))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--max-messages-per-connection", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        handler = CountingHandler()
+        controller = Controller(
+            handler,
+            hostname="127.0.0.1",
+            port=free_port(),
+            tls_context=make_tls_context(Path(workdir)),
+            authenticator=authenticator,
+            auth_require_tls=True,
+        )
+        controller.start()
+        try:
+            host, port = controller.hostname, controller.port
+
+            started = time.perf_counter()
+            send_per_message(host, port, args.messages)
+            baseline = time.perf_counter() - started
+            baseline_delivered, handler.count = handler.count, 0
+
+            pool = SMTPConnectionPool(
+                host=host,
+                port=port,
+                user=USER,
+                password=PASSWORD,
+                use_tls=True,
+                max_size=args.pool_size,
+                max_messages_per_connection=args.max_messages_per_connection,
+            )
+            started = time.perf_counter()
+            send_pooled(pool, args.messages)
+            pooled = time.perf_counter() - started
+            pooled_delivered = handler.count
+            stats = pool.stats()
+            pool.close()
+        finally:
+            controller.stop()
+
+    print(f"messages:     {args.messages}")
+    print(f"per-message:  {baseline:.2f}s  {args.messages / baseline:.0f} msg/s  "
+          f"connections={args.messages} delivered={baseline_delivered}")
+    print(f"pooled:       {pooled:.2f}s  {args.messages / pooled:.0f} msg/s  "
+          f"connections={stats['connections_opened']} delivered={pooled_delivered}")
+    print(f"speedup:      x{baseline / pooled:.1f}")
+    print(f"pool stats:   {stats}")
+
+
+if __name__ == "__main__":
+    main()
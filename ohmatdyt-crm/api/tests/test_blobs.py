@@ -0,0 +1,180 @@
+"""
+Tests for content-addressed attachment storage (app.blobs)
+
+Need PostgreSQL, see tests/conftest.py
+"""
+import hashlib
+import os
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app import blobs, crud, models, schemas, utils
+from app.database import get_db
+from app.dependencies import get_current_active_user
+from app.main import app
+
+
+def _temp_upload(storage, content: bytes) -> tuple[str, str, int]:
+    temp_path = os.path.join(storage.get_upload_tmp_dir(), f"{uuid.uuid4().hex}.part")
+    with open(temp_path, "wb") as f:
+        f.write(content)
+    return temp_path, hashlib.sha256(content).hexdigest(), len(content)
+
+
+def _store(db, storage, content: bytes) -> models.AttachmentBlob:
+    temp_path, sha256, size = _temp_upload(storage, content)
+    blob = blobs.store_blob(db, temp_path, sha256, size)
+    # Посилання комітить crud.create_attachment
+    db.commit()
+    assert not os.path.exists(temp_path)
+    return blob
+
+
+def _ref_count(db, blob_id):
+    db.expire_all()
+    blob = db.get(models.AttachmentBlob, blob_id)
+    return blob.ref_count if blob else None
+
+
+def test_same_content_stored_once(db, storage):
+    content = os.urandom(4096)
+
+    first = _store(db, storage, content)
+    second = _store(db, storage, content)
+
+    assert first.id == second.id == hashlib.sha256(content).hexdigest()
+    assert first.file_path == utils.get_blob_storage_path(first.id)
+    assert _ref_count(db, first.id) == 2
+    assert list(storage.iter_keys("blobs/")) == [first.file_path]
+    assert b"".join(storage.open_read(first.file_path)) == content
+
+
+def test_gc_collects_only_unreferenced_blobs(db, storage):
+    content = os.urandom(1024)
+    shared = _store(db, storage, content)
+    _store(db, storage, content)
+    single = _store(db, storage, os.urandom(1024))
+    blob_ids = [shared.id, single.id]
+
+    blobs.release_blob(db, shared.id)
+    blobs.release_blob(db, single.id)
+
+    assert _ref_count(db, shared.id) == 1
+    assert _ref_count(db, single.id) is None
+    assert storage.exists(shared.file_path)
+    assert not storage.exists(single.file_path)
+
+    # Посилання ще є - збирач не чіпає blob
+    assert blobs.collect_unreferenced_blobs(db, blob_ids=blob_ids) == 0
+    assert storage.exists(shared.file_path)
+
+    blobs.release_blob(db, shared.id)
+    assert _ref_count(db, shared.id) is None
+    assert list(storage.iter_keys("blobs/")) == []
+
+
+def test_released_upload_keeps_existing_blob(db, storage):
+    content = os.urandom(1024)
+    stored = _store(db, storage, content)
+
+    # Upload без рядка вкладення (звернення видалене паралельно)
+    temp_path, sha256, size = _temp_upload(storage, content)
+    blob = blobs.store_blob(db, temp_path, sha256, size)
+    assert blobs.release_blob(db, blob.id) == 0
+
+    assert _ref_count(db, stored.id) == 1
+    assert storage.exists(stored.file_path)
+    assert not os.path.exists(temp_path)
+
+
+def _create_case(db, refs, storage, contents):
+    files = []
+    for content in contents:
+        temp_path, sha256, size = _temp_upload(storage, content)
+        files.append({"temp_path": temp_path, "sha256": sha256, "size": size,
+                      "original_name": "scan.pdf", "mime_type": "application/pdf"})
+    return crud.create_case_with_attachments(
+        db,
+        schemas.CaseCreate(
+            category_id=str(refs.category.id),
+            channel_id=str(refs.channel.id),
+            applicant_name="Тестовий заявник",
+            summary="Звернення з вкладеннями",
+        ),
+        refs.operator.id,
+        files,
+    )
+
+
+def test_case_delete_releases_blob_references(db, refs, storage):
+    shared, single = os.urandom(1024), os.urandom(1024)
+    _create_case(db, refs, storage, [shared])
+    case, attachments = _create_case(db, refs, storage, [single, shared, shared])
+    shared_id = hashlib.sha256(shared).hexdigest()
+    single_id = hashlib.sha256(single).hexdigest()
+    assert _ref_count(db, shared_id) == 3
+
+    assert crud.delete_case(db, case.id)
+
+    assert _ref_count(db, shared_id) == 1
+    assert _ref_count(db, single_id) == 0
+
+
+def test_delete_attachment_survives_storage_outage(db, refs, storage, monkeypatch):
+    content = os.urandom(1024)
+    sha256 = hashlib.sha256(content).hexdigest()
+    case, (attachment,) = _create_case(db, refs, storage, [content])
+
+    def broken_delete(key):
+        raise OSError("storage is down")
+
+    monkeypatch.setattr(storage, "delete", broken_delete)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_active_user] = lambda: refs.operator
+    try:
+        response = TestClient(app).delete(f"/api/attachments/{attachment.id}")
+    finally:
+        app.dependency_overrides.clear()
+
+    # Запис видалено, blob без посилань забере beat GC
+    assert response.status_code == 204
+    assert crud.get_attachment(db, attachment.id) is None
+    assert _ref_count(db, sha256) == 0
+    assert storage.exists(attachment.file_path)
+
+
+def test_dedupe_acquires_references_in_sha256_order(db, refs, storage, monkeypatch):
+    shared, single = os.urandom(1024), os.urandom(1024)
+    case, _ = _create_case(db, refs, storage, [])
+    legacy = []
+    for index, content in enumerate([single, shared, shared]):
+        file_path = f"cases/{case.public_id}/scan{index}.pdf"
+        storage.save_stream(file_path, [content])
+        legacy.append(models.Attachment(
+            case_id=case.id, file_path=file_path, original_name=f"scan{index}.pdf",
+            size_bytes=len(content), mime_type="application/pdf", uploaded_by_id=refs.operator.id,
+        ))
+    db.add_all(legacy)
+    db.commit()
+
+    calls = []
+    hash_object, acquire = blobs._hash_object, crud.acquire_attachment_blob
+    monkeypatch.setattr(blobs, "_hash_object", lambda *args: calls.append("hash") or hash_object(*args))
+    monkeypatch.setattr(
+        blobs.crud, "acquire_attachment_blob",
+        lambda db, sha256, *args: calls.append(sha256) or acquire(db, sha256, *args),
+    )
+
+    stats = blobs.dedupe_media_tree(db)
+
+    # Уся пачка хешується до першого блокування, блокування - по sha256
+    assert calls[:3] == ["hash"] * 3
+    assert calls[3:] == sorted(calls[3:])
+    assert (stats["migrated"], stats["deduplicated"]) == (3, 1)
+    shared_id = hashlib.sha256(shared).hexdigest()
+    assert _ref_count(db, shared_id) == 2
+    assert _ref_count(db, hashlib.sha256(single).hexdigest()) == 1
+    assert sorted(storage.iter_keys()) == sorted(
+        utils.get_blob_storage_path(hashlib.sha256(content).hexdigest()) for content in (shared, single)
+    )
@@ -0,0 +1,127 @@
+"""
+Tests for Redis-backed dashboard cache (single-flight)
+"""
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from app import cache
+
+
+class FakeLock:
+    """Minimal stand-in for redis.lock.Lock backed by a shared threading.Lock"""
+
+    def __init__(self, lock: threading.Lock, blocking_timeout: float):
+        self._lock = lock
+        self._blocking_timeout = blocking_timeout
+
+    def acquire(self, blocking: bool = True) -> bool:
+        return self._lock.acquire(blocking, self._blocking_timeout)
+
+    def release(self):
+        self._lock.release()
+
+
+class FakeRedis:
+    """In-memory Redis replacement with get/set/lock"""
+
+    def __init__(self):
+        self.store = {}
+        self.locks = {}
+        self._guard = threading.Lock()
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    def incr(self, key):
+        with self._guard:
+            self.store[key] = str(int(self.store.get(key, 0)) + 1)
+            return int(self.store[key])
+
+    def lock(self, name, timeout=None, blocking_timeout=None):
+        with self._guard:
+            lock = self.locks.setdefault(name, threading.Lock())
+        return FakeLock(lock, blocking_timeout)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(cache, "get_redis_client", lambda: client)
+    return client
+
+
+def test_make_cache_key_is_order_independent():
+    dt = datetime(2025, 1, 31, 23, 59, 59, 999999)
+    key1 = cache.make_cache_key("dashboard:summary", date_from=None, date_to=dt)
+    key2 = cache.make_cache_key("dashboard:summary", date_to=dt, date_from=None)
+
+    assert key1 == key2
+    assert key1 == "cache:dashboard:summary:date_from=|date_to=2025-01-31T23:59:59.999999"
+
+
+def test_get_or_compute_caches_value(fake_redis):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"total_cases": 5, "period_start": datetime(2025, 1, 1)}
+
+    first = cache.get_or_compute("k", compute, ttl=60)
+    second = cache.get_or_compute("k", compute, ttl=60)
+
+    assert len(calls) == 1
+    assert first["total_cases"] == 5
+    # Cached values are JSON-decoded
+    assert second == {"total_cases": 5, "period_start": "2025-01-01T00:00:00"}
+
+
+def test_force_refresh_recomputes(fake_redis):
+    values = iter([1, 2])
+
+    assert cache.get_or_compute("k", lambda: next(values)) == 1
+    assert cache.get_or_compute("k", lambda: next(values), force_refresh=True) == 2
+    assert cache.get_or_compute("k", lambda: 3) == 2
+
+
+def test_concurrent_misses_compute_once(fake_redis):
+    calls = []
+
+    def slow_compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"value": 42}
+
+    results = []
+
+    def worker():
+        results.append(cache.get_or_compute("k", slow_compute, ttl=60))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"value": 42}] * 8
+
+
+def test_invalidate_namespace_bumps_version(fake_redis):
+    assert cache.get_namespace_version("notification:recipients") == 0
+
+    key = cache.make_cache_key("notification:recipients", category_id="c1", version=0)
+    assert cache.get_or_compute(key, lambda: ["u1"]) == ["u1"]
+
+    cache.invalidate_namespace("notification:recipients")
+    version = cache.get_namespace_version("notification:recipients")
+    new_key = cache.make_cache_key("notification:recipients", category_id="c1", version=version)
+
+    assert version == 1
+    assert new_key != key
+    assert cache.get_or_compute(new_key, lambda: ["u1", "u2"]) == ["u1", "u2"]
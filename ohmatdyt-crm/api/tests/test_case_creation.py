@@ -0,0 +1,126 @@
+"""
+Tests for case creation with attachments in one transaction
+(crud.create_case_with_attachments)
+
+Need PostgreSQL, see tests/conftest.py
+"""
+import hashlib
+import os
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from app import crud, models, schemas
+
+
+def _temp_upload(storage, content: bytes, mime_type: str) -> dict:
+    temp_path = os.path.join(storage.get_upload_tmp_dir(), f"{uuid.uuid4().hex}.part")
+    with open(temp_path, "wb") as f:
+        f.write(content)
+    return {
+        "temp_path": temp_path,
+        "sha256": hashlib.sha256(content).hexdigest(),
+        "size": len(content),
+        "original_name": "scan",
+        "mime_type": mime_type,
+    }
+
+
+def _case_create(refs, summary: str) -> schemas.CaseCreate:
+    return schemas.CaseCreate(
+        category_id=str(refs.category.id),
+        channel_id=str(refs.channel.id),
+        applicant_name="Тестовий заявник",
+        summary=summary,
+    )
+
+
+def _count(db, model, *where):
+    db.expire_all()
+    return db.scalar(select(func.count()).select_from(model).where(*where))
+
+
+def _outbox_events(db, task_name, value):
+    return _count(
+        db,
+        models.OutboxEvent,
+        models.OutboxEvent.task_name == task_name,
+        models.OutboxEvent.payload.contains(value),
+    )
+
+
+def _ref_count(db, blob_id):
+    db.expire_all()
+    blob = db.get(models.AttachmentBlob, blob_id)
+    return blob.ref_count if blob else None
+
+
+def test_case_created_with_attachments(db, refs, storage):
+    shared = os.urandom(1024)
+    files = [
+        _temp_upload(storage, shared, "application/pdf"),
+        _temp_upload(storage, os.urandom(1024), "image/png"),
+        _temp_upload(storage, shared, "application/pdf"),
+        _temp_upload(storage, os.urandom(1024), "application/msword"),
+    ]
+
+    case, attachments = crud.create_case_with_attachments(
+        db, _case_create(refs, "Звернення з вкладеннями"), refs.operator.id, files
+    )
+
+    assert [a.original_name for a in attachments] == ["scan"] * 4
+    assert [a.mime_type for a in attachments] == [f["mime_type"] for f in files]
+    assert _count(db, models.Attachment, models.Attachment.case_id == case.id) == 4
+    assert _count(db, models.StatusHistory, models.StatusHistory.case_id == case.id) == 1
+    assert _ref_count(db, files[0]["sha256"]) == 2
+    assert _ref_count(db, files[1]["sha256"]) == 1
+    assert len(list(storage.iter_keys("blobs/"))) == 3
+    assert not any(os.path.exists(f["temp_path"]) for f in files)
+
+    # Нотифікація про звернення і прев'ю для кожного зображення / PDF
+    assert _outbox_events(db, "app.celery_app.send_new_case_notification", str(case.id)) == 1
+    previews = [
+        _outbox_events(db, "app.celery_app.generate_attachment_previews", str(a.id))
+        for a in attachments
+    ]
+    assert previews == [1, 1, 1, 0]
+
+
+def test_storage_failure_commits_nothing(db, refs, storage, monkeypatch):
+    content = os.urandom(1024)
+    existing = _temp_upload(storage, content, "application/pdf")
+    crud.create_case_with_attachments(
+        db, _case_create(refs, "Попереднє звернення"), refs.operator.id, [existing]
+    )
+    files = [
+        _temp_upload(storage, os.urandom(1024), "application/pdf"),
+        _temp_upload(storage, os.urandom(1024), "application/pdf"),
+        _temp_upload(storage, content, "application/pdf"),
+    ]
+    save_file = storage.save_file
+
+    def broken_save_file(local_path, key):
+        if key.endswith(files[1]["sha256"]):
+            raise OSError("storage is down")
+        save_file(local_path, key)
+
+    monkeypatch.setattr(storage, "save_file", broken_save_file)
+
+    with pytest.raises(OSError):
+        crud.create_case_with_attachments(
+            db, _case_create(refs, "Звернення без файлів"), refs.operator.id, files
+        )
+
+    assert _count(db, models.Case, models.Case.author_id == refs.operator.id) == 1
+    assert _count(
+        db,
+        models.OutboxEvent,
+        models.OutboxEvent.task_name == "app.celery_app.send_new_case_notification",
+        models.OutboxEvent.payload.contains(str(refs.category.id)),
+    ) == 1
+    # Посилання не витекли, temp-файли прибрані
+    assert _ref_count(db, existing["sha256"]) == 1
+    assert _ref_count(db, files[0]["sha256"]) is None
+    assert _ref_count(db, files[1]["sha256"]) is None
+    assert not any(os.path.exists(f["temp_path"]) for f in files)
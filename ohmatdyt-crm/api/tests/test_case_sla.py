@@ -0,0 +1,67 @@
+"""
+Tests for case SLA deadline (due_at) calculation
+"""
+from datetime import datetime, timedelta
+
+from app import crud, models
+
+
+class FakeResult:
+    def __init__(self, value):
+        self._value = value
+
+    def scalar_one_or_none(self):
+        return self._value
+
+
+class FakeSession:
+    """Session stub returning a fixed SLA policy lookup result"""
+
+    def __init__(self, policy_hours=None):
+        self.policy_hours = policy_hours
+        self.queries = 0
+
+    def execute(self, query):
+        self.queries += 1
+        return FakeResult(self.policy_hours)
+
+
+def test_compute_due_at():
+    started = datetime(2025, 1, 1, 12, 0, 0)
+
+    assert crud.compute_case_due_at(72, started) == started + timedelta(hours=72)
+    assert crud.compute_case_due_at(None, started) is None
+
+
+def test_target_hours_fall_back_to_defaults():
+    db = FakeSession(policy_hours=None)
+
+    assert crud.get_sla_target_hours(db, None, models.CaseStatus.NEW) == crud.CASE_SLA_HOURS[models.CaseStatus.NEW]
+    assert crud.get_sla_target_hours(db, None, models.CaseStatus.NEEDS_INFO) is None
+
+
+def test_target_hours_from_policy():
+    db = FakeSession(policy_hours=4)
+
+    assert crud.get_sla_target_hours(db, None, models.CaseStatus.NEEDS_INFO) == 4
+
+
+def test_closed_statuses_have_no_sla():
+    db = FakeSession(policy_hours=4)
+
+    for status in (models.CaseStatus.DONE, models.CaseStatus.REJECTED):
+        assert crud.get_sla_target_hours(db, None, status) is None
+    assert db.queries == 0
+
+
+def test_set_case_status_recalculates_due_at():
+    db = FakeSession(policy_hours=None)
+    case = models.Case(status=models.CaseStatus.NEW)
+    changed_at = datetime(2025, 1, 2, 8, 0, 0)
+
+    crud.set_case_status(db, case, models.CaseStatus.IN_PROGRESS, changed_at)
+    assert case.status == models.CaseStatus.IN_PROGRESS
+    assert case.due_at == changed_at + timedelta(hours=crud.CASE_SLA_HOURS[models.CaseStatus.IN_PROGRESS])
+
+    crud.set_case_status(db, case, models.CaseStatus.DONE)
+    assert case.due_at is None
@@ -0,0 +1,76 @@
+"""
+Tests for attachment downloads (utils.parse_range_header, utils.iter_zip_stream)
+"""
+import io
+import os
+import zipfile
+from datetime import datetime
+
+import pytest
+
+from app import utils
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=90-", (90, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes=50-500", (50, 99)),
+    # Ігноруються - віддається весь файл
+    (None, None),
+    ("bytes=0-1,5-6", None),
+    ("items=0-9", None),
+    ("bytes=9-0", None),
+    ("bytes=a-b", None),
+])
+def test_parse_range_header(header, expected):
+    assert utils.parse_range_header(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=150-200", "bytes=-0"])
+def test_unsatisfiable_range(header):
+    with pytest.raises(ValueError, match="not satisfiable"):
+        utils.parse_range_header(header, 100)
+
+
+def test_iter_file_range_reads_only_requested_bytes(tmp_path):
+    content = os.urandom(1000)
+    path = tmp_path / "scan.pdf"
+    path.write_bytes(content)
+
+    chunks = list(utils.iter_file_range(str(path), 100, 449, chunk_size=128))
+
+    assert b"".join(chunks) == content[100:450]
+    assert [len(chunk) for chunk in chunks] == [128, 128, 94]
+
+
+def test_zip_stream_stores_compressed_formats_and_dedupes_names(tmp_path):
+    scan = os.urandom(utils.UPLOAD_CHUNK_SIZE * 2 + 10)
+    (tmp_path / "scan.pdf").write_bytes(scan)
+    (tmp_path / "letter.doc").write_bytes(b"letter " * 10000)
+    created = datetime(2026, 10, 1, 12, 30)
+
+    def entry(name, filename):
+        # Відсутній файл: FileNotFoundError на першому chunk'у, як у storage.open_read
+        path = tmp_path / filename
+        size = path.stat().st_size if path.exists() else 0
+        return name, size, created, utils.iter_file_range(str(path), 0, size - 1)
+
+    chunks = list(utils.iter_zip_stream([
+        entry("Скан.pdf", "scan.pdf"),
+        entry("Скан.pdf", "scan.pdf"),
+        entry("../letter.doc", "letter.doc"),
+        entry("gone.pdf", "gone.pdf"),
+    ]))
+
+    # Архів віддається частинами, а не цілим
+    assert max(len(chunk) for chunk in chunks) < utils.UPLOAD_CHUNK_SIZE * 2
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    infos = {info.filename: info for info in archive.infolist()}
+    assert list(infos) == ["Скан.pdf", "Скан (2).pdf", ".._letter.doc"]
+    assert infos["Скан.pdf"].compress_type == zipfile.ZIP_STORED
+    assert infos[".._letter.doc"].compress_type == zipfile.ZIP_DEFLATED
+    assert archive.read("Скан (2).pdf") == scan
+    assert infos["Скан.pdf"].date_time == (2026, 10, 1, 12, 30, 0)
@@ -0,0 +1,49 @@
+"""
+Tests for shared email rendering (email_service.render_shared_template)
+"""
+from app.email_service import render_template, render_shared_template
+
+
+NEW_CASE_CONTEXT = {
+    "case_public_id": 123456,
+    "category_name": "Медична допомога",
+    "channel_name": "Email",
+    "applicant_name": "Іваненко Петро",
+    "applicant_phone": "+380501234567",
+    "applicant_email": "",
+    "description": "Потрібна консультація <терміново>",
+    "created_at": "19.10.2026 10:00",
+}
+
+
+def test_personalized_render_matches_full_render():
+    shared = render_shared_template("new_case", NEW_CASE_CONTEXT, personal_fields=("executor_name",))
+
+    for name in ["Олена Коваль", "O'Brien <admin> & Co"]:
+        expected = render_template("new_case", {**NEW_CASE_CONTEXT, "executor_name": name})
+        assert shared.personalize(executor_name=name) == expected
+
+
+def test_personalize_escapes_html_only():
+    shared = render_shared_template("new_case", NEW_CASE_CONTEXT, personal_fields=("executor_name",))
+
+    text_body, html_body = shared.personalize(executor_name="<b>Олена</b>")
+
+    assert "<b>Олена</b>" in text_body
+    assert "&lt;b&gt;Олена&lt;/b&gt;" in html_body
+    assert "@@executor_name@@" not in text_body + html_body
+
+
+def test_notification_log_personalizes_shared_body():
+    import json
+    from app import crud, models
+
+    shared = render_shared_template("new_case", NEW_CASE_CONTEXT, personal_fields=("executor_name",))
+    body = models.NotificationBody(
+        id=crud.make_notification_body_id(shared.text_body, shared.html_body),
+        body_text_gz=models.NotificationBody.compress(shared.text_body),
+        body_html_gz=models.NotificationBody.compress(shared.html_body),
+    )
+    log = models.NotificationLog(body=body, body_params=json.dumps({"executor_name": "Олена Коваль"}))
+
+    assert (log.body_text, log.body_html) == shared.personalize(executor_name="Олена Коваль")
@@ -0,0 +1,116 @@
+"""
+Tests for the transactional outbox relay (app.outbox)
+
+Need PostgreSQL, see tests/conftest.py
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models, outbox
+from app.celery_app import celery
+
+
+@pytest.fixture
+def events(db):
+    """Three pending events, the outbox is emptied first"""
+    db.execute(delete(models.OutboxEvent))
+    now = datetime.utcnow()
+    events = [
+        crud.add_outbox_event(db, "app.celery_app.generate_attachment_previews", attachment_id=str(index))
+        for index in range(3)
+    ]
+    for index, event in enumerate(events):
+        event.created_at = now + timedelta(milliseconds=index)
+    db.commit()
+    return events
+
+
+class _Calls(list):
+    fail: set
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Recording celery.send_task; fails for attachment ids in published.fail"""
+    calls = _Calls()
+    calls.fail = set()
+
+    def send_task(name, kwargs=None):
+        if kwargs["attachment_id"] in calls.fail:
+            raise ConnectionError("broker is down")
+        calls.append(kwargs["attachment_id"])
+
+    monkeypatch.setattr(celery, "send_task", send_task)
+    return calls
+
+
+def _pending(db):
+    db.expire_all()
+    return [
+        event.kwargs["attachment_id"]
+        for event in db.scalars(
+            select(models.OutboxEvent)
+            .where(models.OutboxEvent.dispatched_at.is_(None))
+            .order_by(models.OutboxEvent.created_at)
+        )
+    ]
+
+
+def test_relay_marks_published_events(db, events, published):
+    result = outbox.relay_outbox_batch(db)
+
+    assert result == {"claimed": 3, "dispatched": 3, "failed": 0}
+    assert published == ["0", "1", "2"]
+    assert _pending(db) == []
+    assert all(event.attempts == 0 for event in events)
+
+
+def test_relay_stops_at_first_publish_error(db, events, published):
+    published.fail.add("1")
+
+    result = outbox.relay_outbox_batch(db)
+
+    assert result == {"claimed": 3, "dispatched": 1, "failed": 1}
+    assert published == ["0"]
+    # Подія з помилкою і всі наступні лишаються в черзі, по порядку
+    assert _pending(db) == ["1", "2"]
+    db.refresh(events[1])
+    assert events[1].attempts == 1
+    assert events[1].last_error == "broker is down"
+
+    published.fail.clear()
+    assert outbox.relay_outbox_batch(db)["dispatched"] == 2
+    assert published == ["0", "1", "2"]
+
+
+def test_concurrent_relays_claim_different_events(db, db_engine, events):
+    other = sessionmaker(bind=db_engine)()
+    try:
+        first = crud.claim_pending_outbox_events(db, limit=2)
+        second = crud.claim_pending_outbox_events(other, limit=3)
+
+        assert [event.id for event in first] == [events[0].id, events[1].id]
+        assert [event.id for event in second] == [events[2].id]
+    finally:
+        other.rollback()
+        other.close()
+        db.rollback()
+
+
+def test_cleanup_deletes_only_old_published_events(db, events):
+    now = datetime.utcnow()
+    events[0].dispatched_at = now - timedelta(hours=outbox.OUTBOX_RETENTION_HOURS + 1)
+    events[1].dispatched_at = now - timedelta(hours=outbox.OUTBOX_RETENTION_HOURS - 1)
+    events[2].created_at = now - timedelta(hours=outbox.OUTBOX_RETENTION_HOURS + 1)
+    db.commit()
+    remaining = [events[1].id, events[2].id]
+
+    deleted = crud.delete_dispatched_outbox_events(
+        db, older_than=now - timedelta(hours=outbox.OUTBOX_RETENTION_HOURS)
+    )
+
+    assert deleted == 1
+    assert sorted(db.scalars(select(models.OutboxEvent.id))) == sorted(remaining)
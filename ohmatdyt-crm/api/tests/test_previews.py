@@ -0,0 +1,73 @@
+"""
+Tests for attachment thumbnails / previews (previews.render_previews)
+"""
+import os
+
+import pypdfium2
+import pytest
+from PIL import Image
+
+from app import previews, utils
+from app.storage import LocalStorage
+
+
+@pytest.fixture(autouse=True)
+def local_storage(tmp_path, monkeypatch):
+    storage = LocalStorage(str(tmp_path))
+    monkeypatch.setattr(previews, "get_storage", lambda: storage)
+    return storage
+
+
+def _preview(tmp_path, file_path, variant):
+    return Image.open(tmp_path / utils.get_preview_path(file_path, variant))
+
+
+def test_png_with_alpha_rendered_to_jpeg_variants(tmp_path):
+    Image.new("RGBA", (3000, 1500), (255, 0, 0, 0)).save(tmp_path / "scan.png")
+
+    generated = previews.render_previews("scan.png", "image/png")
+
+    assert sorted(generated) == ["preview", "thumb"]
+    thumb = _preview(tmp_path, "scan.png", "thumb")
+    assert thumb.format == "JPEG"
+    assert thumb.size == (previews.PREVIEW_SIZES["thumb"], previews.PREVIEW_SIZES["thumb"] // 2)
+    # Прозорість - на білому тлі
+    assert thumb.getpixel((10, 10)) == (255, 255, 255)
+    assert max(_preview(tmp_path, "scan.png", "preview").size) == previews.PREVIEW_SIZES["preview"]
+
+    # Повторний запуск (той самий blob в іншому вкладенні) нічого не робить
+    assert previews.render_previews("scan.png", "image/png") == []
+
+
+def test_pdf_first_page_preview(tmp_path):
+    pdf = pypdfium2.PdfDocument.new()
+    pdf.new_page(595, 842)
+    pdf.new_page(842, 595)
+    pdf.save(str(tmp_path / "letter.pdf"))
+    pdf.close()
+
+    previews.render_previews("letter.pdf", "application/pdf")
+
+    # Перша сторінка (портретна)
+    width, height = _preview(tmp_path, "letter.pdf", "preview").size
+    assert height == previews.PREVIEW_SIZES["preview"] and width < height
+    assert max(_preview(tmp_path, "letter.pdf", "thumb").size) == previews.PREVIEW_SIZES["thumb"]
+
+    previews.remove_previews("letter.pdf")
+    assert [name for name in os.listdir(tmp_path) if name.startswith("letter")] == ["letter.pdf"]
+
+
+def test_documents_without_preview_skipped(tmp_path):
+    assert previews.render_previews("report.docx", "application/msword") == []
+
+
+def test_oversized_image_not_decoded(tmp_path, monkeypatch):
+    # Між 1x і 2x ліміту Pillow лише попереджає і декодує
+    monkeypatch.setattr(previews, "PREVIEW_MAX_PIXELS", 1000)
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", Image.MAX_IMAGE_PIXELS)
+    Image.new("RGB", (40, 40), "red").save(tmp_path / "bomb.png")
+
+    with pytest.raises(Image.DecompressionBombError):
+        previews.render_previews("bomb.png", "image/png")
+
+    assert os.listdir(tmp_path) == ["bomb.png"]
@@ -0,0 +1,192 @@
+"""
+Tests for pooled SMTP connections (email_service.SMTPConnectionPool)
+
+Uses a local aiosmtpd server as SMTP stand-in.
+"""
+import socket
+from email.mime.text import MIMEText
+
+import pytest
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+from app.email_service import SMTPConnectionPool
+
+
+class CollectingHandler:
+    """aiosmtpd handler that keeps received envelopes"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = CollectingHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+def _message(n: int) -> MIMEText:
+    msg = MIMEText(f"body {n}", "plain", "utf-8")
+    msg["Subject"] = f"Test {n}"
+    msg["From"] = "crm@example.com"
+    msg["To"] = f"user{n}@example.com"
+    return msg
+
+
+def _pool(controller, **kwargs) -> SMTPConnectionPool:
+    return SMTPConnectionPool(
+        host=controller.hostname, port=controller.port, use_tls=False, **kwargs
+    )
+
+
+def test_connection_is_reused(smtp_server):
+    controller, handler = smtp_server
+    pool = _pool(controller)
+
+    for n in range(5):
+        pool.send_message(_message(n))
+
+    stats = pool.stats()
+    assert len(handler.messages) == 5
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 4
+    assert stats["messages_sent"] == 5
+    assert stats["idle"] == 1 and stats["in_use"] == 0
+    pool.close()
+
+
+def test_connection_rotated_after_message_limit(smtp_server):
+    controller, handler = smtp_server
+    pool = _pool(controller, max_messages_per_connection=2)
+
+    for n in range(5):
+        pool.send_message(_message(n))
+
+    assert len(handler.messages) == 5
+    assert pool.stats()["connections_opened"] == 3
+    pool.close()
+
+
+def test_stale_idle_connection_is_replaced(smtp_server):
+    controller, handler = smtp_server
+    pool = _pool(controller, max_idle_seconds=0)
+
+    pool.send_message(_message(1))
+    # Сервер "закрив" сесію під час простою
+    pool._idle[0].server.close()
+    pool.send_message(_message(2))
+
+    stats = pool.stats()
+    assert len(handler.messages) == 2
+    assert stats["stale_replaced"] == 1
+    assert stats["connections_opened"] == 2
+    pool.close()
+
+
+def test_send_retried_once_after_disconnect(smtp_server):
+    controller, handler = smtp_server
+    pool = _pool(controller, max_idle_seconds=3600)
+
+    pool.send_message(_message(1))
+    pool._idle[0].server.close()
+    pool.send_message(_message(2))
+
+    stats = pool.stats()
+    assert len(handler.messages) == 2
+    assert stats["send_errors"] == 1
+    assert stats["connections_opened"] == 2
+    pool.close()
+
+
+def test_send_email_without_auth(smtp_server, monkeypatch):
+    from app import email_service
+
+    controller, handler = smtp_server
+    monkeypatch.setattr(email_service, "SMTP_HOST", controller.hostname)
+    monkeypatch.setattr(email_service, "SMTP_PORT", controller.port)
+    monkeypatch.setattr(email_service, "SMTP_USE_TLS", False)
+    monkeypatch.setattr(email_service, "SMTP_USER", "")
+    monkeypatch.setattr(email_service, "SMTP_PASSWORD", "")
+    monkeypatch.setattr(email_service, "_smtp_pool", None)
+
+    monkeypatch.setattr(email_service, "SMTP_AUTH", True)
+    assert email_service.send_email("user@example.com", "Test", "body") is False
+
+    monkeypatch.setattr(email_service, "SMTP_AUTH", False)
+    assert email_service.send_email("user@example.com", "Test", "body") is True
+    assert len(handler.messages) == 1
+    email_service.close_smtp_pool()
+
+
+class RejectingHandler(CollectingHandler):
+    """Rejects recipients at reject.example.com, tracks concurrent sessions"""
+
+    def __init__(self):
+        super().__init__()
+        self.active_sessions = 0
+        self.max_active_sessions = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.active_sessions += 1
+        self.max_active_sessions = max(self.max_active_sessions, self.active_sessions)
+        session.host_name = hostname
+        return responses
+
+    async def handle_QUIT(self, server, session, envelope):
+        self.active_sessions -= 1
+        return "221 Bye"
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.endswith("@reject.example.com"):
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+
+def test_send_emails_concurrently_reports_per_message(monkeypatch):
+    pytest.importorskip("aiosmtplib")
+    from app import email_service
+
+    handler = RejectingHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    monkeypatch.setattr(email_service, "SMTP_HOST", controller.hostname)
+    monkeypatch.setattr(email_service, "SMTP_PORT", controller.port)
+    monkeypatch.setattr(email_service, "SMTP_USE_TLS", False)
+    monkeypatch.setattr(email_service, "SMTP_AUTH", False)
+
+    emails = [
+        {"to": f"user{n}@example.com", "subject": f"Test {n}", "body_text": "body"}
+        for n in range(10)
+    ]
+    emails[3]["to"] = "missing@reject.example.com"
+    monkeypatch.setattr(email_service, "_async_sender", None)
+    try:
+        results = email_service.send_emails_concurrently(emails, concurrency=3)
+        # Сесії залишаються відкритими між пачками
+        email_service.send_emails_concurrently(emails[:3], concurrency=3)
+        stats = email_service.get_async_smtp_sender().stats()
+    finally:
+        email_service.close_async_smtp_sender()
+        controller.stop()
+
+    assert [n for n, error in enumerate(results) if error is not None] == [3]
+    assert "No such user" in results[3]
+    assert len(handler.messages) == 9 + 3
+    assert handler.max_active_sessions == 3
+    assert stats["connections_opened"] == 3
+    assert stats["messages_sent"] == 12
@@ -0,0 +1,244 @@
+"""
+Tests for attachment storage backends (app.storage)
+
+S3 tests run against an S3-compatible server (local MinIO):
+    S3_TEST_ENDPOINT_URL=http://localhost:9000 S3_TEST_BUCKET=crm-test \\
+    S3_ACCESS_KEY_ID=minioadmin S3_SECRET_ACCESS_KEY=minioadmin pytest tests/test_storage.py
+"""
+import os
+import time
+import uuid
+from collections import namedtuple
+
+import pytest
+
+from app import scrubber, utils
+from app.storage import LocalStorage, S3Storage, migrate_storage
+
+S3_TEST_ENDPOINT_URL = os.getenv("S3_TEST_ENDPOINT_URL")
+
+
+@pytest.fixture
+def local(tmp_path):
+    return LocalStorage(str(tmp_path / "media"))
+
+
+@pytest.fixture
+def s3():
+    if not S3_TEST_ENDPOINT_URL:
+        pytest.skip("S3_TEST_ENDPOINT_URL is not set")
+    storage = S3Storage(
+        bucket=os.getenv("S3_TEST_BUCKET", "crm-test"),
+        prefix=f"test-{uuid.uuid4().hex[:8]}/",
+        endpoint_url=S3_TEST_ENDPOINT_URL,
+        access_key_id=os.getenv("S3_ACCESS_KEY_ID", "minioadmin"),
+        secret_access_key=os.getenv("S3_SECRET_ACCESS_KEY", "minioadmin"),
+        region=os.getenv("S3_REGION", "us-east-1"),
+    )
+    try:
+        storage._client.create_bucket(Bucket=storage.bucket)
+    except storage._client.exceptions.BucketAlreadyOwnedByYou:
+        pass
+    yield storage
+    for key in list(storage.iter_keys()):
+        storage.delete(key)
+
+
+def _roundtrip(storage, tmp_path):
+    content = os.urandom(3 * 1024 * 1024 + 17)
+    source = tmp_path / "upload.part"
+    source.write_bytes(content)
+
+    storage.save_file(str(source), "blobs/ab/cd/abcd")
+    assert not source.exists()
+    assert storage.size("blobs/ab/cd/abcd") == len(content)
+    assert b"".join(storage.open_read("blobs/ab/cd/abcd")) == content
+    assert b"".join(storage.open_read("blobs/ab/cd/abcd", 100, 1123)) == content[100:1124]
+
+    storage.copy("blobs/ab/cd/abcd", "blobs/ab/cd/abcd.copy")
+    storage.save_stream("blobs/ab/cd/abcd.thumb.jpg", [b"jpeg", b"data"])
+    assert sorted(storage.iter_keys("blobs/")) == [
+        "blobs/ab/cd/abcd", "blobs/ab/cd/abcd.copy", "blobs/ab/cd/abcd.thumb.jpg",
+    ]
+
+    storage.delete("blobs/ab/cd/abcd")
+    storage.delete("blobs/ab/cd/abcd")
+    assert storage.size("blobs/ab/cd/abcd") is None
+    with pytest.raises(FileNotFoundError):
+        list(storage.open_read("blobs/ab/cd/abcd"))
+
+
+def test_local_roundtrip(local, tmp_path):
+    _roundtrip(local, tmp_path)
+    assert local.local_path("a/b") == os.path.join(local.root, "a/b")
+    assert local.presigned_url("a/b", "b.pdf", "application/pdf") is None
+
+
+def test_s3_roundtrip(s3, tmp_path):
+    _roundtrip(s3, tmp_path)
+    assert s3.local_path("blobs/ab/cd/abcd.copy") is None
+
+    url = s3.presigned_url("blobs/ab/cd/abcd.copy", "Скан.pdf", "application/pdf")
+    assert "X-Amz-Signature" in url and "response-content-disposition" in url
+
+
+def test_migrate_local_to_s3_is_resumable(local, s3):
+    local.save_stream("blobs/aa/bb/aabb", [b"x" * 1000])
+    local.save_stream("cases/123456/scan.pdf", [b"%PDF"])
+    local.save_stream("tmp/upload-1.part", [b"partial"])
+
+    stats = migrate_storage(local, s3)
+    assert (stats["copied"], stats["failed"]) == (2, 0)
+    assert b"".join(s3.open_read("blobs/aa/bb/aabb")) == b"x" * 1000
+    # Тимчасові файли upload'ів не переносяться
+    assert s3.size("tmp/upload-1.part") is None
+
+    stats = migrate_storage(local, s3, delete_source=True)
+    assert (stats["copied"], stats["skipped"]) == (0, 2)
+    assert list(local.iter_keys("blobs/")) == []
+
+
+def test_migrate_local_to_local(local, tmp_path):
+    target = LocalStorage(str(tmp_path / "target"))
+    local.save_stream("blobs/aa/bb/aabb", [b"data"])
+
+    assert migrate_storage(local, target)["copied"] == 1
+    assert b"".join(target.open_read("blobs/aa/bb/aabb")) == b"data"
+
+
+def test_case_paths_are_sharded():
+    path = utils.get_file_storage_path(123456, "scan.pdf")
+    shard = path.split("/")
+
+    assert shard[0] == "cases" and len(shard[1]) == len(shard[2]) == 2
+    assert path.endswith("/123456/scan.pdf")
+    assert utils.get_sharded_case_path("cases/123456/scan.pdf.thumb.jpg") == path + ".thumb.jpg"
+    # Вже шардовані шляхи та blob'и не змінюються
+    assert utils.get_sharded_case_path(path) is None
+    assert utils.get_sharded_case_path("blobs/ab/cd/abcd") is None
+
+
+def test_locate_follows_moved_legacy_path(local):
+    local.save_stream(utils.get_file_storage_path(123456, "scan.pdf"), [b"%PDF"])
+
+    assert local.locate("cases/123456/scan.pdf") == (utils.get_file_storage_path(123456, "scan.pdf"), 4)
+    assert local.locate("cases/654321/gone.pdf") == ("cases/654321/gone.pdf", None)
+
+
+def test_local_iter_objects_is_ordered_and_resumable(local):
+    for key in ("cases/a.b", "cases/a/x", "cases/a/y/z", "cases/a-1/q", "tmp/upload-1.part", "blobs/aa/bb/aabb"):
+        local.save_stream(key, [b"data"])
+
+    keys = [key for key, _, _ in local.iter_objects()]
+    assert keys == ["blobs/aa/bb/aabb", "cases/a-1/q", "cases/a.b", "cases/a/x", "cases/a/y/z"]
+    # Продовження після курсора (scrubber)
+    assert [key for key, _, _ in local.iter_objects("cases/", start_after="cases/a/x")] == ["cases/a/y/z"]
+    assert all(size == 4 for _, size, _ in local.iter_objects())
+
+
+def test_local_fetch_to_temp_keeps_original(local):
+    local.save_stream("tmp/submissions/abc/0", [b"%PDF"])
+
+    temp_path = local.fetch_to_temp("tmp/submissions/abc/0")
+    assert open(temp_path, "rb").read() == b"%PDF"
+    # Staged файл подання лишається для повтору таски
+    local.save_file(temp_path, "blobs/aa/bb/aabb")
+    assert local.size("tmp/submissions/abc/0") == 4
+    assert local.size("blobs/aa/bb/aabb") == 4
+
+    with pytest.raises(FileNotFoundError):
+        local.fetch_to_temp("tmp/submissions/abc/1")
+
+
+def test_blob_placed_from_old_staged_file_is_not_an_orphan(local, scrub_env, monkeypatch):
+    # Подання чекало в черзі довше за SCRUB_ORPHAN_GRACE_SECONDS
+    local.save_stream("tmp/submissions/abc/0", [b"%PDF"])
+    old = time.time() - 30 * 24 * 3600
+    os.utime(local.local_path("tmp/submissions/abc/0"), (old, old))
+    local.save_file(local.fetch_to_temp("tmp/submissions/abc/0"), "blobs/aa/bb/aabb")
+    monkeypatch.setattr(scrubber, "_owned_keys", lambda db, keys: set())
+
+    stats = scrubber.scrub_storage(_NoDb(), fix=True, grace_seconds=3600)
+
+    assert (stats["checked"], stats["deleted"]) == (1, 0)
+    assert local.size("blobs/aa/bb/aabb") == 4
+
+
+class _NoDb:
+    def __init__(self, rows=()):
+        self._batches = [list(rows), []]
+
+    def execute(self, query):
+        return self
+
+    def all(self):
+        return self._batches.pop(0)
+
+    def commit(self):
+        pass
+
+
+_AttachmentRow = namedtuple("_AttachmentRow", "id file_path size_bytes sha256")
+
+
+@pytest.fixture
+def scrub_env(local, monkeypatch):
+    deleted = []
+    monkeypatch.setattr(scrubber, "get_storage", lambda: local)
+    monkeypatch.setattr(scrubber.crud, "get_scrub_cursor", lambda db, name: None)
+    monkeypatch.setattr(scrubber.crud, "save_scrub_cursor", lambda *args, **kwargs: None)
+    monkeypatch.setattr(scrubber.crud, "delete_attachment", lambda db, attachment_id: deleted.append(attachment_id) or True)
+    return deleted
+
+
+def _attachment_rows(count):
+    return [_AttachmentRow(uuid.UUID(int=i + 1), f"blobs/aa/bb/{i}", 4, None) for i in range(count)]
+
+
+def test_scrub_fix_deletes_rows_of_missing_files(local, scrub_env):
+    rows = _attachment_rows(10)
+    for row in rows[1:]:
+        local.save_stream(row.file_path, [b"data"])
+
+    stats = scrubber.scrub_attachments(_NoDb(rows), fix=True)
+
+    assert (stats["missing"], stats["deleted"]) == (1, 1)
+    assert scrub_env == [rows[0].id]
+
+
+def test_scrub_fix_keeps_rows_when_most_files_are_missing(local, scrub_env):
+    # Не той bucket / prefix: сховище доступне, але файлів партії немає
+    local.save_stream("blobs/ff/ff/ffff", [b"data"])
+
+    stats = scrubber.scrub_attachments(_NoDb(_attachment_rows(10)), fix=True)
+
+    assert (stats["missing"], stats["deleted"], stats["not_deleted"]) == (10, 0, 10)
+    assert scrub_env == []
+
+
+def test_scrub_skips_unavailable_storage(local, scrub_env):
+    # Не змонтований MEDIA_ROOT - порожній каталог
+    os.makedirs(local.root)
+
+    stats = scrubber.scrub_attachments(_NoDb(_attachment_rows(10)), fix=True)
+
+    assert (stats["checked"], stats["deleted"], stats["completed"]) == (0, 0, False)
+    assert scrub_env == []
+
+
+def test_scrub_keeps_fresh_hard_link_of_old_file(local, monkeypatch):
+    # dedupe_media_tree: новий blob - hard link старого файлу, рядок ще не закомічено
+    local.save_stream("cases/123456/scan.pdf", [b"%PDF"])
+    old = time.time() - 30 * 24 * 3600
+    os.utime(local.local_path("cases/123456/scan.pdf"), (old, old))
+    local.copy("cases/123456/scan.pdf", "blobs/aa/bb/aabb")
+
+    monkeypatch.setattr(scrubber, "get_storage", lambda: local)
+    monkeypatch.setattr(scrubber, "_owned_keys", lambda db, keys: set())
+    monkeypatch.setattr(scrubber.crud, "get_scrub_cursor", lambda db, name: None)
+    monkeypatch.setattr(scrubber.crud, "save_scrub_cursor", lambda *args, **kwargs: None)
+
+    stats = scrubber.scrub_storage(_NoDb(), fix=True, grace_seconds=3600)
+
+    assert stats["checked"] == 2 and stats["deleted"] == 0
+    assert local.size("blobs/aa/bb/aabb") == 4
@@ -0,0 +1,159 @@
+"""
+Tests for asynchronous case submission (app.submissions, POST /api/cases/submissions)
+
+Need PostgreSQL, see tests/conftest.py
+"""
+import hashlib
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app import crud, models, schemas, submissions
+from app.database import get_db
+from app.dependencies import get_current_active_user
+from app.main import app
+
+
+def _temp_upload(storage, content: bytes, name: str = "scan.pdf") -> dict:
+    temp_path = os.path.join(storage.get_upload_tmp_dir(), f"{hashlib.md5(content).hexdigest()}.part")
+    with open(temp_path, "wb") as f:
+        f.write(content)
+    return {
+        "temp_path": temp_path,
+        "sha256": hashlib.sha256(content).hexdigest(),
+        "size": len(content),
+        "original_name": name,
+        "mime_type": "application/pdf",
+    }
+
+
+def _case_create(refs) -> schemas.CaseCreate:
+    return schemas.CaseCreate(
+        category_id=str(refs.category.id),
+        channel_id=str(refs.channel.id),
+        applicant_name="Тестовий заявник",
+        summary="Звернення з вкладеннями",
+    )
+
+
+def _submit(db, refs, storage, contents=(b"%PDF-1.4 first", b"%PDF-1.4 second")):
+    files = [_temp_upload(storage, content, f"scan{i}.pdf") for i, content in enumerate(contents)]
+    return submissions.submit_case(db, _case_create(refs), refs.operator.id, files), files
+
+
+def _staged(storage, submission):
+    return [storage.exists(f["key"]) for f in submission.data["files"]]
+
+
+@pytest.fixture
+def client(db, refs, storage):
+    app.dependency_overrides[get_db] = lambda: db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def _login(user):
+    app.dependency_overrides[get_current_active_user] = lambda: user
+
+
+def test_submit_case_stages_files(db, refs, storage):
+    submission, files = _submit(db, refs, storage)
+
+    assert submission.status == models.CaseSubmissionStatus.PENDING
+    assert [f["original_name"] for f in submission.data["files"]] == ["scan0.pdf", "scan1.pdf"]
+    assert _staged(storage, submission) == [True, True]
+    assert not any(os.path.exists(f["temp_path"]) for f in files)
+    # Таска ставиться через outbox у тій самій транзакції
+    events = db.scalars(
+        select(models.OutboxEvent).where(
+            models.OutboxEvent.task_name == "app.celery_app.process_case_submission",
+            models.OutboxEvent.payload.contains(str(submission.id)),
+        )
+    ).all()
+    assert len(events) == 1
+
+
+def test_submit_case_cleans_up_on_error(db, refs, storage, monkeypatch):
+    def broken_create(*args, **kwargs):
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(submissions.crud, "create_case_submission", broken_create)
+
+    with pytest.raises(RuntimeError):
+        _submit(db, refs, storage)
+
+    # Staging лежить під tmp/ поруч з temp-файлами
+    assert os.listdir(storage.get_upload_tmp_dir()) == ["submissions"]
+    assert os.listdir(storage.local_path(submissions.SUBMISSION_STAGING_PREFIX)) == []
+
+
+def test_process_submission_once(db, refs, storage):
+    submission, _ = _submit(db, refs, storage)
+
+    result = submissions.process_case_submission(db, submission.id)
+
+    assert result["status"] == "completed"
+    db.refresh(submission)
+    assert submission.status == models.CaseSubmissionStatus.COMPLETED
+    assert submission.attempts == 1
+    assert str(submission.case_id) == result["case_id"]
+    assert len(crud.get_case_attachments(db, submission.case_id)) == 2
+    assert _staged(storage, submission) == [False, False]
+
+    # Повторна доставка таски не створює друге звернення
+    assert submissions.process_case_submission(db, submission.id)["status"] == "skipped"
+    cases = db.scalar(select(func.count()).select_from(models.Case).where(models.Case.author_id == refs.operator.id))
+    assert cases == 1
+
+
+def test_invalid_submission_fails_right_away(db, refs, storage):
+    submission, _ = _submit(db, refs, storage)
+    refs.category.is_active = False
+    db.commit()
+
+    result = submissions.process_case_submission(db, submission.id)
+
+    assert result["status"] == "failed"
+    db.refresh(submission)
+    assert submission.status == models.CaseSubmissionStatus.FAILED
+    assert submission.case_id is None
+    assert submission.error == result["error"]
+    assert _staged(storage, submission) == [False, False]
+    assert submissions.process_case_submission(db, submission.id)["status"] == "skipped"
+
+
+def test_submission_endpoint_returns_accepted(client, db, refs, storage):
+    _login(refs.operator)
+
+    response = client.post(
+        "/api/cases/submissions",
+        data={
+            "category_id": str(refs.category.id),
+            "channel_id": str(refs.channel.id),
+            "applicant_name": "Тестовий заявник",
+            "summary": "Звернення з вкладеннями",
+        },
+        files=[("files", ("scan.pdf", b"%PDF-1.4 upload", "application/pdf"))],
+    )
+
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status"] == "PENDING"
+    assert body["files_count"] == 1
+    assert response.headers["Location"] == f"/api/cases/submissions/{body['id']}"
+    assert client.get(response.headers["Location"]).json()["id"] == body["id"]
+
+
+def test_submission_status_visible_to_author_and_admin(client, db, refs, storage):
+    submission, _ = _submit(db, refs, storage)
+    url = f"/api/cases/submissions/{submission.id}"
+
+    _login(refs.operator)
+    assert client.get(url).status_code == 200
+    _login(refs.admin)
+    assert client.get(url).status_code == 200
+    _login(refs.other_operator)
+    assert client.get(url).status_code == 403
+    assert client.get(f"/api/cases/submissions/{refs.category.id}").status_code == 404
@@ -0,0 +1,75 @@
+"""
+Tests for streaming attachment uploads (utils.stream_upload_to_temp)
+"""
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+from starlette.datastructures import UploadFile
+
+from app import utils
+
+
+class RecordingUpload(UploadFile):
+    """UploadFile that remembers requested read sizes"""
+
+    def __init__(self, content: bytes):
+        super().__init__(file=io.BytesIO(content), filename="scan.pdf")
+        self.read_sizes = []
+
+    async def read(self, size: int = -1) -> bytes:
+        self.read_sizes.append(size)
+        return await super().read(size)
+
+
+def _stream(upload, tmp_dir, **kwargs):
+    return asyncio.run(utils.stream_upload_to_temp(upload, str(tmp_dir), **kwargs))
+
+
+def test_upload_streamed_in_chunks_with_hash(tmp_path):
+    content = os.urandom(utils.UPLOAD_CHUNK_SIZE * 3 + 123)
+    upload = RecordingUpload(content)
+
+    temp_path, size, sha256 = _stream(upload, tmp_path)
+
+    assert size == len(content)
+    assert sha256 == hashlib.sha256(content).hexdigest()
+    with open(temp_path, "rb") as f:
+        assert f.read() == content
+    # Файл не читається цілком у пам'ять
+    assert set(upload.read_sizes) == {utils.UPLOAD_CHUNK_SIZE}
+
+    full_path = tmp_path / "cases" / "100001" / "scan.pdf"
+    utils.commit_upload(temp_path, str(full_path))
+    assert not os.path.exists(temp_path)
+    assert full_path.read_bytes() == content
+
+
+def test_oversized_upload_rejected_and_cleaned_up(tmp_path):
+    max_size = utils.UPLOAD_CHUNK_SIZE * 2
+    upload = RecordingUpload(b"x" * (max_size * 10))
+
+    with pytest.raises(ValueError, match="exceeds maximum"):
+        _stream(upload, tmp_path, max_size=max_size)
+
+    # Читання зупиняється, щойно перевищено ліміт
+    assert len(upload.read_sizes) == 3
+    assert os.listdir(tmp_path) == []
+
+
+def test_empty_upload_rejected(tmp_path):
+    with pytest.raises(ValueError, match="empty"):
+        _stream(RecordingUpload(b""), tmp_path)
+    assert os.listdir(tmp_path) == []
+
+
+def test_blob_path_is_content_addressed():
+    sha256 = hashlib.sha256(b"scan").hexdigest()
+
+    path = utils.get_blob_storage_path(sha256)
+
+    assert path == f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+    # Однаковий вміст - той самий файл, незалежно від звернення та імені
+    assert utils.get_blob_storage_path(hashlib.sha256(b"scan").hexdigest()) == path
@@ -43,6 +43,7 @@ export interface OverdueCaseItem {
   category_name: string;
   applicant_name: string;
   created_at: string;
+  due_at: string;
   days_overdue: number;
   responsible_id?: string | null;
   responsible_name?: string | null;
@@ -50,6 +51,8 @@ export interface OverdueCaseItem {
 
 export interface OverdueCases {
   total_overdue: number;
+  skip: number;
+  limit: number;
   cases: OverdueCaseItem[];
 }
 